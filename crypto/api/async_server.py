@@ -0,0 +1,25 @@
+"""
+Asyncio server mode of the node. Connections are handled by the uvicorn event loop,
+the routes run in its worker threads. The transaction routes are coroutines which hand
+the signature checks to the verification pool, so slow verifications do not block other requests.
+
+Run with: python -m crypto.api.async_server [host] [port]
+"""
+import sys
+
+import uvicorn
+
+from crypto.config.setup import NODE
+
+
+def run(host: str = '127.0.0.1', port: int = 5000):
+    """
+    Serves the node with uvicorn
+    :param host: Address to listen on
+    :param port: Port to listen on
+    """
+    uvicorn.run(NODE, host=host, port=port, interface='wsgi', log_level='warning')
+
+
+if __name__ == '__main__':
+    run(*sys.argv[1:2], *[int(port) for port in sys.argv[2:3]])
@@ -0,0 +1,39 @@
+import json
+import threading
+from collections import OrderedDict
+
+from crypto.blockchain.block import Block
+
+
+class BlockJsonCache:
+
+    def __init__(self, max_size: int = 10000):
+        """
+        Keeps the JSON representation of blocks. Blocks do not change once they are part of
+        the blockchain, so a block only has to be serialized once.
+        The cache is keyed by the block hash and evicts the least recently used block.
+        :param max_size: Maximum number of cached blocks
+        """
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        # The cache is shared by the request threads
+        self._lock = threading.Lock()
+
+    def to_json(self, block: Block):
+        """
+        :param block: Block of the blockchain
+        :return: JSON representation of the block
+        :rtype: str
+        """
+        with self._lock:
+            block_json = self.entries.get(block.hash)
+            if block_json is not None:
+                self.entries.move_to_end(block.hash)
+                return block_json
+        # The serialization runs without the lock, a block which is serialized twice gets the same JSON
+        block_json = json.dumps(block.to_dict())
+        with self._lock:
+            self.entries[block.hash] = block_json
+            if len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        return block_json
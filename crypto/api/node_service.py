@@ -1,12 +1,481 @@
-import json
+import asyncio
+import struct
 
-from crypto.config.setup import BLOCKCHAIN, NODE
+from flask import Response, jsonify, request, stream_with_context
+
+from crypto.api.block_cache import BlockJsonCache
+from crypto.blockchain.address import Address
+from crypto.blockchain.block import Block
+from crypto.blockchain.codec import decode_block, decode_transaction, encode_blocks, encode_headers, \
+    encode_transaction, import_key
+from crypto.config.setup import BLOCKCHAIN, METRICS, MINING_SERVICE, NODE, PEERS, PROFILER, SYNCHRONIZER, \
+    VERIFICATION_EXECUTOR
+from crypto.network.sync import MAX_HEADERS_PER_REQUEST
+
+BLOCK_JSON_CACHE = BlockJsonCache()
+BLOCK_SERIALIZATION_TIMER = METRICS.histogram('node_block_json_serialization_seconds',
+                                              "JSON serialization of a block for /getBlocks/")
+
+
+def get_block_range():
+    """
+    Reads the range of the requested blocks from the parameters from_height and limit.
+    Without parameters all blocks are requested.
+    :return: Range of the heights of the requested blocks
+    :rtype: range
+    """
+    chain_length = len(BLOCKCHAIN.get_all_blocks)
+    from_height = max(request.args.get('from_height', 0, type=int), 0)
+    limit = request.args.get('limit', None, type=int)
+    to_height = chain_length if limit is None else min(from_height + max(limit, 0), chain_length)
+    return range(from_height, max(from_height, to_height))
+
+
+def parse_address(address: str):
+    """
+    Reads an address from a path parameter. Either the address itself with 64 hex digits
+    or the DER encoded public key in hex
+    :return: The address
+    :rtype: Address
+    :raises ValueError: If the parameter is neither an address nor a public key
+    """
+    data = bytes.fromhex(address)
+    if len(data) == Address.SIZE:
+        return Address(data)
+    import_key(data)
+    return Address.from_der(data)
+
+
+def read_block_chunks(heights: range, blocks_per_chunk: int = 100):
+    """
+    Reads the blocks in chunks. Every chunk is read at once, so a chunk never mixes two states of the chain.
+    Stops early if the chain became shorter
+    :param heights: Heights of the blocks
+    :param blocks_per_chunk: Maximum number of blocks of a chunk
+    """
+    for chunk_start in range(heights.start, heights.stop, blocks_per_chunk):
+        chunk_end = min(chunk_start + blocks_per_chunk, heights.stop)
+        blocks = BLOCKCHAIN.get_blocks(chunk_start, chunk_end)
+        if len(blocks) > 0:
+            yield blocks
+        if len(blocks) < chunk_end - chunk_start:
+            return
+
+
+def stream_blocks_as_json(heights: range):
+    """
+    Creates the JSON array of the blocks piece by piece, so the whole chain is never serialized at once
+    :param heights: Heights of the blocks
+    """
+    yield '['
+    first = True
+    for blocks in read_block_chunks(heights):
+        for block in blocks:
+            if not first:
+                yield ','
+            first = False
+            with BLOCK_SERIALIZATION_TIMER.time():
+                block_json = BLOCK_JSON_CACHE.to_json(block)
+            yield block_json
+    yield ']'
+
+
+def stream_blocks_as_binary(heights: range, blocks_per_chunk: int = 100):
+    """
+    Creates the binary encoding of the blocks in chunks of blocks
+    :param heights: Heights of the blocks
+    :param blocks_per_chunk: Number of blocks which are encoded at once
+    """
+    for blocks in read_block_chunks(heights, blocks_per_chunk):
+        yield encode_blocks(blocks)
 
 
 @NODE.route('/getBlocks/', methods=['GET'])
 def get_current_blockchain():
-    all_blocks = BLOCKCHAIN.get_all_blocks
-    blocks_to_json = []
-    for block in all_blocks:
-        blocks_to_json.append(block.to_dict())
-    return json.dumps(blocks_to_json)
+    """
+    Returns the blocks of the blockchain as a streamed JSON array.
+    Parameters:
+    from_height: Height of the first block, default 0
+    limit: Maximum number of blocks, default all blocks
+    format=binary: Returns the blocks in the compact binary encoding
+    The ETag is the hash of the last block, so unchanged chains are answered with 304.
+    """
+    etag = BLOCKCHAIN.get_last_block.hash
+    if etag in request.if_none_match:
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    heights = get_block_range()
+    if len(heights) > 0 and heights.start < BLOCKCHAIN.pruned_height:
+        return pruned_response(heights.start)
+    if request.args.get('format') == 'binary':
+        response = Response(stream_with_context(stream_blocks_as_binary(heights)),
+                            mimetype='application/octet-stream')
+    else:
+        response = Response(stream_with_context(stream_blocks_as_json(heights)), mimetype='application/json')
+    response.set_etag(etag)
+    return response
+
+
+def pruned_response(height: int):
+    return jsonify({"error": "The transactions of block {} are pruned".format(height),
+                    "pruned_height": BLOCKCHAIN.pruned_height}), 404
+
+
+def block_response(block):
+    if block is None:
+        return Response(status=404)
+    if not isinstance(block, Block):
+        return pruned_response(block.index)
+    if request.args.get('format') == 'binary':
+        return Response(encode_blocks([block]), mimetype='application/octet-stream')
+    return Response(BLOCK_JSON_CACHE.to_json(block), mimetype='application/json')
+
+
+@NODE.route('/blocks/<int:height>', methods=['GET'])
+def get_block_by_height(height: int):
+    """
+    Returns a single block by its height
+    """
+    blocks = BLOCKCHAIN.get_blocks(height, height + 1)
+    return block_response(blocks[0] if len(blocks) > 0 else None)
+
+
+@NODE.route('/blocks/hash/<block_hash>', methods=['GET'])
+def get_block_by_hash(block_hash: str):
+    """
+    Returns a single block by its hash
+    """
+    return block_response(BLOCKCHAIN.get_block_by_hash(block_hash))
+
+
+@NODE.route('/blocks/', methods=['POST'])
+async def announce_block():
+    """
+    Adds a block which was mined by a peer. Blocks of other branches are kept and
+    the node switches to a branch with more work.
+    Expects a block in the binary encoding as body
+    """
+    try:
+        block = decode_block(request.get_data())
+    except (TypeError, ValueError, struct.error):
+        return error_response("Invalid block")
+    loop = asyncio.get_running_loop()
+    added = await loop.run_in_executor(None, BLOCKCHAIN.add_block, block, VERIFICATION_EXECUTOR)
+    return jsonify({"added": added, "height": BLOCKCHAIN.get_last_block.index})
+
+
+@NODE.route('/balance/<address>', methods=['GET'])
+def get_balance(address: str):
+    """
+    Returns the balance of an address. The address is given in hex, either as address or as DER encoded public key
+    """
+    try:
+        account = parse_address(address)
+    except ValueError:
+        return error_response("Invalid address")
+    return jsonify({
+        "address": address,
+        "balance": BLOCKCHAIN.get_balance_for_address(account),
+        "available_balance": BLOCKCHAIN.get_available_balance(account)
+    })
+
+
+@NODE.route('/transactions/<txid>', methods=['GET'])
+def get_transaction(txid: str):
+    """
+    Returns a mined transaction with the height and the hash of its block. The txid is the transaction hash in hex
+    """
+    try:
+        location = BLOCKCHAIN.get_transaction(bytes.fromhex(txid))
+    except ValueError:
+        return error_response("Invalid transaction id")
+    if location is None:
+        return Response(status=404)
+    block, position = location
+    return jsonify({
+        "txid": txid,
+        "block_height": block.index,
+        "block_hash": block.hash,
+        "position": position,
+        "transaction": block.transactions[position].to_dict()
+    })
+
+
+@NODE.route('/addresses/<address>/transactions', methods=['GET'])
+def get_address_history(address: str):
+    """
+    Returns the mined transactions which were sent or received by an address, starting with the oldest.
+    The address is given in hex, either as address or as DER encoded public key.
+    Parameters:
+    offset: Number of skipped transactions, default 0
+    limit: Maximum number of transactions, default and maximum 1000
+    """
+    try:
+        account = parse_address(address)
+    except ValueError:
+        return error_response("Invalid address")
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = min(max(request.args.get('limit', 1000, type=int), 0), 1000)
+    return jsonify({
+        "address": address,
+        "transactions": [{
+            "txid": tx.hash_transaction().hexdigest(),
+            "block_height": height,
+            "position": position,
+            "transaction": tx.to_dict()
+        } for height, position, tx in BLOCKCHAIN.get_address_history(account, offset, limit)]
+    })
+
+
+def proof_entry(block: Block, position: int):
+    """
+    :return: Encoded transaction of a block with the merkle proof of its position, see LightClient
+    :rtype: dict
+    """
+    transaction = block.transactions[position]
+    return {
+        "txid": transaction.hash_transaction().hexdigest(),
+        "block_height": block.index,
+        "block_hash": block.hash,
+        "position": position,
+        "transaction": encode_transaction(transaction).hex(),
+        "proof": block.get_merkle_proof(position)
+    }
+
+
+@NODE.route('/transactions/<txid>/proof', methods=['GET'])
+def get_transaction_proof(txid: str):
+    """
+    Returns a mined transaction with the proof that it is part of the merkle root of its block,
+    so a light client only needs the header of the block to check it
+    """
+    try:
+        location = BLOCKCHAIN.get_transaction(bytes.fromhex(txid))
+    except ValueError:
+        return error_response("Invalid transaction id")
+    if location is None:
+        return Response(status=404)
+    return jsonify(proof_entry(*location))
+
+
+@NODE.route('/addresses/<address>/proofs', methods=['GET'])
+def get_address_proofs(address: str):
+    """
+    Returns the mined transactions of an address with their merkle proofs, starting with the oldest.
+    A light client checks them against its headers instead of downloading the blocks.
+    Parameters:
+    offset: Number of skipped transactions, default 0
+    limit: Maximum number of transactions, default and maximum 1000
+    """
+    try:
+        account = parse_address(address)
+    except ValueError:
+        return error_response("Invalid address")
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = min(max(request.args.get('limit', 1000, type=int), 0), 1000)
+    # The history and the blocks are read from the same state of the chain
+    with BLOCKCHAIN.lock.read():
+        locations = [(BLOCKCHAIN.get_block_by_index(height), position)
+                     for height, position, _ in BLOCKCHAIN.get_address_history(account, offset, limit)]
+    return jsonify({
+        "address": address,
+        "transactions": [proof_entry(block, position) for block, position in locations]
+    })
+
+
+def error_response(message: str):
+    return jsonify({"error": message}), 400
+
+
+def decode_submitted_transactions(encoded_transactions):
+    """
+    :param encoded_transactions: Transactions in the binary encoding as hex
+    :return: Decoded transactions
+    :raises ValueError: If the transactions are not a list or a transaction can not be decoded
+    """
+    if not isinstance(encoded_transactions, list):
+        raise ValueError("Expected a list of transactions")
+    transactions = []
+    for encoded_transaction in encoded_transactions:
+        try:
+            transactions.append(decode_transaction(bytes.fromhex(encoded_transaction))[0])
+        except (TypeError, struct.error) as error:
+            raise ValueError(str(error))
+    return transactions
+
+
+async def add_submitted_transactions(transactions):
+    """
+    Adds transactions without blocking the event loop.
+    The signatures are verified by the verification pool.
+    :return: For each transaction True if it was added otherwise False
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, BLOCKCHAIN.add_new_transactions, transactions, VERIFICATION_EXECUTOR)
+
+
+@NODE.route('/transactions/', methods=['POST'])
+async def submit_transaction():
+    """
+    Adds a transaction to the opened transactions.
+    Expects {"transaction": <binary encoded transaction in hex>}
+    """
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return error_response("Invalid transaction")
+    try:
+        transactions = decode_submitted_transactions([body.get("transaction")])
+    except ValueError:
+        return error_response("Invalid transaction")
+    accepted = await add_submitted_transactions(transactions)
+    return jsonify({"accepted": accepted[0]})
+
+
+@NODE.route('/transactions/bulk/', methods=['POST'])
+async def submit_transactions():
+    """
+    Adds many transactions to the opened transactions in the given order.
+    Expects {"transactions": [<binary encoded transaction in hex>, ...]}
+    """
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return error_response("Invalid transactions")
+    try:
+        transactions = decode_submitted_transactions(body.get("transactions"))
+    except ValueError:
+        return error_response("Invalid transactions")
+    accepted = await add_submitted_transactions(transactions)
+    return jsonify({"accepted": accepted})
+
+
+@NODE.route('/mining/', methods=['GET'])
+def get_mining_status():
+    """
+    Returns the state of the background mining
+    """
+    return jsonify(MINING_SERVICE.status())
+
+
+@NODE.route('/mining/start/', methods=['POST'])
+def start_mining():
+    """
+    Starts the background mining. Accepts {"empty_blocks": true} to mine without opened transactions
+    """
+    body = request.get_json(silent=True) or {}
+    MINING_SERVICE.mine_empty_blocks = bool(body.get("empty_blocks", MINING_SERVICE.mine_empty_blocks))
+    MINING_SERVICE.start()
+    return jsonify(MINING_SERVICE.status())
+
+
+@NODE.route('/mining/stop/', methods=['POST'])
+def stop_mining():
+    MINING_SERVICE.stop()
+    return jsonify(MINING_SERVICE.status())
+
+
+@NODE.route('/status/', methods=['GET'])
+def get_chain_status():
+    """
+    Returns the height, the hash of the last block and the total work of the chain,
+    so a peer can decide if it has to sync without downloading headers
+    """
+    with BLOCKCHAIN.lock.read():
+        last_block = BLOCKCHAIN.get_last_block
+        return jsonify({"height": last_block.index, "hash": last_block.hash, "work": BLOCKCHAIN.total_work})
+
+
+@NODE.route('/headers/', methods=['GET'])
+def get_headers():
+    """
+    Returns the binary encoded headers of the blocks without their transactions.
+    Parameters:
+    from_height: Height of the first header, default 0
+    limit: Maximum number of headers, default and maximum 2000
+    """
+    limit = min(max(request.args.get('limit', MAX_HEADERS_PER_REQUEST, type=int), 0), MAX_HEADERS_PER_REQUEST)
+    chain_length = len(BLOCKCHAIN.get_all_blocks)
+    from_height = min(max(request.args.get('from_height', 0, type=int), 0), chain_length)
+    headers = BLOCKCHAIN.get_blocks(from_height, from_height + limit)
+    return Response(encode_headers(headers), mimetype='application/octet-stream')
+
+
+@NODE.route('/snapshot/', methods=['GET'])
+def get_snapshot():
+    """
+    Returns the binary encoded balances after the last block, so a new node can start from the snapshot
+    and the headers instead of replaying the chain from the genesis block
+    """
+    return Response(BLOCKCHAIN.create_snapshot().encode(), mimetype='application/octet-stream')
+
+
+@NODE.route('/peers/', methods=['GET'])
+def get_peers():
+    return jsonify({"peers": list(PEERS)})
+
+
+@NODE.route('/peers/', methods=['POST'])
+def register_peer():
+    """
+    Registers a node. Expects {"url": "http://<host>:<port>"}
+    """
+    body = request.get_json(silent=True) or {}
+    try:
+        added = PEERS.add(body["url"])
+    except (KeyError, TypeError, ValueError):
+        return error_response("Invalid peer URL")
+    return jsonify({"added": added, "peers": list(PEERS)})
+
+
+@NODE.route('/sync/', methods=['POST'])
+async def sync_with_peers():
+    """
+    Synchronizes the chain with the peers without blocking the event loop
+    """
+    loop = asyncio.get_running_loop()
+    replaced = await loop.run_in_executor(None, SYNCHRONIZER.sync)
+    return jsonify({"replaced": replaced, "height": BLOCKCHAIN.get_last_block.index})
+
+
+@NODE.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Returns the timers, counters and gauges of the node in the Prometheus text format
+    """
+    return Response(METRICS.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@NODE.route('/profiler/', methods=['GET'])
+def get_profile():
+    """
+    Returns the sampled stacks in the collapsed stack format, starting with the most frequent stack.
+    Parameters:
+    limit: Maximum number of stacks, default all stacks
+    """
+    return Response(PROFILER.report(request.args.get('limit', None, type=int)), mimetype='text/plain')
+
+
+@NODE.route('/profiler/start/', methods=['POST'])
+def start_profiler():
+    """
+    Starts the sampling profiler. Accepts {"interval": seconds} and {"reset": true} to drop the previous samples
+    """
+    body = request.get_json(silent=True) or {}
+    try:
+        interval = float(body.get("interval", PROFILER.interval))
+    except (TypeError, ValueError):
+        return error_response("Invalid interval")
+    if interval <= 0:
+        return error_response("Invalid interval")
+    PROFILER.interval = interval
+    if body.get("reset"):
+        PROFILER.reset()
+    PROFILER.start()
+    return jsonify({"running": PROFILER.is_running, "interval": PROFILER.interval, "samples": PROFILER.samples})
+
+
+@NODE.route('/profiler/stop/', methods=['POST'])
+def stop_profiler():
+    PROFILER.stop()
+    return jsonify({"running": PROFILER.is_running, "interval": PROFILER.interval, "samples": PROFILER.samples})
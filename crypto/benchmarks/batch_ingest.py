@@ -0,0 +1,61 @@
+"""
+Throughput benchmark of the transaction ingestion.
+Compares adding transactions one by one with adding them in a batch with parallel signature verification.
+
+Run with: python -m crypto.benchmarks.batch_ingest
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from crypto.blockchain.blockchain import Blockchain
+from crypto.blockchain.transaction import Transaction
+from crypto.client.client import Client
+from crypto.client.key_provider import DeterministicKeyPool
+
+TRANSACTIONS = 500
+
+
+def create_transactions(blockchain: Blockchain, count: int):
+    supply_user = blockchain.token.supply_user
+    keys = DeterministicKeyPool()
+    recipients = [Client(keys) for _ in range(4)]
+    transactions = []
+    for i in range(count):
+        tx = Transaction(supply_user.public_key, recipients[i % len(recipients)].public_key, 1)
+        tx.sign_transaction(supply_user.private_key)
+        transactions.append(tx)
+    return transactions
+
+
+def measure(name: str, add_transactions):
+    blockchain = Blockchain(key_provider=DeterministicKeyPool())
+    transactions = create_transactions(blockchain, TRANSACTIONS)
+    start = time.perf_counter()
+    added = add_transactions(blockchain, transactions)
+    elapsed = time.perf_counter() - start
+    assert added == TRANSACTIONS
+    print("{:<24} {:>10.0f} transactions/s".format(name, TRANSACTIONS / elapsed))
+
+
+def one_by_one(blockchain: Blockchain, transactions):
+    return sum(blockchain.add_new_transaction(tx) for tx in transactions)
+
+
+def batch_with_threads(blockchain: Blockchain, transactions):
+    with ThreadPoolExecutor() as executor:
+        return sum(blockchain.add_new_transactions(transactions, executor))
+
+
+def batch_with_processes(blockchain: Blockchain, transactions):
+    with ProcessPoolExecutor() as executor:
+        return sum(blockchain.add_new_transactions(transactions, executor))
+
+
+def main():
+    measure("one by one", one_by_one)
+    measure("batch (threads)", batch_with_threads)
+    measure("batch (processes)", batch_with_processes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmark of the binary encoding of blocks compared with the dictionary and JSON encoding.
+
+Run with: python -m crypto.benchmarks.codec
+"""
+import json
+import timeit
+
+from crypto.blockchain.block import Block
+from crypto.blockchain.codec import decode_blocks, encode_blocks
+from crypto.blockchain.transaction import Transaction
+from crypto.client.client import Client
+from crypto.client.key_provider import DeterministicKeyPool
+
+BLOCKS = 20
+TRANSACTIONS_PER_BLOCK = 50
+
+
+def create_blocks():
+    keys = DeterministicKeyPool()
+    users = [Client(keys) for _ in range(4)]
+    blocks = []
+    for index in range(BLOCKS):
+        transactions = []
+        for i in range(TRANSACTIONS_PER_BLOCK):
+            sender = users[i % len(users)]
+            tx = Transaction(sender.public_key, users[(i + 1) % len(users)].public_key, i)
+            tx.sign_transaction(sender.private_key)
+            transactions.append(tx)
+        blocks.append(Block(index, "00" * 32, "ab" * 32, transactions, 0))
+    return blocks
+
+
+def encode_json(blocks):
+    return json.dumps([block.to_dict() for block in blocks])
+
+
+def main():
+    blocks = create_blocks()
+    json_data = encode_json(blocks)
+    binary_data = encode_blocks(blocks)
+
+    json_encode = min(timeit.repeat(lambda: encode_json(blocks), number=5, repeat=3)) / 5
+    binary_encode = min(timeit.repeat(lambda: encode_blocks(blocks), number=5, repeat=3)) / 5
+    json_decode = min(timeit.repeat(lambda: json.loads(json_data), number=5, repeat=3)) / 5
+    binary_decode = min(timeit.repeat(lambda: decode_blocks(binary_data), number=5, repeat=3)) / 5
+
+    print("{:<8} {:>12} {:>14} {:>14}".format("format", "size (bytes)", "encode (ms)", "decode (ms)"))
+    print("{:<8} {:>12} {:>14.2f} {:>14.2f}".format("json", len(json_data), json_encode * 1000, json_decode * 1000))
+    print("{:<8} {:>12} {:>14.2f} {:>14.2f}".format("binary", len(binary_data), binary_encode * 1000,
+                                                    binary_decode * 1000))
+    print("JSON decoding only parses the text, the binary decoding creates Block and Transaction objects")
+
+
+if __name__ == '__main__':
+    main()
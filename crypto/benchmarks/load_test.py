@@ -0,0 +1,141 @@
+"""
+Load test of a running node. Measures requests per second and the latency percentiles.
+
+Start a node, e.g. with: python -m crypto.api.async_server 127.0.0.1 5000
+Run with: python -m crypto.benchmarks.load_test --url http://127.0.0.1:5000 --endpoint submit
+
+The submitted transactions are only accepted if their sender has coins. With --funding-key the sender is funded
+before the measurement starts from a key with a balance on the node, e.g. <DATA_DIR>/keys/supply.pem of the node.
+The funding transaction has to be mined, so the background mining of the node is started.
+Without a funding key the node rejects every submitted transaction and only the rejection path is measured.
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlparse
+
+from crypto.blockchain.codec import encode_transaction
+from crypto.blockchain.transaction import Transaction
+from crypto.client.client import Client
+from crypto.client.key_provider import read_key_from_file
+
+
+def request_json(url: str, method: str, path: str, body=None):
+    """
+    :return: Decoded JSON response of the node
+    """
+    parsed_url = urlparse(url)
+    connection = http.client.HTTPConnection(parsed_url.hostname, parsed_url.port)
+    try:
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        connection.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+        return json.loads(connection.getresponse().read())
+    finally:
+        connection.close()
+
+
+def fund_sender(url: str, funding_key_path: str, sender: Client, amount: int, timeout: float = 300.0):
+    """
+    Transfers the amount to the sender and waits until the transfer is mined
+    :param funding_key_path: PEM file of a key with a balance on the node
+    :raises RuntimeError: If the transfer is rejected or not mined in time
+    """
+    funder = Client(private_key=read_key_from_file(funding_key_path))
+    transaction = Transaction(funder.public_key, sender.public_key, amount)
+    transaction.sign_transaction(funder.private_key)
+    response = request_json(url, 'POST', '/transactions/', {"transaction": encode_transaction(transaction).hex()})
+    if not response.get("accepted"):
+        raise RuntimeError("The node rejected the funding transaction: {}".format(response))
+    request_json(url, 'POST', '/mining/start/')
+    address = sender.public_key.export_key('DER').hex()
+    deadline = time.monotonic() + timeout
+    while request_json(url, 'GET', '/balance/' + address)["balance"] < amount:
+        if time.monotonic() > deadline:
+            raise RuntimeError("The funding transaction was not mined within {} seconds".format(timeout))
+        time.sleep(0.5)
+
+
+def create_requests(endpoint: str, count: int, url: str = None, funding_key_path: str = None):
+    """
+    :param url: URL of the node, used to fund the sender of submitted transactions
+    :param funding_key_path: Optional PEM file of a key with a balance on the node
+    :return: List of (method, path, body) for the endpoint
+    """
+    sender = Client()
+    recipient = Client()
+    if endpoint == 'balance':
+        address = sender.public_key.export_key('DER').hex()
+        return [('GET', '/balance/' + address, None)] * count
+    if endpoint == 'blocks':
+        return [('GET', '/getBlocks/?from_height=0&limit=10', None)] * count
+    if funding_key_path:
+        fund_sender(url, funding_key_path, sender, count)
+    requests = []
+    for _ in range(count):
+        # Every transaction has its own timestamp, so transactions with the same amount are distinct
+        transaction = Transaction(sender.public_key, recipient.public_key, 1)
+        transaction.sign_transaction(sender.private_key)
+        body = json.dumps({"transaction": encode_transaction(transaction).hex()})
+        requests.append(('POST', '/transactions/', body))
+    return requests
+
+
+def run_worker(url, requests, latencies, errors):
+    parsed_url = urlparse(url)
+    connection = http.client.HTTPConnection(parsed_url.hostname, parsed_url.port)
+    for method, path, body in requests:
+        start = time.perf_counter()
+        try:
+            headers = {'Content-Type': 'application/json'} if body else {}
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status >= 500:
+                errors.append(response.status)
+        except (OSError, http.client.HTTPException) as error:
+            errors.append(error)
+            connection.close()
+            connection = http.client.HTTPConnection(parsed_url.hostname, parsed_url.port)
+        latencies.append(time.perf_counter() - start)
+    connection.close()
+
+
+def percentile(values, fraction: float):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test of a node")
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--endpoint', choices=['submit', 'balance', 'blocks'], default='submit')
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--funding-key', help="PEM file of a key with a balance on the node, "
+                                              "funds the sender of the submitted transactions")
+    args = parser.parse_args()
+
+    requests = create_requests(args.endpoint, args.requests, args.url, args.funding_key)
+    latencies = []
+    errors = []
+    workers = [threading.Thread(target=run_worker,
+                                args=(args.url, requests[i::args.concurrency], latencies, errors))
+               for i in range(args.concurrency)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    print("requests:     {}".format(len(latencies)))
+    print("errors:       {}".format(len(errors)))
+    print("requests/s:   {:.0f}".format(len(latencies) / elapsed))
+    print("p50 latency:  {:.2f} ms".format(percentile(latencies, 0.50) * 1000))
+    print("p99 latency:  {:.2f} ms".format(percentile(latencies, 0.99) * 1000))
+
+
+if __name__ == '__main__':
+    main()
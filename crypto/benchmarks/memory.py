@@ -0,0 +1,83 @@
+"""
+Memory benchmark of a chain with one million transactions.
+Measures the memory of the decoded blocks, the account state and the chain index.
+Decoded transactions share the keys, DER encodings and addresses of their accounts.
+
+Run with: python -m crypto.benchmarks.memory
+"""
+import os
+import time
+import tracemalloc
+
+from crypto.blockchain.account_state import AccountState
+from crypto.blockchain.block import Block
+from crypto.blockchain.codec import decode_transaction, encode_transaction
+from crypto.blockchain.transaction import Transaction
+from crypto.client.client import Client
+from crypto.client.key_provider import DeterministicKeyPool
+from crypto.storage.chain_index import ChainIndex
+
+TRANSACTIONS = 1000000
+TRANSACTIONS_PER_BLOCK = 1000
+ADDRESSES = 100
+
+
+def create_encoded_transactions(users: [Client], count: int):
+    """
+    Creates distinct encoded transactions between the users. The signatures are random bytes,
+    because only the size of a transaction matters for this benchmark
+    """
+    keys = [(user.public_key, user.public_key.export_key('DER')) for user in users]
+    for i in range(count):
+        sender_key, sender_der = keys[i % len(keys)]
+        recipient_key, recipient_der = keys[(i * 7 + 1) % len(keys)]
+        tx = Transaction(sender_key, recipient_key, i % 1000 + 1, i % 3)
+        tx._sender_der = sender_der
+        tx._recipient_der = recipient_der
+        tx.signature = os.urandom(128)
+        yield encode_transaction(tx)
+
+
+def create_blocks(users: [Client]):
+    blocks = []
+    transactions = []
+    for data in create_encoded_transactions(users, TRANSACTIONS):
+        transactions.append(decode_transaction(data)[0])
+        if len(transactions) == TRANSACTIONS_PER_BLOCK:
+            blocks.append(Block(len(blocks), "00" * 32, "ab" * 32, transactions, 0))
+            transactions = []
+    if transactions:
+        blocks.append(Block(len(blocks), "00" * 32, "ab" * 32, transactions, 0))
+    return blocks
+
+
+def measure(name: str, create):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = create()
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print("{:<14} {:>10.1f} MB {:>8.1f} bytes/transaction {:>8.2f} s".format(
+        name, size / 2 ** 20, size / TRANSACTIONS, elapsed))
+    return result
+
+
+def create_index(blocks: [Block]):
+    index = ChainIndex()
+    for block in blocks:
+        index.add_block(block)
+    return index
+
+
+def main():
+    keys = DeterministicKeyPool()
+    users = [Client(keys) for _ in range(ADDRESSES)]
+    blocks = measure("blocks", lambda: create_blocks(users))
+    state = measure("account state", lambda: AccountState.from_blocks(blocks))
+    measure("chain index", lambda: create_index(blocks))
+    assert len(state.balances) <= ADDRESSES
+
+
+if __name__ == '__main__':
+    main()
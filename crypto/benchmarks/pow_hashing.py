@@ -0,0 +1,52 @@
+"""
+Micro benchmark of the proof of work hashing.
+Compares the hashing of the whole header for every nonce with the hashing based on the header midstate.
+
+Run with: python -m crypto.benchmarks.pow_hashing
+"""
+import timeit
+
+from crypto.blockchain.block import Block, meets_target
+
+NONCES = 200000
+
+
+def create_block():
+    return Block(42, "00" + "ab" * 31, "cd" * 32, [], 0)
+
+
+def hash_every_nonce(block: Block, nonces: int):
+    for nonce in range(nonces):
+        block.nonce = nonce
+        int(block.hash_block(), 16) < block.target
+
+
+def hash_with_midstate(block: Block, nonces: int):
+    midstate = block.header_midstate()
+    target = block.target
+    for nonce in range(nonces):
+        meets_target(Block.hash_nonce(midstate, nonce), target)
+
+
+def check_identical_hashes(nonces: int):
+    block = create_block()
+    midstate = block.header_midstate()
+    for nonce in range(nonces):
+        block.nonce = nonce
+        assert block.hash_block() == Block.hash_nonce(midstate, nonce).hex()
+
+
+def main():
+    check_identical_hashes(10000)
+
+    block = create_block()
+    hash_block_time = min(timeit.repeat(lambda: hash_every_nonce(block, NONCES), number=1, repeat=3))
+    midstate_time = min(timeit.repeat(lambda: hash_with_midstate(block, NONCES), number=1, repeat=3))
+
+    print("hash_block:  {:>10.0f} hashes/s".format(NONCES / hash_block_time))
+    print("midstate:    {:>10.0f} hashes/s".format(NONCES / midstate_time))
+    print("speedup:     {:>10.2f}x".format(hash_block_time / midstate_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""
+Benchmark suite for chains with 10^3 to 10^6 transactions. Measures mining, balance lookups,
+ingestion and serialization and reports the statistics of the rounds like pytest-benchmark.
+The keys come from a DeterministicKeyPool, so the results are reproducible and no key is generated per object.
+The transactions of the chain carry random signatures, because signing a million transactions would dominate
+the setup. Only the benchmarked batches are signed.
+
+Run with: python -m crypto.benchmarks.suite
+Run with: python -m crypto.benchmarks.suite --sizes 1000 10000
+"""
+import argparse
+import os
+import statistics
+import time
+
+from crypto.blockchain.address import Address
+from crypto.blockchain.block import Block
+from crypto.blockchain.blockchain import Blockchain
+from crypto.blockchain.codec import decode_blocks, encode_blocks
+from crypto.blockchain.mempool import Mempool
+from crypto.blockchain.transaction import Transaction
+from crypto.blockchain.verification import VerificationCache
+from crypto.client.client import Client
+from crypto.client.key_provider import DeterministicKeyPool
+
+CHAIN_SIZES = (10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6)
+TRANSACTIONS_PER_BLOCK = 1000
+ADDRESSES = 20
+# Size of the signed batches which are ingested and mined
+BATCH_SIZE = 1000
+MAX_ROUNDS = 1000
+# Rounds are repeated until this number of seconds is spent, but at least once
+MAX_TIME = 1.0
+
+
+class Benchmark:
+
+    def __init__(self, group: str):
+        """
+        Collects the statistics of the benchmarks of a group, e.g. of one chain size
+        """
+        self.group = group
+        self.results = []
+
+    def __call__(self, name: str, function, setup=None, max_rounds: int = MAX_ROUNDS):
+        """
+        Calls the function until MAX_TIME is spent or max_rounds are done. Only the function is timed.
+        :param name: Name of the benchmark
+        :param function: Function without arguments
+        :param setup: Optional function which is called before every round
+        :param max_rounds: Maximum number of rounds
+        """
+        durations = []
+        while len(durations) < max_rounds and sum(durations) < MAX_TIME:
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            function()
+            durations.append(time.perf_counter() - start)
+        self.results.append((name, durations))
+
+    def report(self):
+        print("\n{} {}".format("-" * 16, self.group))
+        print("{:<24} {:>12} {:>12} {:>12} {:>12} {:>8}".format(
+            "Name (time in ms)", "Min", "Max", "Mean", "StdDev", "Rounds"))
+        for name, durations in self.results:
+            print("{:<24} {:>12.3f} {:>12.3f} {:>12.3f} {:>12.3f} {:>8}".format(
+                name, min(durations) * 1000, max(durations) * 1000, statistics.mean(durations) * 1000,
+                statistics.stdev(durations) * 1000 if len(durations) > 1 else 0.0, len(durations)))
+
+
+def create_chain(size: int, users: [Client], rich_user: Client):
+    """
+    Creates a blockchain with the number of transactions between the users.
+    The first transaction funds the rich user, who sends the benchmarked batches
+    """
+    # The difficulty is never adjusted, so every block is mined with the first nonces
+    blockchain = Blockchain(difficulty=1, retarget_interval=10 ** 9, key_provider=DeterministicKeyPool())
+    # Every transaction of an address shares the DER encoding and the address like decoded transactions
+    accounts = [(user.public_key, user.public_key.export_key('DER'), Address.from_key(user.public_key))
+                for user in users + [rich_user]]
+    transactions = []
+    for i in range(size):
+        if i == 0:
+            sender, recipient = accounts[0], accounts[-1]
+            amount = 10 ** 12
+        else:
+            sender, recipient = accounts[i % len(users)], accounts[(i * 7 + 1) % len(users)]
+            amount = i % 100 + 1
+        tx = Transaction(sender[0], recipient[0], amount)
+        tx._sender_der, tx._sender_address = sender[1:]
+        tx._recipient_der, tx._recipient_address = recipient[1:]
+        tx.signature = os.urandom(128)
+        transactions.append(tx)
+        if len(transactions) == TRANSACTIONS_PER_BLOCK or i == size - 1:
+            last_block = blockchain.get_last_block
+            block = Block(last_block.index + 1, last_block.hash, blockchain.hash_transactions(transactions),
+                          transactions, 0, blockchain.get_next_difficulty())
+            blockchain.proof_of_work(block)
+            assert blockchain.add_block_to_chain(block)
+            transactions = []
+    return blockchain
+
+
+def create_batches(users: [Client], rich_user: Client, count: int):
+    """
+    :return: Signed batches of transactions of the rich user. Every transaction is unique
+    """
+    batches = []
+    for batch_number in range(count):
+        batch = []
+        for i in range(BATCH_SIZE):
+            tx = Transaction(rich_user.public_key, users[i % len(users)].public_key, batch_number * BATCH_SIZE + i + 1)
+            tx.sign_transaction(rich_user.private_key)
+            batch.append(tx)
+        batches.append(batch)
+    return batches
+
+
+def reset_mempool(blockchain: Blockchain):
+    blockchain.mempool = Mempool()
+    blockchain.account_state.clear_pending_transactions()
+    blockchain.open_transactions_tree = None
+    blockchain.verification_cache = VerificationCache()
+
+
+def run(size: int, users: [Client], rich_user: Client, batches):
+    start = time.perf_counter()
+    blockchain = create_chain(size, users, rich_user)
+    benchmark = Benchmark("{} transactions (setup {:.1f} s)".format(size, time.perf_counter() - start))
+
+    address = Address.from_key(rich_user.public_key)
+    benchmark("balance lookup (key)", lambda: blockchain.get_balance_for_address(rich_user.public_key))
+    benchmark("balance lookup", lambda: blockchain.get_balance_for_address(address))
+    benchmark("address history", lambda: blockchain.get_address_history(address, 0, 100))
+
+    benchmark("ingest batch", lambda: blockchain.add_new_transactions(batches[0]),
+              setup=lambda: reset_mempool(blockchain))
+
+    mining_batches = iter(batches)
+
+    def add_next_batch():
+        reset_mempool(blockchain)
+        for tx in next(mining_batches):
+            assert blockchain.add_verified_transaction(tx)
+
+    benchmark("mine block", blockchain.mine_block, setup=add_next_batch, max_rounds=len(batches))
+
+    data = encode_blocks(blockchain.blocks)
+    benchmark("encode chain", lambda: encode_blocks(blockchain.blocks))
+    benchmark("decode chain", lambda: decode_blocks(data))
+    benchmark.report()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite for chains of different sizes")
+    parser.add_argument('--sizes', type=int, nargs='+', default=CHAIN_SIZES, help="Numbers of transactions")
+    parser.add_argument('--mining-rounds', type=int, default=3, help="Number of mined blocks per size")
+    arguments = parser.parse_args()
+
+    keys = DeterministicKeyPool(seed=1)
+    users = [Client(keys) for _ in range(ADDRESSES)]
+    rich_user = Client(keys)
+    batches = create_batches(users, rich_user, arguments.mining_rounds)
+    for size in arguments.sizes:
+        run(size, users, rich_user, batches)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+from Crypto.PublicKey.RSA import RsaKey
+
+from crypto.blockchain.address import Address
+
+
+def address_of(account):
+    """
+    Creates the lookup key of an address for the account state and the chain index
+    :param account: Public (or private) key of the address or the address itself
+    :return: Address of the account
+    :rtype: Address
+    """
+    if isinstance(account, Address):
+        return account
+    return Address.from_key(account)
+
+
+class AccountState:
+
+    def __init__(self, fee_collector: Address = None):
+        """
+        Keeps the balance of every address up to date, so that a lookup does not
+        have to walk through the whole blockchain.
+        Confirmed balances only contain transactions of blocks. Pending debits contain the
+        amounts which are already spent by unprocessed transactions.
+        :param fee_collector: Address which receives the fees of the transactions.
+        The fees are paid out to the miners with the mining rewards
+        """
+        self.fee_collector = fee_collector
+        self.balances = {}
+        self.pending_debits = {}
+
+    def _add_to_balance(self, address: Address, amount: int):
+        balance = self.balances.get(address, 0) + amount
+        if balance == 0:
+            self.balances.pop(address, None)
+        else:
+            self.balances[address] = balance
+
+    def apply_transaction(self, transaction, direction: int = 1):
+        """
+        Books a confirmed transaction
+        :param transaction: Transaction which is part of a block
+        :param direction: 1 to book the transaction, -1 to cancel the booking
+        """
+        self._add_to_balance(transaction.sender_address, -direction * (transaction.amount + transaction.fee))
+        self._add_to_balance(transaction.recipient_address, direction * transaction.amount)
+        if transaction.fee != 0 and self.fee_collector is not None:
+            self._add_to_balance(self.fee_collector, direction * transaction.fee)
+
+    def apply_block(self, block):
+        """
+        Books all transactions of a block
+        :param block: Block which was added to the blockchain
+        """
+        for tx in block.transactions:
+            self.apply_transaction(tx)
+
+    def revert_block(self, block):
+        """
+        Cancels the bookings of a block, e.g. when the block is replaced by a block of another branch.
+        Only the balances of the addresses in the block change, so a reorganization does not replay the chain.
+        :param block: Last block of the blockchain
+        """
+        for tx in reversed(block.transactions):
+            self.apply_transaction(tx, -1)
+
+    def add_pending_transaction(self, transaction):
+        """
+        Reserves the amount of an unprocessed transaction for the sender
+        :param transaction: Transaction which was added to the opened transactions
+        """
+        sender = transaction.sender_address
+        self.pending_debits[sender] = self.pending_debits.get(sender, 0) + transaction.amount + transaction.fee
+
+    def remove_pending_transaction(self, transaction):
+        """
+        Removes the reservation of a transaction, e.g. after it was mined or evicted
+        :param transaction: Transaction which was removed from the opened transactions
+        """
+        sender = transaction.sender_address
+        pending_debit = self.pending_debits.get(sender, 0) - transaction.amount - transaction.fee
+        if pending_debit == 0:
+            self.pending_debits.pop(sender, None)
+        else:
+            self.pending_debits[sender] = pending_debit
+
+    def clear_pending_transactions(self):
+        """
+        Removes all reservations
+        """
+        self.pending_debits = {}
+
+    def get_balance(self, public_key: RsaKey):
+        """
+        :param public_key: The key or the Address for checking the balance
+        :return: Confirmed balance of the given address
+        :rtype: int
+        """
+        return self.balances.get(address_of(public_key), 0)
+
+    def get_available_balance(self, public_key: RsaKey):
+        """
+        :param public_key: The key or the Address for checking the balance
+        :return: Confirmed balance minus the amounts of the unprocessed transactions
+        :rtype: int
+        """
+        address = address_of(public_key)
+        return self.balances.get(address, 0) - self.pending_debits.get(address, 0)
+
+    def copy(self):
+        """
+        :return: Account state with a copy of the confirmed balances and without pending transactions
+        :rtype: AccountState
+        """
+        state = AccountState(self.fee_collector)
+        state.balances = dict(self.balances)
+        return state
+
+    @classmethod
+    def from_blocks(cls, blocks, fee_collector: Address = None):
+        """
+        Rebuilds the confirmed balances by replaying all blocks
+        :param blocks: Blocks of a blockchain
+        :param fee_collector: Address which receives the fees of the transactions
+        :return: New account state
+        :rtype: AccountState
+        """
+        state = cls(fee_collector)
+        for block in blocks:
+            state.apply_block(block)
+        return state
@@ -0,0 +1,49 @@
+from Crypto.PublicKey.RSA import RsaKey
+
+from crypto.blockchain.encoding import key_fingerprint
+
+
+class Address(bytes):
+    """
+    Fixed-size address of an account, which is the SHA256 fingerprint of the DER encoded public key.
+    Addresses are plain bytes, so they are cheap dictionary keys for the balances and the chain index.
+    """
+    __slots__ = ()
+
+    SIZE = 32
+
+    def __new__(cls, value: bytes):
+        if len(value) != cls.SIZE:
+            raise ValueError("An address has {} bytes, got {}".format(cls.SIZE, len(value)))
+        return super().__new__(cls, value)
+
+    @classmethod
+    def from_der(cls, key_der: bytes):
+        """
+        :param key_der: DER encoded public key
+        :rtype: Address
+        """
+        return cls(key_fingerprint(key_der))
+
+    @classmethod
+    def from_key(cls, key: RsaKey):
+        """
+        :param key: Public (or private) key of the address
+        :rtype: Address
+        """
+        return cls.from_der(key.public_key().export_key('DER'))
+
+    @classmethod
+    def from_hex(cls, value: str):
+        """
+        :param value: Address with 64 hex digits
+        :rtype: Address
+        :raises ValueError: If the value is not a hex encoded address
+        """
+        return cls(bytes.fromhex(value))
+
+    def __repr__(self):
+        return "Address({})".format(self.hex())
+
+    def __str__(self):
+        return self.hex()
@@ -1,19 +1,52 @@
 import hashlib
 from datetime import datetime
 
+from crypto.blockchain.encoding import encode_timestamp
+from crypto.blockchain.merkle_tree import MerkleTree
 from crypto.blockchain.transaction import Transaction
 
+# Upper bound of a SHA256 hash interpreted as a number. The target of a block is MAX_TARGET // difficulty.
+MAX_TARGET = 2 ** 256
+# There is no block in front of the genesis block, so it references this dummy hash
+GENESIS_PREVIOUS_HASH = "0000000000000000000000000000000000000000000000000000000000000000"
+# With this difficulty a valid hash starts with one zero byte, which is the hex prefix '00'
+DEFAULT_DIFFICULTY = 256
 
-class Block:
 
-    def __init__(self, index: int, previous_hash: str, merkle_root: str, transactions: [Transaction], nonce: int):
+def difficulty_to_target(difficulty: int):
+    """
+    :param difficulty: Difficulty of a block
+    :return: Number which the hash of a block has to be lower than
+    :rtype: int
+    """
+    return MAX_TARGET // difficulty
+
+
+def meets_target(digest: bytes, target: int):
+    """
+    Checks the proof of work of a raw hash
+    :param digest: Raw SHA256 digest of a block header
+    :param target: Target of the block
+    :return: True if the digest interpreted as a big endian number is lower than the target
+    """
+    return int.from_bytes(digest, 'big') < target
+
+
+class BlockHeader:
+
+    def __init__(self, index: int, previous_hash: str, merkle_root: str, nonce: int,
+                 difficulty: int = DEFAULT_DIFFICULTY):
+        """
+        Header fields of a block. The hash of a block only depends on the header, so the proof of work
+        of a block can be checked without its transactions, e.g. while a node syncs the headers first.
+        """
         self.index = index
         self.previous_hash = previous_hash
         self.merkle_root = merkle_root
-        self.transactions = transactions
         self.nonce = nonce
-        self.hash = self.hash_block()
+        self.difficulty = difficulty
         self.timestamp = datetime.now()
+        self.hash = self.hash_block()
 
     def hash_block(self):
         """
@@ -24,13 +57,119 @@ class Block:
         """
         h = hashlib.sha256()
         h.update(
-            str(self.index).encode('utf-8') +
-            str(self.previous_hash).encode('utf-8') +
-            str(self.merkle_root).encode('utf-8') +
+            self.header_prefix() +
             str(self.nonce).encode('utf-8')
         )
         return h.hexdigest()
 
+    def header_prefix(self):
+        """
+        Encodes all header fields which are hashed in front of the nonce.
+        These fields do not change during the proof of work.
+        The timestamp drives the difficulty adjustment, so it is hashed with a fixed width
+        and can not be changed without a new proof of work.
+        :return: Encoded header fields without the nonce
+        :rtype: bytes
+        """
+        return (str(self.index).encode('utf-8') +
+                str(self.previous_hash).encode('utf-8') +
+                str(self.merkle_root).encode('utf-8') +
+                str(self.difficulty).encode('utf-8') +
+                encode_timestamp(self.timestamp).to_bytes(8, 'little', signed=True))
+
+    def header_midstate(self):
+        """
+        Creates a hash object which already consumed the header fields in front of the nonce.
+        Use hash_nonce to hash the header with a specific nonce.
+        :return: SHA256 hash object of the header prefix
+        """
+        return hashlib.sha256(self.header_prefix())
+
+    @staticmethod
+    def hash_nonce(midstate, nonce: int):
+        """
+        Hashes a block header for a nonce without encoding the other header fields again.
+        The hex representation of the digest is equal to hash_block.
+        :param midstate: Hash object created by header_midstate
+        :param nonce: Nonce to hash
+        :return: Raw SHA256 digest of the block header
+        :rtype: bytes
+        """
+        h = midstate.copy()
+        h.update(str(nonce).encode('utf-8'))
+        return h.digest()
+
+    @property
+    def target(self):
+        """
+        :return: Number which the hash of the block has to be lower than
+        :rtype: int
+        """
+        return difficulty_to_target(self.difficulty)
+
+    def has_valid_proof_of_work(self):
+        """
+        Checks if the stored hash is the hash of the block header and if it meets the declared target
+        :return: True if the proof of work is valid otherwise False
+        """
+        return self.hash == self.hash_block() and meets_target(bytes.fromhex(self.hash), self.target)
+
+    @property
+    def work(self):
+        """
+        :return: Expected number of hashes to find a valid nonce, used to compare chains
+        :rtype: int
+        """
+        return self.difficulty
+
+    def header_dict(self):
+        return {
+            "index": self.index,
+            "hash": self.hash,
+            "previous_hash": self.previous_hash,
+            "merkle_root": self.merkle_root,
+            "nonce": self.nonce,
+            "difficulty": self.difficulty,
+            "timestamp": str(self.timestamp)
+        }
+
+
+class Block(BlockHeader):
+
+    def __init__(self, index: int, previous_hash: str, merkle_root: str, transactions: [Transaction], nonce: int,
+                 difficulty: int = DEFAULT_DIFFICULTY, merkle_tree: MerkleTree = None):
+        self.transactions = transactions
+        self.merkle_tree = merkle_tree
+        super().__init__(index, previous_hash, merkle_root, nonce, difficulty)
+
+    @property
+    def header(self):
+        """
+        :return: Header of the block without the transactions
+        :rtype: BlockHeader
+        """
+        header = BlockHeader(self.index, self.previous_hash, self.merkle_root, self.nonce, self.difficulty)
+        header.hash = self.hash
+        header.timestamp = self.timestamp
+        return header
+
+    def get_merkle_tree(self):
+        """
+        :return: Merkle tree of the transactions. Is only built if it was not passed to the block
+        :rtype: MerkleTree
+        """
+        if self.merkle_tree is None:
+            self.merkle_tree = MerkleTree.from_transactions(self.transactions)
+        return self.merkle_tree
+
+    def get_merkle_proof(self, position: int):
+        """
+        Creates a proof that a transaction is part of the block
+        :param position: Position of the transaction in the block
+        :return: Proof which can be verified with MerkleTree.verify_proof and the merkle root
+        """
+        return self.get_merkle_tree().get_proof(position)
+
     def to_dict(self):
         dict_transactions = []
         for tx in self.transactions:
@@ -43,5 +182,6 @@ class Block:
             "merkle_root": self.merkle_root,
             "transactions": dict_transactions,
             "nonce": self.nonce,
+            "difficulty": self.difficulty,
             "timestamp": str(self.timestamp)
         }
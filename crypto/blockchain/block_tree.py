@@ -0,0 +1,100 @@
+from crypto.blockchain.block import BlockHeader
+
+
+class TreeNode:
+
+    def __init__(self, block_hash: str, previous_hash: str, height: int, cumulative_work: int):
+        """
+        Position of a known block in the block tree
+        :param cumulative_work: Work of the block and all of its predecessors
+        """
+        self.hash = block_hash
+        self.previous_hash = previous_hash
+        self.height = height
+        self.cumulative_work = cumulative_work
+        self.on_main_chain = False
+
+
+class BlockTree:
+
+    def __init__(self, max_fork_depth: int = 100):
+        """
+        All known blocks keyed by their hash, including the blocks of competing branches.
+        The blocks of the main chain are stored by the blockchain, the tree only keeps the blocks of the side branches.
+        Every node knows the cumulative work of its branch, so the work of a tip is known without a walk.
+        :param max_fork_depth: Side branches which fork more than this number of blocks below the tip are dropped
+        """
+        self.max_fork_depth = max_fork_depth
+        self.nodes = {}
+        self.side_blocks = {}
+
+    def __contains__(self, block_hash: str):
+        return block_hash in self.nodes
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def get(self, block_hash: str):
+        """
+        :return: Node of the block or None if the block is unknown
+        :rtype: TreeNode
+        """
+        return self.nodes.get(block_hash)
+
+    def add(self, block: BlockHeader, on_main_chain: bool = False):
+        """
+        Adds a block whose predecessor is known. The genesis block has no predecessor.
+        :param block: Block to add. Blocks of side branches are kept in the tree
+        :param on_main_chain: True if the block is appended to the main chain
+        :return: Node of the block
+        :rtype: TreeNode
+        """
+        node = self.nodes.get(block.hash)
+        if node is None:
+            parent = self.nodes.get(block.previous_hash)
+            parent_work = parent.cumulative_work if parent is not None else 0
+            node = TreeNode(block.hash, block.previous_hash, block.index, parent_work + block.work)
+            self.nodes[block.hash] = node
+        self.set_main_chain(block, on_main_chain)
+        return node
+
+    def set_main_chain(self, block: BlockHeader, on_main_chain: bool):
+        """
+        Moves a known block between the main chain and the side branches
+        """
+        self.nodes[block.hash].on_main_chain = on_main_chain
+        if on_main_chain:
+            self.side_blocks.pop(block.hash, None)
+        else:
+            self.side_blocks[block.hash] = block
+
+    def get_branch(self, tip_hash: str):
+        """
+        Collects the side blocks from the main chain up to a tip
+        :param tip_hash: Hash of a known block
+        :return: Fork height and the side blocks in ascending order. The branch is empty if the tip is on
+        the main chain. None if a predecessor of the branch was pruned
+        :rtype: (int, [Block])
+        """
+        branch = []
+        node = self.nodes[tip_hash]
+        while not node.on_main_chain:
+            branch.append(self.side_blocks[node.hash])
+            parent = self.nodes.get(node.previous_hash)
+            if parent is None:
+                # Only a branch with another genesis block has no predecessor
+                return (0, branch[::-1]) if node.height == 0 else None
+            node = parent
+        return node.height + 1, branch[::-1]
+
+    def prune(self, tip_height: int):
+        """
+        Drops the side blocks which are too far below the tip to cause a reorganization
+        :param tip_height: Height of the last block of the main chain
+        """
+        min_height = tip_height - self.max_fork_depth
+        # Descendants of dropped blocks are dropped, too
+        for block in sorted(self.side_blocks.values(), key=lambda side_block: side_block.index):
+            if block.index < min_height or (block.index > 0 and block.previous_hash not in self.nodes):
+                del self.side_blocks[block.hash]
+                del self.nodes[block.hash]
@@ -1,23 +1,172 @@
-import hashlib
-import json
+from concurrent.futures import Executor
 
 from Crypto.PublicKey.RSA import RsaKey
 
-from crypto.blockchain.block import Block
+from crypto.blockchain.account_state import AccountState, address_of
+from crypto.blockchain.block import Block, DEFAULT_DIFFICULTY, GENESIS_PREVIOUS_HASH, meets_target
+from crypto.blockchain.block_tree import BlockTree
+from crypto.blockchain.chain_validator import ChainValidator
+from crypto.blockchain.chain_view import ChainView
+from crypto.blockchain.header_chain import check_timestamp, expected_difficulty
+from crypto.blockchain.codec import encode_transaction
+from crypto.blockchain.mempool import Mempool
+from crypto.blockchain.merkle_tree import MerkleTree
 from crypto.blockchain.miner import Miner
+from crypto.blockchain.read_write_lock import ReadWriteLock
 from crypto.blockchain.transaction import Transaction
 from crypto.blockchain.token import Token
+from crypto.blockchain.verification import VerificationCache, verify_transactions
+from crypto.client.key_provider import KeyProvider
+from crypto.monitoring.metrics import MetricsRegistry
+from crypto.storage.chain_index import ChainIndex
+from crypto.storage.snapshot import SnapshotStore, StateSnapshot
 
 
 class Blockchain:
 
-    def __init__(self):
-        self.open_transactions = []
-        self.blocks = []
-        self.token = Token()
-        self.miner = Miner()
+    def __init__(self, mining_engine=None, difficulty: int = DEFAULT_DIFFICULTY,
+                 retarget_interval: int = 10, target_block_time: float = 10.0, block_store=None,
+                 mempool: Mempool = None, chain_index: ChainIndex = None, key_provider: KeyProvider = None,
+                 metrics: MetricsRegistry = None, snapshot: StateSnapshot = None,
+                 snapshot_store: SnapshotStore = None, prune_depth: int = None, checkpoint_path: str = None):
+        """
+        Creates a new blockchain with a genesis block
+        :param mining_engine: Optional engine for the proof of work, e.g. a ParallelMiningEngine.
+        Without an engine the proof of work runs in the current thread
+        :param difficulty: Difficulty of the genesis block
+        :param retarget_interval: Number of blocks after which the difficulty is adjusted
+        :param target_block_time: Desired time between two blocks in seconds
+        :param block_store: Optional persistent storage of the blocks, e.g. a BlockStore.
+        If the storage already contains blocks, the blockchain continues with these blocks
+        :param mempool: Optional mempool for the unprocessed transactions, e.g. with a different size
+        :param chain_index: Optional index of the blocks, transactions and addresses, e.g. persisted next to
+        the block store. Blocks which are missing in the index are indexed when the blockchain is created
+        :param key_provider: Optional source of the keys of the token and the miner,
+        e.g. a DeterministicKeyPool which avoids the key generation in tests
+        :param metrics: Optional registry for the timers and counters of the hot paths.
+        Without a registry the metrics are disabled
+        :param snapshot: Optional balances at a block of the stored blocks. Only the blocks above the snapshot
+        are replayed. The blocks up to the snapshot may be headers without transactions, see prune
+        :param snapshot_store: Optional storage which receives a snapshot every SNAPSHOT_INTERVAL blocks
+        :param prune_depth: Optional number of blocks below the tip which keep their transactions.
+        Older blocks are replaced by their headers, see prune. Only blocks in memory can be pruned
+        :param checkpoint_path: Optional file which persists the height up to which validate_chain checked the
+        chain, e.g. next to the block store. A restarted node only validates the blocks above it
+        """
+        if retarget_interval < 2:
+            raise ValueError("The retarget interval has to span at least two blocks")
+        if target_block_time <= 0:
+            raise ValueError("The target block time has to be positive")
+        if prune_depth is not None and prune_depth < 1:
+            raise ValueError("The last block has to keep its transactions")
+        if prune_depth is not None and block_store is not None:
+            raise ValueError("Only blocks in memory can be pruned, a block store keeps the blocks on disk")
+        self.mempool = Mempool() if mempool is None else mempool
+        # Mining rewards are always part of the next block
+        self.pending_rewards = []
+        # Merkle tree of the opened transactions which grows with every added transaction.
+        # Is None if a transaction was evicted, then it is built again for the next block
+        self.open_transactions_tree = MerkleTree()
+        self.mining_engine = mining_engine
+        self.initial_difficulty = difficulty
+        self.retarget_interval = retarget_interval
+        self.target_block_time = target_block_time
+        self.token = Token(key_provider)
+        self.miner = Miner(key_provider)
+        self.blocks = [] if block_store is None else block_store
+        self.chain_index = ChainIndex() if chain_index is None else chain_index
+        self._load_blocks(snapshot)
+        # Hash of the block which is paid by the pending rewards
+        self.reward_block_hash = None
+        # Transactions with a valid signature, so they are not verified again
+        self.verification_cache = VerificationCache()
+        # Remembers up to which height the chain is validated
+        self.chain_validator = ChainValidator(checkpoint_path)
+        # Guards the blocks, the mempool and the account state against concurrent changes,
+        # e.g. by a MiningService and the request handling. Readers share the lock and only wait for the
+        # short updates of writers. The proof of work and the signature checks run without the lock
+        self.lock = ReadWriteLock()
+        self.snapshot_store = snapshot_store
+        self.prune_depth = prune_depth
         self.MINING_REWARD = 1
-        self.create_genesis_bock(self.token.create_supply_transaction())
+        # Limits of the transactions of a block including the mining rewards
+        self.MAX_BLOCK_TRANSACTIONS = 1000
+        self.MAX_BLOCK_SIZE = 1000000
+        # Number of blocks between two snapshots of the snapshot store
+        self.SNAPSHOT_INTERVAL = 1000
+        self.metrics = MetricsRegistry(enabled=False) if metrics is None else metrics
+        self._register_metrics()
+        if len(self.blocks) == 0:
+            self.create_genesis_bock(self.token.create_supply_transaction())
+
+    def _load_blocks(self, snapshot: StateSnapshot = None):
+        """
+        Builds the block tree, the chain index and the account state of the current blocks.
+        Leading headers without transactions are pruned blocks, their balances have to be part of the snapshot.
+        """
+        # A block store reads the headers from its index, so only the replayed blocks are decoded
+        get_header = self.blocks.__getitem__ if isinstance(self.blocks, list) else self.blocks.get_header
+        # Number of leading blocks which were replaced by their headers. A block store keeps complete blocks
+        self.pruned_height = 0
+        while isinstance(self.blocks, list) and self.pruned_height < len(self.blocks) and \
+                not isinstance(self.blocks[self.pruned_height], Block):
+            self.pruned_height += 1
+        if snapshot is None:
+            if self.pruned_height > 0:
+                raise ValueError("Pruned blocks can only be loaded with a snapshot")
+            # Balances in front of the first replayed block, see rebuild_account_state
+            self.base_height = -1
+            self.base_state = AccountState(self.fee_collector)
+        else:
+            if snapshot.height >= len(self.blocks) or get_header(snapshot.height).hash != snapshot.block_hash:
+                raise ValueError("The snapshot does not belong to the blocks")
+            if self.pruned_height > snapshot.height + 1:
+                raise ValueError("The snapshot is older than the pruned blocks")
+            self.base_height = snapshot.height
+            self.base_state = snapshot.to_account_state()
+        self.account_state = self.base_state.copy()
+        # Known blocks of the main chain and of competing branches with their cumulative work
+        self.block_tree = BlockTree()
+        for height in range(len(self.blocks)):
+            header = get_header(height)
+            if height > self.base_height:
+                self.account_state.apply_block(self.blocks[height])
+            self.block_tree.add(header, True)
+            if height < len(self.chain_index) and self.chain_index.hashes[height] != header.hash:
+                self.chain_index.truncate(height)
+            if height >= len(self.chain_index):
+                self.chain_index.add_block(self.blocks[height])
+        self.chain_index.truncate(len(self.blocks))
+        if snapshot is not None:
+            # Transactions of blocks which are only headers are known from the snapshot
+            self.chain_index.add_transactions(snapshot.transactions)
+        # Work of the main chain, used to choose between competing chains
+        self.total_work = self.block_tree.get(get_header(len(self.blocks) - 1).hash).cumulative_work \
+            if len(self.blocks) > 0 else 0
+
+    def _register_metrics(self):
+        self.transaction_verification_timer = self.metrics.histogram(
+            'blockchain_transaction_verification_seconds', "Signature verification of a submitted transaction")
+        self.batch_verification_timer = self.metrics.histogram(
+            'blockchain_batch_verification_seconds', "Signature verification of a batch of submitted transactions")
+        self.accepted_transactions = self.metrics.counter(
+            'blockchain_transactions_accepted_total', "Submitted transactions which were added to the mempool")
+        self.rejected_transactions = self.metrics.counter(
+            'blockchain_transactions_rejected_total', "Submitted transactions with an invalid signature or balance")
+        self.proof_of_work_timer = self.metrics.histogram(
+            'blockchain_proof_of_work_seconds', "Proof of work of a block in the current thread")
+        self.proof_of_work_hashes = self.metrics.counter(
+            'blockchain_proof_of_work_hashes_total', "Hashed nonces of the proof of work in the current thread")
+        self.balance_lookup_timer = self.metrics.histogram(
+            'blockchain_balance_lookup_seconds', "Lookup of the confirmed balance of an address")
+        self.appended_blocks = self.metrics.counter(
+            'blockchain_blocks_appended_total', "Blocks which were appended to the main chain")
+        self.reorganizations = self.metrics.counter(
+            'blockchain_reorganizations_total', "Switches to a branch with more work")
+        self.metrics.gauge('blockchain_height', "Height of the last block", lambda: len(self.blocks) - 1)
+        self.metrics.gauge('blockchain_total_work', "Cumulative work of the main chain", lambda: self.total_work)
+        self.metrics.gauge('mempool_transactions', "Unprocessed transactions in the mempool",
+                           lambda: len(self.mempool))
 
     def create_genesis_bock(self, start_transaction: Transaction):
         """
@@ -26,7 +175,7 @@ class Blockchain:
         # First index
         genesis_block_index = 0
         # There is no previous block so this hash is just a dummy
-        genesis_block_prev_hash = "0000000000000000000000000000000000000000000000000000000000000000"
+        genesis_block_prev_hash = GENESIS_PREVIOUS_HASH
 
         # Initial transaction because there have to be at least one transaction per block
         hashed_transactions = self.hash_transactions([start_transaction])
@@ -39,130 +188,745 @@ class Blockchain:
             genesis_block_prev_hash,
             hashed_transactions,
             [start_transaction],
-            genesis_block_nonce)
-        self.blocks.append(genesis_block)
+            genesis_block_nonce,
+            self.initial_difficulty)
+        self.proof_of_work(genesis_block)
+        self.add_block_to_chain(genesis_block)
 
     def add_block_to_chain(self, new_block: Block):
         """
-        Adds a new block to the blockchain
+        Adds a new block to the blockchain if it is a valid successor of the last block
         :param new_block: Block which will be added to the blockchain
+        :return: True if the block was added otherwise False
         """
-        self.blocks.append(new_block)
+        with self.lock.write():
+            if not self.is_valid_next_block(new_block):
+                return False
+            self._append_block(new_block)
+            return True
+
+    def _append_block(self, block: Block):
+        self.blocks.append(block)
+        self.account_state.apply_block(block)
+        self.chain_index.add_block(block)
+        self.total_work = self.block_tree.add(block, True).cumulative_work
+        if len(self.block_tree.side_blocks) > 0:
+            self.block_tree.prune(block.index)
+        self.appended_blocks.inc()
+        if self.snapshot_store is not None and block.index > 0 and block.index % self.SNAPSHOT_INTERVAL == 0:
+            self.snapshot_store.save(self.create_snapshot())
+        if self.prune_depth is not None:
+            self.prune(len(self.blocks) - self.prune_depth)
+
+    def is_valid_next_block(self, block: Block):
+        """
+        Checks if a block can be appended to the blockchain.
+        The block has to reference the last block, must not be dated before the last block or too far in the future,
+        has to declare the expected difficulty and its hash has to meet the target of the declared difficulty.
+        :param block: Block to check
+        :return: True if the block is valid otherwise False
+        """
+        if len(self.blocks) == 0:
+            return block.index == 0 and block.has_valid_proof_of_work()
+        last_block = self.get_last_block
+        return block.index == last_block.index + 1 and \
+            block.previous_hash == last_block.hash and \
+            check_timestamp(ChainView(self.blocks, len(self.blocks), [block]), block.index) is None and \
+            block.difficulty == self.get_next_difficulty() and \
+            block.has_valid_proof_of_work()
+
+    def get_next_difficulty(self):
+        """
+        Returns the difficulty of the next block.
+        Every retarget_interval blocks the difficulty is adjusted, so that the time between the
+        last retarget_interval blocks gets closer to the target block time. An adjustment is limited
+        to a factor of 4 to dampen outliers of the timestamps.
+        :return: Difficulty of the next block
+        :rtype: int
+        """
+        return self.get_expected_difficulty(self.get_last_block.index + 1)
+
+    def get_expected_difficulty(self, index: int, blocks=None):
+        """
+        Returns the difficulty which a block at an index has to declare.
+        The difficulty only depends on the blocks in front of the index.
+        :param index: Index of the block. The blocks in front of the index have to exist
+        :param blocks: Optional other chain of blocks or headers, e.g. a branch which is synchronized from a peer.
+        Default are the blocks of this blockchain
+        :return: Expected difficulty of the block
+        :rtype: int
+        """
+        return expected_difficulty(self.blocks if blocks is None else blocks, index, self.initial_difficulty,
+                                   self.retarget_interval, self.target_block_time)
+
+    def get_reward_for_block(self, block):
+        """
+        Returns the amount of the reward for a mined block, which is paid by the first transaction of the next block
+        :param block: Mined block, a header of a pruned block has no known fees
+        :return: Mining reward plus the fees of the block or None if the transactions of the block are unknown
+        :rtype: int
+        """
+        if not isinstance(block, Block):
+            return None
+        return self.MINING_REWARD + sum(tx.fee for tx in block.transactions)
 
     def add_new_transaction(self, transaction: Transaction):
         """
-        Adds a valid transaction to the opened transactions
+        Adds a valid transaction to the opened transactions.
+        The amount is reserved for the sender, so it can not be spent twice by opened transactions.
         :param transaction: Transaction which will be added to the unprocessed transactions
+        :return: True if the transaction was added otherwise False
+        """
+        with self.transaction_verification_timer.time():
+            is_valid = self.verification_cache.verify_transaction(transaction)
+        added = is_valid and self.add_verified_transaction(transaction)
+        (self.accepted_transactions if added else self.rejected_transactions).inc()
+        return added
+
+    def add_new_transactions(self, transactions: [Transaction], executor: Executor = None):
+        """
+        Adds many transactions to the opened transactions.
+        The signatures are verified in parallel. Afterwards the balances are checked in the given order.
+        :param transactions: Transactions which will be added to the unprocessed transactions
+        :param executor: Thread or process pool for the signature verification
+        :return: For each transaction True if it was added otherwise False
+        :rtype: [bool]
+        """
+        with self.batch_verification_timer.time():
+            valid_signatures = verify_transactions(transactions, executor, self.verification_cache)
+        added = [is_valid and self.add_verified_transaction(tx) for tx, is_valid in zip(transactions, valid_signatures)]
+        accepted = sum(added)
+        self.accepted_transactions.inc(accepted)
+        self.rejected_transactions.inc(len(added) - accepted)
+        return added
+
+    def add_verified_transaction(self, transaction: Transaction):
+        """
+        Adds a transaction with an already verified signature to the opened transactions
+        if the balance of the sender is enough. A transaction which is already part of the chain is rejected,
+        so a signed transaction can not be replayed. The amount has to be positive and the fee must not be
+        negative, otherwise the sender could take coins from the recipient or the miner.
+        :param transaction: Transaction with a valid signature
+        :return: True if the transaction was added otherwise False
+        """
+        if transaction.amount <= 0 or transaction.fee < 0:
+            return False
+        with self.lock.write():
+            if transaction in self.mempool or \
+                    self.chain_index.get_transaction_position(transaction.hash_transaction().digest()) is not None or \
+                    not self.check_balance_of_address(transaction.sender.public_key(),
+                                                      transaction.amount + transaction.fee):
+                return False
+            added, evicted = self.mempool.add(transaction)
+            if not added:
+                return False
+            for evicted_transaction in evicted:
+                self.account_state.remove_pending_transaction(evicted_transaction)
+            if len(evicted) > 0:
+                self.open_transactions_tree = None
+            elif self.open_transactions_tree is not None:
+                self.open_transactions_tree.append(transaction.hash_transaction().digest())
+            self.account_state.add_pending_transaction(transaction)
+            return True
+
+    @property
+    def open_transactions(self):
+        """
+        :return: Mining rewards and unprocessed transactions in their arrival order
+        :rtype: [Transaction]
         """
-        if transaction.check_if_transaction_is_valid() and \
-                self.check_balance_of_address(transaction.sender.public_key(), transaction.amount):
-            self.open_transactions.append(transaction)
+        return self.pending_rewards + self.mempool.transactions
+
+    @property
+    def fee_collector(self):
+        """
+        :return: Address which collects the transaction fees, which is the recipient of the supply
+        transaction in the genesis block. The fees are paid out with the mining rewards
+        :rtype: Address
+        """
+        if len(self.blocks) == 0:
+            return address_of(self.token.supply_user.public_key)
+        if self.pruned_height > 0:
+            # The genesis block is only a header, the snapshot knows the supply address
+            return self.base_state.fee_collector
+        return self.blocks[0].transactions[0].recipient_address
+
+    @property
+    def can_pay_rewards(self):
+        """
+        The rewards are signed by the supply user. A node which switched to the chain of another
+        genesis block does not own the supply address of this chain, so it mines without rewards.
+        :return: True if the supply user of the token owns the supply address of the chain
+        """
+        return address_of(self.token.supply_user.public_key) == self.fee_collector
 
     def hash_transactions(self, transactions: [Transaction]):
         """
-        Returns a hash of the current opened transactions
-        Hashes each transaction and then build a hash over all hashes
+        Returns the merkle root of transactions
+        Hashes each transaction and then builds a merkle tree over all hashes
         :param transactions: List of transactions which should be hashed
-        :return: Hash of the transactions in hex.
+        :return: Merkle root of the transactions in hex.
         :rtype: str
         """
-        hashed_transactions = []
-        for tx in transactions:
-            hashed_transactions.append(tx.hash_transaction().hexdigest())
-        return hashlib.sha256(json.dumps(hashed_transactions).encode('utf-8')).hexdigest()
+        return MerkleTree.from_transactions(transactions).root
 
     def mine_block(self):
         """
         Starts to mine a new block if at least one transaction is in the opened transactions.
-        At first, the opened transactions have to be hashed.
+        The proof of work runs in the current thread. A MiningService mines in the background instead.
         If the proof of work was successfully the block will be added to the blockchain.
-        Creates a mining reward which will be added to the reset opened transactions.
-        The reward will be processed in the next block. Currently always the same address will get the reward
         """
-
-        if len(self.open_transactions) == 0:
+        new_block = self.create_candidate_block()
+        if new_block is None:
             return
+        self.proof_of_work(new_block)
+        self.submit_block(new_block)
+
+    def create_candidate_block(self, allow_empty: bool = False):
+        """
+        Creates the next block which has to be mined.
+        The block contains the pending rewards and the transactions with the highest fee rates
+        within the block limits. The other transactions stay in the mempool for the next block.
+        If all opened transactions fit into the block, the merkle tree built while the
+        transactions were added is used.
+        :param allow_empty: Creates a block without transactions if there are no opened transactions
+        :return: Block with nonce 0 or None if there are no opened transactions
+        :rtype: Block
+        """
+        with self.lock.write():
+            if len(self.pending_rewards) + len(self.mempool) == 0 and not allow_empty:
+                return None
+            return self._create_candidate_block()
+
+    def _create_candidate_block(self):
+        rewards_size = sum(len(encode_transaction(tx)) for tx in self.pending_rewards)
+        selected_entries = self.mempool.select(self.MAX_BLOCK_TRANSACTIONS - len(self.pending_rewards),
+                                               self.MAX_BLOCK_SIZE - rewards_size)
+        new_transactions = self.pending_rewards + [entry.transaction for entry in selected_entries]
+        if len(selected_entries) == len(self.mempool) and self.open_transactions_tree is not None:
+            # The opened transactions tree keeps growing while the block is mined
+            new_merkle_tree = self.open_transactions_tree.copy()
+        else:
+            new_merkle_tree = MerkleTree([tx.hash_transaction().digest() for tx in self.pending_rewards] +
+                                         [entry.txid for entry in selected_entries])
 
         last_block = self.get_last_block
         new_block_index = last_block.index + 1
         new_previous_hash = last_block.hash
-        new_hashed_transaction_root = self.hash_transactions(self.open_transactions)
+        new_hashed_transaction_root = new_merkle_tree.root
 
         # Creates the new block with a references the hash of the current last block of the blockchain
         # The nonce will be starting at 0
         new_block = Block(new_block_index,
                           new_previous_hash,
                           new_hashed_transaction_root,
-                          self.open_transactions,
-                          0)
+                          new_transactions,
+                          0,
+                          self.get_next_difficulty(),
+                          new_merkle_tree)
+        if new_block.timestamp < last_block.timestamp:
+            # The last block may come from a node whose clock is ahead
+            new_block.timestamp = last_block.timestamp
+            new_block.hash = new_block.hash_block()
+        return new_block
 
-        self.proof_of_work(new_block)
-        self.add_block_to_chain(new_block)
-        # Creates a reward transaction
-        reward_transaction = self.miner.create_mining_transaction(self.token.supply_user, self.MINING_REWARD)
-        # reset open transaction and adds reward for the next block
-        self.open_transactions = [reward_transaction]
+    def submit_block(self, new_block: Block):
+        """
+        Adds a mined candidate block to the blockchain and removes its transactions from the opened transactions.
+        Creates a mining reward including the fees which will be added to the opened transactions.
+        The reward will be processed in the next block. Currently always the same address will get the reward
+        :param new_block: Block created by create_candidate_block with a valid proof of work
+        :return: True if the block was added, False if it is invalid or the last block changed while mining
+        """
+        with self.lock.write():
+            if not self.add_block_to_chain(new_block):
+                return False
+            self._remove_mined_transactions([new_block])
+            if self.can_pay_rewards:
+                # Creates a reward transaction which pays out the collected fees, too
+                reward_transaction = self.miner.create_mining_transaction(self.token.supply_user,
+                                                                          self.get_reward_for_block(new_block))
+                # adds reward for the next block, the transactions which were not mined stay opened
+                self.pending_rewards = [reward_transaction]
+                self.reward_block_hash = new_block.hash
+                self.account_state.add_pending_transaction(reward_transaction)
+            self.open_transactions_tree = MerkleTree([tx.hash_transaction().digest() for tx in self.pending_rewards] +
+                                                     [entry.txid for entry in self.mempool.entries.values()])
+            return True
+
+    def add_block(self, block: Block, executor: Executor = None):
+        """
+        Adds a block of any known branch, e.g. a block which was announced by a peer.
+        A block which does not extend the main chain is kept in the block tree. If its branch has
+        more work than the main chain, the blockchain switches to the branch.
+        :param block: Block whose predecessor is known
+        :param executor: Pool for the validation of the block. Without an executor a process pool is used
+        :return: True if the block was added to the main chain or a side branch
+        """
+        with self.lock.write():
+            if block.hash in self.block_tree or block.previous_hash not in self.block_tree:
+                return False
+            if block.previous_hash == self.get_last_block.hash:
+                fork_height, branch = len(self.blocks), []
+            else:
+                parent_branch = self.block_tree.get_branch(block.previous_hash)
+                if parent_branch is None:
+                    return False
+                fork_height, branch = parent_branch
+                if fork_height < self.min_fork_height:
+                    return False
+            branch = branch + [block]
+            fork_hash = self.blocks[fork_height - 1].hash if fork_height > 0 else None
+
+        # The merkle root and signatures of the branch are checked without blocking the readers and writers
+        if not self.validate_branch(fork_height, branch, executor):
+            return False
+
+        with self.lock.write():
+            # The chain may have changed during the validation
+            if block.hash in self.block_tree or block.previous_hash not in self.block_tree or \
+                    fork_height > len(self.blocks) or fork_height < self.min_fork_height or \
+                    (fork_height > 0 and self.blocks[fork_height - 1].hash != fork_hash):
+                return False
+            if fork_height == len(self.blocks):
+                # The block still extends the main chain
+                if not self._check_branch_transactions(fork_height, branch) or not self.add_block_to_chain(block):
+                    return False
+                self._remove_mined_transactions([block])
+                self.open_transactions_tree = None
+                return True
+            reorganize = self.get_branch_work(fork_height, branch) > self.total_work
+            if reorganize and not self._check_branch_transactions(fork_height, branch):
+                return False
+            self.block_tree.add(block)
+            if reorganize:
+                self._reorganize(fork_height, branch)
+            return True
+
+    @property
+    def min_fork_height(self):
+        """
+        The transactions of pruned blocks can not be reverted and a pruned chain can not be replayed below
+        its base state, so a branch has to start above the base state of a pruned chain
+        :return: Lowest height at which a branch may start
+        :rtype: int
+        """
+        return 0 if self.pruned_height == 0 else self.base_height + 1
+
+    def get_branch_work(self, fork_height: int, branch):
+        """
+        :param fork_height: Height of the first block of the branch
+        :param branch: Blocks or headers of a branch starting at the fork height
+        :return: Total work of the chain below the fork height followed by the branch
+        :rtype: int
+        """
+        fork_work = self.block_tree.get(self.blocks[fork_height - 1].hash).cumulative_work if fork_height > 0 else 0
+        return fork_work + sum(block.work for block in branch)
+
+    def validate_branch(self, fork_height: int, branch: [Block], executor: Executor = None):
+        """
+        Validates the blocks of a branch which starts behind a block of the main chain
+        :param fork_height: Height of the first block of the branch
+        :param branch: Blocks of the branch
+        :param executor: Pool for the parallel validation. Without an executor a process pool is used
+        :return: True if all blocks of the branch are valid
+        """
+        view = ChainView(self.blocks, fork_height, branch)
+        validator = ChainValidator()
+        if fork_height > 0:
+            validator.validated_height = fork_height - 1
+            validator.validated_hash = self.blocks[fork_height - 1].hash
+        return validator.validate(view, lambda index: self.get_expected_difficulty(index, view), executor,
+                                  self.verification_cache)
+
+    def replace_chain(self, branch: [Block], executor: Executor = None):
+        """
+        Switches to another branch if the resulting chain has more work than the current chain.
+        The branch is validated completely before the blocks above the fork height are replaced.
+        :param branch: Blocks starting at a height which is not greater than the current length
+        :param executor: Pool for the parallel validation of the branch. Without an executor a process pool is used
+        :return: True if the blockchain switched to the branch otherwise False
+        """
+        if len(branch) == 0:
+            return False
+        fork_height = branch[0].index
+        if fork_height > len(self.blocks) or fork_height < self.min_fork_height:
+            return False
+        fork_hash = self.blocks[fork_height - 1].hash if fork_height > 0 else None
+        if self.get_branch_work(fork_height, branch) <= self.total_work:
+            return False
+        if not self.validate_branch(fork_height, branch, executor):
+            return False
+
+        with self.lock.write():
+            # The chain may have changed during the validation
+            if fork_height > len(self.blocks) or fork_height < self.min_fork_height or \
+                    (fork_height > 0 and self.blocks[fork_height - 1].hash != fork_hash) or \
+                    self.get_branch_work(fork_height, branch) <= self.total_work or \
+                    not self._check_branch_transactions(fork_height, branch):
+                return False
+            self._reorganize(fork_height, branch)
+            return True
+
+    def _check_branch_transactions(self, fork_height: int, branch: [Block]):
+        """
+        Checks the transactions of a branch against the main chain below the fork height.
+        A transaction must not be booked twice and no sender may spend more than its balance.
+        Only the balance changes of the replaced blocks and the branch are replayed on top of the current balances.
+        The transaction of the genesis block creates the supply, so its sender is not limited by its balance.
+        The supply address pays the mining rewards, so the first transaction of a block is not limited either if it
+        pays exactly the reward of the previous block from the supply address. Any other transaction of the supply
+        address is limited by its balance like the transactions of other senders.
+        Has to be called with the write lock.
+        :param fork_height: Height of the first block of the branch
+        :param branch: Validated blocks of the branch
+        :return: True if the transactions of the branch can be booked
+        """
+        changes = AccountState(self.account_state.fee_collector)
+        for height in reversed(range(fork_height, len(self.blocks))):
+            changes.revert_block(self.blocks[height])
+        if fork_height == 0:
+            changes.fee_collector = branch[0].transactions[0].recipient_address
+        txids = set()
+        previous_block = self.blocks[fork_height - 1] if fork_height > 0 else None
+        for block in branch:
+            reward = self.get_reward_for_block(previous_block) if block.index > 0 else None
+            for block_position, tx in enumerate(block.transactions):
+                txid = tx.hash_transaction().digest()
+                position = self.chain_index.get_transaction_position(txid)
+                if txid in txids or (position is not None and position[0] < fork_height):
+                    return False
+                txids.add(txid)
+                changes.apply_transaction(tx)
+                sender = tx.sender_address
+                is_supply = block.index == 0 and block_position == 0
+                is_reward = block_position == 0 and sender == changes.fee_collector and tx.fee == 0 and \
+                    tx.amount == reward
+                if not is_supply and not is_reward and \
+                        self.account_state.get_balance(sender) + changes.get_balance(sender) < 0:
+                    return False
+            previous_block = block
+        return True
+
+    def _reorganize(self, fork_height: int, branch: [Block]):
+        """
+        Replaces the blocks above the fork height by a validated branch.
+        Only the bookings of the replaced blocks are reverted and only the blocks of the branch are booked,
+        so the costs depend on the depth of the fork and not on the length of the chain.
+        The transactions of the replaced blocks are returned to the opened transactions.
+        """
+        self.reorganizations.inc()
+        displaced = [self.blocks[height] for height in range(fork_height, len(self.blocks))]
+        for block in reversed(displaced):
+            self.account_state.revert_block(block)
+            self.block_tree.set_main_chain(block, False)
+        if isinstance(self.blocks, list):
+            del self.blocks[fork_height:]
+        else:
+            self.blocks.truncate(fork_height)
+        self.chain_index.truncate(fork_height, displaced)
+        if fork_height == 0:
+            # The branch starts with another genesis block which may have another supply address
+            self.account_state.fee_collector = branch[0].transactions[0].recipient_address
+        if fork_height <= self.base_height:
+            # The base state belongs to a replaced block, so the blocks are replayed from the genesis block again
+            self.base_height = -1
+        if self.base_height == -1:
+            self.base_state = AccountState(self.account_state.fee_collector)
+        # The validation of the blocks below the fork height is still valid
+        self.chain_validator.rewind(fork_height - 1, self.blocks[fork_height - 1].hash if fork_height > 0 else None)
+        for block in branch:
+            self._append_block(block)
+
+        self._remove_mined_transactions(branch)
+        # A pending reward pays for a block of this node, which may have been replaced
+        if not self.can_pay_rewards or any(block.hash == self.reward_block_hash for block in displaced):
+            for tx in self.pending_rewards:
+                self.account_state.remove_pending_transaction(tx)
+            self.pending_rewards = []
+        self._return_displaced_transactions(displaced, branch)
+        self.open_transactions_tree = None
+
+    def _remove_mined_transactions(self, blocks: [Block]):
+        """
+        Removes the transactions of blocks which were added to the main chain from the opened transactions
+        and releases their reserved amounts
+        """
+        rewards = {tx.hash_transaction().digest(): tx for tx in self.pending_rewards}
+        unreserved_senders = {}
+        for block in blocks:
+            for tx in block.transactions:
+                txid = tx.hash_transaction().digest()
+                if txid in rewards:
+                    self.pending_rewards.remove(rewards[txid])
+                    self.account_state.remove_pending_transaction(tx)
+                elif self.mempool.remove(tx):
+                    self.account_state.remove_pending_transaction(tx)
+                else:
+                    # E.g. a transaction of another node or a transaction which was evicted while mining
+                    unreserved_senders[tx.sender_address] = tx.sender
+        if any(self.account_state.get_available_balance(sender) < 0 for sender in unreserved_senders.values()):
+            self._drop_overspent_transactions()
+
+    def _return_displaced_transactions(self, displaced: [Block], branch: [Block]):
+        """
+        Adds the transactions of replaced blocks to the opened transactions if they are not part of the new branch.
+        Transactions of the supply address are not returned, because the rewards belong to the replaced blocks.
+        """
+        fee_collector = self.fee_collector
+        branch_transactions = {tx.hash_transaction().digest() for block in branch for tx in block.transactions}
+        for block in displaced:
+            for tx in block.transactions:
+                if tx.sender_address != fee_collector and tx.hash_transaction().digest() not in branch_transactions:
+                    self.add_verified_transaction(tx)
+
+    def _drop_overspent_transactions(self):
+        """
+        Removes the latest opened transactions of every sender whose reserved amounts exceed the balance
+        """
+        for entry in reversed(list(self.mempool.entries.values())):
+            tx = entry.transaction
+            if self.account_state.get_available_balance(tx.sender) < 0:
+                self.mempool.remove(tx)
+                self.account_state.remove_pending_transaction(tx)
 
     def proof_of_work(self, block: Block):
         """
-        Proof of work algorithm. At the moment, there is no difficulty.
-        Increments the nonce until the first position of a hashed block is equal to 00
+        Proof of work algorithm.
+        Increments the nonce until the hash of the block is lower than the target of the block difficulty.
+        If a mining engine is set, the search is done by the engine.
         :param block: Block which should be mined
         """
-        computed_hash = block.hash
-        while not computed_hash.startswith('00'):
-            block.nonce += 1
-            computed_hash = block.hash_block()
-        block.hash = computed_hash
-        return block.nonce
+        with self.proof_of_work_timer.time():
+            if self.mining_engine is not None:
+                result = self.mining_engine.mine(block)
+                self.proof_of_work_hashes.inc(self.mining_engine.last_result.hashes)
+                return result.nonce
+            # The header fields in front of the nonce are only hashed once
+            midstate = block.header_midstate()
+            target = block.target
+            start_nonce = nonce = block.nonce
+            digest = Block.hash_nonce(midstate, nonce)
+            while not meets_target(digest, target):
+                nonce += 1
+                digest = Block.hash_nonce(midstate, nonce)
+            # The hashes are counted once per block, so the loop is not slowed down
+            self.proof_of_work_hashes.inc(nonce - start_nonce + 1)
+            block.nonce = nonce
+            block.hash = digest.hex()
+            return block.nonce
 
     def check_balance_of_address(self, public_key, amount):
         """
-        Checks if the balance of an address is enough to perform a transaction
+        Checks if the balance of an address is enough to perform a transaction.
+        Amounts of opened transactions of the address are already spent.
         :param public_key: Address to check
         :param amount: Amount to perform a transaction
         :return: True if balance is enough otherwise False
         """
-        current_amount = self.get_balance_for_address(public_key)
-        if current_amount >= amount:
-            return True
-        else:
-            return False
+        return self.get_available_balance(public_key) >= amount
+
+    def get_available_balance(self, public_key: RsaKey):
+        """
+        :param public_key: The key or the Address for checking the balance
+        :return: Confirmed balance minus the amounts of the opened transactions
+        :rtype: int
+        """
+        with self.lock.read():
+            return self.account_state.get_available_balance(public_key)
 
     def get_balance_for_address(self, public_key: RsaKey):
         """
-        Calculates the balance for a specific address.
-        Be careful with the runtime O(n^2).
-        :param public_key: The address for checking the balance
+        Returns the confirmed balance for a specific address.
+        The balance is looked up in the account state which is updated with every added block.
+        :param public_key: The key or the Address for checking the balance
         :return: Balance of the given address
         :rtype: int
         """
-        balance = 0
-        for block in self.blocks:
-            for tx in block.transactions:
-                amount = tx.amount
-                if tx.recipient == public_key:
-                    balance += amount
-                if tx.sender == public_key:
-                    balance -= amount
-        return balance
+        # A lookup takes less than a microsecond, so even a disabled timer would be noticeable
+        if not self.balance_lookup_timer.enabled:
+            with self.lock.read():
+                return self.account_state.get_balance(public_key)
+        with self.balance_lookup_timer.time(), self.lock.read():
+            return self.account_state.get_balance(public_key)
+
+    def rebuild_account_state(self):
+        """
+        Replays all blocks to build the account state from scratch.
+        A chain which was loaded from a snapshot or pruned starts with the balances of the base state
+        and only replays the blocks above it.
+        Can be used to verify the incrementally updated account state.
+        :return: Account state built from the blocks of the blockchain
+        :rtype: AccountState
+        """
+        with self.lock.read():
+            state = self.base_state.copy()
+            for height in range(self.base_height + 1, len(self.blocks)):
+                state.apply_block(self.blocks[height])
+            return state
+
+    def verify_account_state(self):
+        """
+        :return: True if the maintained balances are equal to the balances of a full replay
+        """
+        with self.lock.read():
+            return self.rebuild_account_state().balances == self.account_state.balances
 
     @property
     def get_last_block(self):
         """
         :return: Last block of the blockchain
         """
-        return self.blocks[-1]
+        with self.lock.read():
+            return self.blocks[-1]
 
     @property
     def get_all_blocks(self):
         """
-        :return: All blocks of the blockchain
+        :return: All blocks of the blockchain. The sequence changes with the chain,
+        get_blocks returns a consistent range
         """
         return self.blocks
 
+    def get_blocks(self, from_height: int, to_height: int):
+        """
+        :param from_height: Height of the first block
+        :param to_height: Height behind the last block
+        :return: Blocks of the main chain in the range, all taken from the same state of the chain
+        :rtype: [Block]
+        """
+        with self.lock.read():
+            return [self.blocks[height] for height in range(from_height, min(to_height, len(self.blocks)))]
+
     def get_block_by_index(self, index):
         """
         :return: A specific block of the blockchain by an index
         """
-        return self.blocks[index]
+        with self.lock.read():
+            return self.blocks[index]
+
+    def get_block_by_hash(self, block_hash: str):
+        """
+        :param block_hash: Hash of the block in hex
+        :return: Block of the main chain with the hash or None if the hash is unknown
+        """
+        with self.lock.read():
+            height = self.chain_index.get_height(block_hash)
+            if height is None:
+                return None
+            return self.blocks[height]
+
+    def get_transaction(self, txid: bytes):
+        """
+        :param txid: Raw hash of the transaction, see Transaction.hash_transaction
+        :return: Block which contains the transaction and the position in the block or None if it is unknown
+        :rtype: (Block, int)
+        """
+        with self.lock.read():
+            position = self.chain_index.get_transaction_position(txid)
+            if position is None:
+                return None
+            height, index_in_block = position
+            if height < self.pruned_height:
+                return None
+            return self.blocks[height], index_in_block
+
+    def get_address_history(self, public_key: RsaKey, offset: int = 0, limit: int = None):
+        """
+        :param public_key: The key or the Address
+        :param offset: Number of skipped transactions, starting with the oldest transaction
+        :param limit: Maximum number of transactions
+        :return: Height, position and transaction of every transaction which was sent or received by the address
+        :rtype: [(int, int, Transaction)]
+        """
+        address = address_of(public_key)
+        with self.lock.read():
+            if self.pruned_height == 0:
+                entries = self.chain_index.get_history(address, offset, limit)
+            else:
+                # The transactions of pruned blocks are gone, only the newer entries are returned
+                entries = [entry for entry in self.chain_index.get_history(address) if entry[0] >= self.pruned_height]
+                entries = entries[offset:] if limit is None else entries[offset:offset + limit]
+            return [(height, position, self.blocks[height].transactions[position]) for height, position in entries]
+
+    def create_snapshot(self):
+        """
+        :return: Confirmed balances after the last block and the ids of the booked transactions
+        :rtype: StateSnapshot
+        """
+        with self.lock.read():
+            last_block = self.blocks[-1]
+            return StateSnapshot.from_account_state(last_block.index, last_block.hash, self.account_state,
+                                                    self.chain_index.transactions)
+
+    def prune(self, height: int):
+        """
+        Replaces the blocks below a height by their headers, so the memory of the chain does not grow with
+        its transactions. The headers keep the references, proof of work and difficulties checkable.
+        The balances at the last pruned block become the base state of the chain. Afterwards the transactions
+        of pruned blocks can not be looked up and branches which fork below the base state are rejected.
+        :param height: Height of the first block which keeps its transactions. The last block is never pruned
+        """
+        with self.lock.write():
+            if not isinstance(self.blocks, list):
+                raise ValueError("Only blocks in memory can be pruned, a block store keeps the blocks on disk")
+            height = min(height, len(self.blocks) - 1)
+            if height <= self.pruned_height:
+                return
+            for pruned_height in range(self.pruned_height, height):
+                block = self.blocks[pruned_height]
+                if pruned_height > self.base_height:
+                    self.base_state.apply_block(block)
+                self.blocks[pruned_height] = block.header
+            self.pruned_height = height
+            self.base_height = max(self.base_height, height - 1)
+
+    def load_snapshot(self, snapshot: StateSnapshot, headers):
+        """
+        Replaces the chain by the headers of another chain and the balances of a snapshot at its last header,
+        e.g. to bootstrap a new node without replaying the chain from the genesis block.
+        The headers have to be validated before, the balances are trusted.
+        The opened transactions are checked again against the new balances.
+        :param snapshot: Balances after the last header
+        :param headers: Headers from the genesis block up to the block of the snapshot
+        """
+        with self.lock.write():
+            if not isinstance(self.blocks, list):
+                raise ValueError("A chain in a block store can not be replaced by headers")
+            if len(headers) != snapshot.height + 1 or headers[-1].hash != snapshot.block_hash:
+                raise ValueError("The snapshot does not belong to the headers")
+            opened_transactions = self.mempool.transactions
+            for tx in opened_transactions:
+                self.mempool.remove(tx)
+            self.blocks[:] = [header.header if isinstance(header, Block) else header for header in headers]
+            self.chain_index.truncate(0)
+            self._load_blocks(snapshot)
+            self.chain_validator.reset()
+            self.pending_rewards = []
+            self.reward_block_hash = None
+            self.open_transactions_tree = None
+            for tx in opened_transactions:
+                self.add_verified_transaction(tx)
+
+    def validate_chain(self, executor: Executor = None):
+        """
+        Validates the references, hashes, difficulties, merkle roots and signatures of all blocks.
+        Blocks which were validated before are skipped.
+        :param executor: Pool for the parallel checks. Without an executor a process pool is used
+        :return: True if the chain is valid otherwise False. The reason is stored in chain_validator.error
+        """
+        return self.chain_validator.validate(self.blocks, self.get_expected_difficulty, executor,
+                                             self.verification_cache)
+
+    def get_merkle_proof(self, index: int, position: int):
+        """
+        Creates a proof that a transaction is part of a block of the blockchain
+        :param index: Index of the block
+        :param position: Position of the transaction in the block
+        :return: Proof which can be verified with MerkleTree.verify_proof and the merkle root of the block
+        or None if the block is pruned
+        """
+        block = self.get_block_by_index(index)
+        if not isinstance(block, Block):
+            return None
+        return block.get_merkle_proof(position)
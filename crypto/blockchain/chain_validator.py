@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+
+from crypto.blockchain.block import Block, GENESIS_PREVIOUS_HASH, meets_target
+from crypto.blockchain.encoding import TRANSACTION_BODY
+from crypto.blockchain.header_chain import check_timestamp
+from crypto.blockchain.merkle_tree import MerkleTree
+from crypto.blockchain.verification import VerificationCache, _verify_signature
+
+
+def _validate_block(header_prefix: bytes, nonce: int, block_hash: str, target: int, merkle_root: str,
+                    messages: [bytes], signatures: [tuple]):
+    """
+    Checks everything of a block which does not depend on other blocks.
+    Only uses bytes and numbers, so it can be executed by a process pool.
+    :param header_prefix: Encoded header fields in front of the nonce
+    :param nonce: Nonce of the block
+    :param block_hash: Declared hash of the block
+    :param target: Target of the declared difficulty
+    :param merkle_root: Declared merkle root
+    :param messages: Encoded transactions of the block or None for the header of a pruned block
+    :param signatures: (public key, message, signature) of every transaction which has to be verified
+    :return: None if the block is valid otherwise the reason why it is invalid
+    :rtype: str
+    """
+    digest = hashlib.sha256(header_prefix + str(nonce).encode('utf-8')).digest()
+    if digest.hex() != block_hash:
+        return "hash does not match the block header"
+    if not meets_target(digest, target):
+        return "hash misses the target"
+    if messages is not None:
+        txids = [hashlib.sha256(message).digest() for message in messages]
+        if MerkleTree(txids).root != merkle_root:
+            return "merkle root does not match the transactions"
+        # The last leaf is duplicated on odd levels, so a repeated last transaction keeps the merkle root
+        if len(set(txids)) != len(txids):
+            return "duplicate transaction"
+    for message in messages or []:
+        _, _, _, amount, fee, _ = TRANSACTION_BODY.unpack(message)
+        if amount <= 0:
+            return "transaction amount is not positive"
+        if fee < 0:
+            return "transaction fee is negative"
+    for public_key, message, signature in signatures:
+        if signature is None or not _verify_signature(public_key, message, signature):
+            return "invalid transaction signature"
+    return None
+
+
+class ChainValidator:
+
+    def __init__(self, checkpoint_path: str = None):
+        """
+        Validates a whole blockchain. Remembers up to which height the chain was validated,
+        so a second validation only checks the new blocks.
+        :param checkpoint_path: Optional file to persist the validated height across restarts
+        """
+        self.checkpoint_path = checkpoint_path
+        self.validated_height = -1
+        self.validated_hash = None
+        # Height and reason of the first invalid block of the last validation
+        self.error = None
+        self.load_checkpoint()
+
+    def load_checkpoint(self):
+        if self.checkpoint_path is None or not os.path.exists(self.checkpoint_path):
+            return
+        with open(self.checkpoint_path, 'r') as file:
+            checkpoint = json.load(file)
+        self.validated_height = checkpoint["height"]
+        self.validated_hash = checkpoint["hash"]
+
+    def save_checkpoint(self):
+        if self.checkpoint_path is None:
+            return
+        with open(self.checkpoint_path, 'w') as file:
+            json.dump({"height": self.validated_height, "hash": self.validated_hash}, file)
+
+    def reset(self):
+        """
+        Forgets the validated height, so the next validation starts at the genesis block
+        """
+        self.validated_height = -1
+        self.validated_hash = None
+        self.save_checkpoint()
+
+    def rewind(self, height: int, block_hash: str):
+        """
+        Moves the validated height down, e.g. when the blocks above the height were replaced by another branch
+        :param height: Last height which is still validated
+        :param block_hash: Hash of the block at the height
+        """
+        if height < self.validated_height:
+            self.validated_height = height
+            self.validated_hash = block_hash if height >= 0 else None
+            self.save_checkpoint()
+
+    def get_start_height(self, blocks):
+        """
+        :param blocks: Blocks of the blockchain
+        :return: First height which has not been validated.
+        If the block at the validated height was replaced, the validation starts from scratch
+        """
+        height = self.validated_height
+        if 0 <= height < len(blocks) and blocks[height].hash == self.validated_hash:
+            return height + 1
+        return 0
+
+    def validate(self, blocks, expected_difficulty=None, executor: Executor = None,
+                 cache: VerificationCache = None):
+        """
+        Validates all blocks above the validated height.
+        The references between the blocks are checked sequentially, the hashes, merkle roots and
+        signatures of the blocks are checked in parallel.
+        :param blocks: Blocks of the blockchain
+        :param expected_difficulty: Optional function which returns the expected difficulty for an index
+        :param executor: Pool for the parallel checks. Without an executor a process pool is used
+        :param cache: Optional cache of verified transactions. Cached signatures are not verified again
+        :return: True if the chain is valid otherwise False
+        """
+        self.error = None
+        start_height = self.get_start_height(blocks)
+        if start_height == 0:
+            self.validated_height = -1
+            self.validated_hash = None
+
+        # The blocks in front of the first wrong reference are still validated to move the checkpoint
+        end_height = len(blocks)
+        reference_error = None
+        for height in range(start_height, len(blocks)):
+            reason = self.check_block_reference(blocks, height, expected_difficulty)
+            if reason is not None:
+                end_height = height
+                reference_error = (height, reason)
+                break
+
+        arguments = [self.block_arguments(blocks[height], cache) for height in range(start_height, end_height)]
+        if len(arguments) == 0:
+            reasons = []
+        elif executor is None and len(arguments) == 1:
+            # Starting a process pool for a single block, e.g. a new block of a peer, costs more than it saves
+            reasons = [_validate_block(*arguments[0])]
+        elif executor is None:
+            with ProcessPoolExecutor(max_workers=os.cpu_count()) as default_executor:
+                reasons = list(default_executor.map(_validate_block, *zip(*arguments), chunksize=16))
+        else:
+            reasons = list(executor.map(_validate_block, *zip(*arguments)))
+
+        for height, reason in zip(range(start_height, end_height), reasons):
+            if reason is not None:
+                return self.fail(height, reason)
+            if cache is not None and isinstance(blocks[height], Block):
+                for tx in blocks[height].transactions:
+                    cache.add(cache.cache_key(tx))
+            self.validated_height = height
+            self.validated_hash = blocks[height].hash
+        if reference_error is not None:
+            return self.fail(*reference_error)
+        self.save_checkpoint()
+        return True
+
+    @staticmethod
+    def check_block_reference(blocks, height: int, expected_difficulty=None):
+        """
+        :return: None if the block references its predecessor correctly otherwise the reason
+        :rtype: str
+        """
+        block = blocks[height]
+        if block.index != height:
+            return "index does not match the height"
+        previous_hash = GENESIS_PREVIOUS_HASH if height == 0 else blocks[height - 1].hash
+        if block.previous_hash != previous_hash:
+            return "previous hash does not match the previous block"
+        reason = check_timestamp(blocks, height)
+        if reason is not None:
+            return reason
+        if expected_difficulty is not None and block.difficulty != expected_difficulty(height):
+            return "unexpected difficulty"
+        return None
+
+    @staticmethod
+    def block_arguments(block, cache: VerificationCache = None):
+        """
+        Extracts the arguments of _validate_block from a block.
+        The keys are exported because they can not be pickled.
+        Only the proof of work of the header of a pruned block can be checked.
+        """
+        if not isinstance(block, Block):
+            return (block.header_prefix(), block.nonce, block.hash, block.target, block.merkle_root, None, [])
+        messages = [tx.encoded_transaction() for tx in block.transactions]
+        signatures = []
+        for tx, message in zip(block.transactions, messages):
+            if tx.signature is not None and cache is not None and cache.contains(cache.cache_key(tx)):
+                continue
+            signatures.append((tx.sender_der, message, tx.signature))
+        return (block.header_prefix(), block.nonce, block.hash, block.target, block.merkle_root,
+                messages, signatures)
+
+    def fail(self, height: int, reason: str):
+        self.error = (height, reason)
+        self.save_checkpoint()
+        return False
@@ -0,0 +1,25 @@
+class ChainView:
+
+    def __init__(self, blocks, fork_height: int, branch):
+        """
+        Read-only sequence of the blocks of a chain below a fork height followed by the blocks of another branch.
+        Is used to validate a branch before the blockchain switches to it, without copying the chain.
+        :param blocks: Blocks or headers of the current chain
+        :param fork_height: Height of the first block of the branch
+        :param branch: Blocks or headers of the branch starting at the fork height
+        """
+        self.blocks = blocks
+        self.fork_height = fork_height
+        self.branch = branch
+
+    def __len__(self):
+        return self.fork_height + len(self.branch)
+
+    def __getitem__(self, height: int):
+        if height < 0:
+            height += len(self)
+        if height < 0 or height >= len(self):
+            raise IndexError("Block height out of range")
+        if height < self.fork_height:
+            return self.blocks[height]
+        return self.branch[height - self.fork_height]
@@ -0,0 +1,220 @@
+import struct
+from functools import lru_cache
+
+from Crypto.PublicKey import RSA
+
+from crypto.blockchain.address import Address
+from crypto.blockchain.block import Block, BlockHeader
+from crypto.blockchain.encoding import CODEC_VERSION, decode_timestamp, encode_timestamp
+from crypto.blockchain.transaction import Transaction
+
+VERSION = struct.Struct('<B')
+# index, previous hash, merkle root, difficulty, nonce, hash, timestamp, number of transactions
+BLOCK_HEADER = struct.Struct('<Q32s32sQQ32sqI')
+# index, previous hash, merkle root, difficulty, nonce, hash, timestamp
+HEADER = struct.Struct('<Q32s32sQQ32sq')
+# amount, fee, timestamp
+TRANSACTION_FIELDS = struct.Struct('<qqq')
+LENGTH = struct.Struct('<H')
+# Length of a block in a list of encoded blocks
+BLOCK_LENGTH = struct.Struct('<I')
+
+
+@lru_cache(maxsize=4096)
+def import_account(key_der: bytes):
+    """
+    Imports a DER encoded key together with its address. Keys of active addresses appear in many transactions,
+    so the results are cached and the decoded transactions share one key, DER encoding and address.
+    :param key_der: DER encoded public key
+    :return: Imported key, the DER encoding and the address
+    :rtype: (RsaKey, bytes, Address)
+    """
+    return RSA.import_key(key_der), key_der, Address.from_der(key_der)
+
+
+def import_key(key_der: bytes):
+    """
+    Imports a DER encoded key, see import_account
+    :param key_der: DER encoded public key
+    :return: Imported key
+    :rtype: RsaKey
+    """
+    return import_account(key_der)[0]
+
+
+def _encode_bytes(data: bytes):
+    return LENGTH.pack(len(data)) + data
+
+
+def _decode_bytes(data, offset: int):
+    (length,) = LENGTH.unpack_from(data, offset)
+    offset += LENGTH.size
+    return bytes(data[offset:offset + length]), offset + length
+
+
+def _decode_version(data, offset: int):
+    (version,) = VERSION.unpack_from(data, offset)
+    if version != CODEC_VERSION:
+        raise ValueError("Unsupported encoding version {}".format(version))
+    return offset + VERSION.size
+
+
+def encode_transaction(transaction: Transaction):
+    """
+    Encodes a transaction including its signature and timestamp.
+    The keys are needed to verify the signature, so the cached DER keys are encoded.
+    :param transaction: Transaction to encode
+    :return: Binary representation of the transaction
+    :rtype: bytes
+    """
+    return (VERSION.pack(CODEC_VERSION) +
+            _encode_bytes(transaction.sender_der) +
+            _encode_bytes(transaction.recipient_der) +
+            _encode_bytes(transaction.signature or b'') +
+            TRANSACTION_FIELDS.pack(transaction.amount, transaction.fee, encode_timestamp(transaction.timestamp)))
+
+
+def decode_transaction(data, offset: int = 0):
+    """
+    Decodes a transaction
+    :param data: Buffer which contains the encoded transaction
+    :param offset: Position of the transaction in the buffer
+    :return: Decoded transaction and the position behind the transaction
+    :rtype: (Transaction, int)
+    """
+    offset = _decode_version(data, offset)
+    sender, offset = _decode_bytes(data, offset)
+    recipient, offset = _decode_bytes(data, offset)
+    signature, offset = _decode_bytes(data, offset)
+    amount, fee, timestamp = TRANSACTION_FIELDS.unpack_from(data, offset)
+    offset += TRANSACTION_FIELDS.size
+
+    sender_key, sender_der, sender_address = import_account(sender)
+    recipient_key, recipient_der, recipient_address = import_account(recipient)
+    transaction = Transaction(sender_key, recipient_key, amount, fee)
+    transaction.signature = signature or None
+    transaction.timestamp = decode_timestamp(timestamp)
+    # The keys were just decoded from DER, so they do not have to be exported again
+    transaction._sender_der = sender_der
+    transaction._recipient_der = recipient_der
+    transaction._sender_address = sender_address
+    transaction._recipient_address = recipient_address
+    return transaction, offset
+
+
+def encode_block(block: Block):
+    """
+    Encodes a block including all of its transactions
+    :param block: Block to encode
+    :return: Binary representation of the block
+    :rtype: bytes
+    """
+    header = BLOCK_HEADER.pack(block.index,
+                               bytes.fromhex(block.previous_hash),
+                               bytes.fromhex(block.merkle_root),
+                               block.difficulty,
+                               block.nonce,
+                               bytes.fromhex(block.hash),
+                               encode_timestamp(block.timestamp),
+                               len(block.transactions))
+    return VERSION.pack(CODEC_VERSION) + header + b''.join(encode_transaction(tx) for tx in block.transactions)
+
+
+def decode_block(data, offset: int = 0):
+    """
+    Decodes a block
+    :param data: Buffer which contains the encoded block
+    :param offset: Position of the block in the buffer
+    :return: Decoded block
+    :rtype: Block
+    """
+    offset = _decode_version(data, offset)
+    index, previous_hash, merkle_root, difficulty, nonce, block_hash, timestamp, transaction_count = \
+        BLOCK_HEADER.unpack_from(data, offset)
+    offset += BLOCK_HEADER.size
+    transactions = []
+    for _ in range(transaction_count):
+        transaction, offset = decode_transaction(data, offset)
+        transactions.append(transaction)
+
+    block = Block(index, previous_hash.hex(), merkle_root.hex(), transactions, nonce, difficulty)
+    block.hash = block_hash.hex()
+    block.timestamp = decode_timestamp(timestamp)
+    return block
+
+
+def header_fields(block: BlockHeader):
+    """
+    :param block: Block or header
+    :return: Header fields of the block in the order of HEADER
+    :rtype: tuple
+    """
+    return (block.index, bytes.fromhex(block.previous_hash), bytes.fromhex(block.merkle_root), block.difficulty,
+            block.nonce, bytes.fromhex(block.hash), encode_timestamp(block.timestamp))
+
+
+def header_from_fields(index: int, previous_hash: bytes, merkle_root: bytes, difficulty: int, nonce: int,
+                       block_hash: bytes, timestamp: int):
+    """
+    :return: Header with the fields unpacked from HEADER
+    :rtype: BlockHeader
+    """
+    header = BlockHeader(index, previous_hash.hex(), merkle_root.hex(), nonce, difficulty)
+    header.hash = block_hash.hex()
+    header.timestamp = decode_timestamp(timestamp)
+    return header
+
+
+def encode_headers(blocks: [BlockHeader]):
+    """
+    Encodes the headers of blocks without their transactions.
+    Every header has the same size, so the headers are not prefixed by their length
+    :param blocks: Blocks or headers to encode
+    :return: Binary representation of the headers
+    :rtype: bytes
+    """
+    return VERSION.pack(CODEC_VERSION) + b''.join(HEADER.pack(*header_fields(block)) for block in blocks)
+
+
+def decode_headers(data):
+    """
+    Decodes a list of headers encoded by encode_headers
+    :param data: Buffer which contains the encoded headers
+    :return: Decoded headers
+    :rtype: [BlockHeader]
+    """
+    offset = _decode_version(data, 0)
+    if (len(data) - offset) % HEADER.size != 0:
+        raise ValueError("Incomplete block header")
+    return [header_from_fields(*fields) for fields in HEADER.iter_unpack(data[offset:])]
+
+
+def encode_blocks(blocks: [Block]):
+    """
+    Encodes a list of blocks. Every block is prefixed by its length
+    :param blocks: Blocks to encode
+    :return: Binary representation of the blocks
+    :rtype: bytes
+    """
+    encoded_blocks = []
+    for block in blocks:
+        data = encode_block(block)
+        encoded_blocks.append(BLOCK_LENGTH.pack(len(data)) + data)
+    return b''.join(encoded_blocks)
+
+
+def decode_blocks(data):
+    """
+    Decodes a list of blocks encoded by encode_blocks
+    :param data: Buffer which contains the encoded blocks
+    :return: Decoded blocks
+    :rtype: [Block]
+    """
+    blocks = []
+    offset = 0
+    while offset < len(data):
+        (length,) = BLOCK_LENGTH.unpack_from(data, offset)
+        offset += BLOCK_LENGTH.size
+        blocks.append(decode_block(data, offset))
+        offset += length
+    return blocks
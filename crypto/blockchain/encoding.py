@@ -0,0 +1,56 @@
+import hashlib
+import struct
+from datetime import datetime, timedelta
+
+# Version of the binary encoding. Is the first byte of every encoded transaction and block
+CODEC_VERSION = 3
+
+# Timestamps are stored as microseconds since this date
+EPOCH = datetime(1970, 1, 1)
+
+# version, address of the sender, address of the recipient, amount, fee, timestamp
+TRANSACTION_BODY = struct.Struct('<B32s32sqqq')
+
+
+def key_fingerprint(key_der: bytes):
+    """
+    :param key_der: DER encoded public key
+    :return: SHA256 hash of the key with a fixed size of 32 bytes
+    :rtype: bytes
+    """
+    return hashlib.sha256(key_der).digest()
+
+
+def encode_timestamp(timestamp: datetime):
+    return (timestamp - EPOCH) // timedelta(microseconds=1)
+
+
+def decode_timestamp(microseconds: int):
+    """
+    :param microseconds: Microseconds since the EPOCH
+    :return: Decoded timestamp
+    :rtype: datetime
+    :raises ValueError: If the timestamp is out of the range of a datetime
+    """
+    try:
+        return EPOCH + timedelta(microseconds=microseconds)
+    except OverflowError:
+        raise ValueError("Timestamp out of range: {}".format(microseconds))
+
+
+def encode_transaction_body(sender_address: bytes, recipient_address: bytes, amount: int, fee: int,
+                            timestamp: int):
+    """
+    Encodes the signed content of a transaction with fixed-width fields.
+    The keys are represented by their addresses, which are the fingerprints of the keys.
+    The timestamp distinguishes two payments with the same amount between the same addresses,
+    e.g. the mining rewards, so every transaction has its own txid.
+    :param sender_address: Fingerprint of the public key of the sender
+    :param recipient_address: Fingerprint of the public key of the recipient
+    :param amount: Amount to send
+    :param fee: Fee for the miner
+    :param timestamp: Creation time in microseconds since the EPOCH
+    :return: Canonical bytes of the transaction for hashing and signing
+    :rtype: bytes
+    """
+    return TRANSACTION_BODY.pack(CODEC_VERSION, sender_address, recipient_address, amount, fee, timestamp)
@@ -0,0 +1,146 @@
+from datetime import datetime, timedelta
+
+from crypto.blockchain.block import BlockHeader, DEFAULT_DIFFICULTY, GENESIS_PREVIOUS_HASH
+from crypto.blockchain.chain_view import ChainView
+
+# A block may be ahead of the clock of a node by this time, e.g. because the clocks of the nodes differ
+MAX_FUTURE_BLOCK_TIME = timedelta(hours=2)
+
+
+def expected_difficulty(blocks, index: int, initial_difficulty: int, retarget_interval: int,
+                        target_block_time: float):
+    """
+    Returns the difficulty which a block at an index has to declare.
+    Every retarget_interval blocks the difficulty is adjusted, so that the time between the
+    last retarget_interval blocks gets closer to the target block time. An adjustment is limited
+    to a factor of 4 to dampen outliers of the timestamps.
+    :param blocks: Blocks or headers of the chain. The blocks in front of the index have to exist
+    :param index: Index of the block
+    :param initial_difficulty: Difficulty of the genesis block
+    :param retarget_interval: Number of blocks after which the difficulty is adjusted
+    :param target_block_time: Desired time between two blocks in seconds
+    :return: Expected difficulty of the block
+    :rtype: int
+    """
+    if index == 0:
+        return initial_difficulty
+    last_block = blocks[index - 1]
+    if index < retarget_interval or index % retarget_interval != 0:
+        return last_block.difficulty
+
+    first_block = blocks[index - retarget_interval]
+    expected_time = target_block_time * (retarget_interval - 1)
+    actual_time = (last_block.timestamp - first_block.timestamp).total_seconds()
+    actual_time = min(max(actual_time, expected_time / 4), expected_time * 4)
+    return max(1, round(last_block.difficulty * expected_time / actual_time))
+
+
+def check_timestamp(blocks, height: int):
+    """
+    Checks the timestamp of a block against its predecessor and the clock of the node. Otherwise a miner could
+    lower the difficulty by dating the blocks of a retarget interval far apart
+    :param blocks: Blocks or headers of the chain. The blocks up to the height have to exist
+    :param height: Height of the block
+    :return: None if the timestamp is valid otherwise the reason
+    :rtype: str
+    """
+    timestamp = blocks[height].timestamp
+    if height > 0 and timestamp < blocks[height - 1].timestamp:
+        return "timestamp is earlier than the timestamp of the previous block"
+    if timestamp > datetime.now() + MAX_FUTURE_BLOCK_TIME:
+        return "timestamp is too far in the future"
+    return None
+
+
+def validate_headers(view, fork_height: int, get_expected_difficulty):
+    """
+    Checks the references, timestamps, proof of work and difficulties of the headers of a branch
+    :param view: Chain with the branch, e.g. a ChainView
+    :param fork_height: Height of the first header of the branch
+    :param get_expected_difficulty: Function of the index and the view which returns the expected difficulty
+    :return: None if the headers are valid otherwise the reason
+    :rtype: str
+    """
+    for height in range(fork_height, len(view)):
+        header = view[height]
+        previous_hash = GENESIS_PREVIOUS_HASH if height == 0 else view[height - 1].hash
+        if header.index != height or header.previous_hash != previous_hash:
+            return "header {} does not reference its predecessor".format(height)
+        reason = check_timestamp(view, height)
+        if reason is not None:
+            return "header {}: {}".format(height, reason)
+        if not header.has_valid_proof_of_work():
+            return "header {} has an invalid proof of work".format(height)
+        if header.difficulty != get_expected_difficulty(height, view):
+            return "header {} has an unexpected difficulty".format(height)
+    return None
+
+
+class HeaderChain:
+
+    def __init__(self, difficulty: int = DEFAULT_DIFFICULTY, retarget_interval: int = 10,
+                 target_block_time: float = 10.0):
+        """
+        Validated headers of the chain with the most work, without any transactions.
+        The difficulty rules have to be the same as the rules of the followed Blockchain.
+        :param difficulty: Difficulty of the genesis block
+        :param retarget_interval: Number of blocks after which the difficulty is adjusted
+        :param target_block_time: Desired time between two blocks in seconds
+        """
+        if retarget_interval < 2:
+            raise ValueError("The retarget interval has to span at least two blocks")
+        if target_block_time <= 0:
+            raise ValueError("The target block time has to be positive")
+        self.initial_difficulty = difficulty
+        self.retarget_interval = retarget_interval
+        self.target_block_time = target_block_time
+        self.headers = []
+        # Work of the chain up to every height, so a branch can be compared without a walk
+        self.cumulative_work = []
+
+    def __len__(self):
+        return len(self.headers)
+
+    def __getitem__(self, height: int):
+        return self.headers[height]
+
+    @property
+    def total_work(self):
+        return self.cumulative_work[-1] if len(self.cumulative_work) > 0 else 0
+
+    def get_expected_difficulty(self, index: int, blocks=None):
+        """
+        :param index: Index of the header
+        :param blocks: Optional other chain of headers, e.g. a branch. Default are the headers of this chain
+        :return: Difficulty which the header at the index has to declare
+        :rtype: int
+        """
+        return expected_difficulty(self.headers if blocks is None else blocks, index, self.initial_difficulty,
+                                   self.retarget_interval, self.target_block_time)
+
+    def add_headers(self, headers: [BlockHeader]):
+        """
+        Adds the headers of a branch which starts at or below the tip.
+        The chain switches to the branch if the branch has more work.
+        :param headers: Consecutive headers
+        :return: True if the headers were added, False if the chain already has more work
+        :raises ValueError: If the headers are invalid or do not connect to the chain
+        """
+        if len(headers) == 0:
+            return False
+        fork_height = headers[0].index
+        if fork_height < 0 or fork_height > len(self.headers):
+            raise ValueError("The headers do not connect to the chain")
+        fork_work = self.cumulative_work[fork_height - 1] if fork_height > 0 else 0
+        if fork_work + sum(header.work for header in headers) <= self.total_work:
+            return False
+        reason = validate_headers(ChainView(self.headers, fork_height, headers), fork_height,
+                                  self.get_expected_difficulty)
+        if reason is not None:
+            raise ValueError(reason)
+        del self.headers[fork_height:]
+        del self.cumulative_work[fork_height:]
+        for header in headers:
+            self.headers.append(header)
+            self.cumulative_work.append(self.total_work + header.work)
+        return True
@@ -0,0 +1,143 @@
+import heapq
+import itertools
+
+from crypto.blockchain.codec import encode_transaction
+from crypto.blockchain.transaction import Transaction
+
+# Enough transactions for many full blocks
+DEFAULT_MEMPOOL_SIZE = 100000
+
+
+class MempoolEntry:
+
+    def __init__(self, transaction: Transaction, sequence: int):
+        """
+        Transaction in the mempool with the values which are needed for the ordering
+        :param transaction: Unprocessed transaction
+        :param sequence: Arrival order of the transaction
+        """
+        self.transaction = transaction
+        self.sequence = sequence
+        self.txid = transaction.hash_transaction().digest()
+        self.size = len(encode_transaction(transaction))
+        self.fee_rate = transaction.fee / self.size
+
+
+class Mempool:
+
+    def __init__(self, max_size: int = DEFAULT_MEMPOOL_SIZE):
+        """
+        Unprocessed transactions ordered by their fee rate (fee per encoded byte).
+        If the mempool is full, a new transaction evicts the transaction with the lowest fee rate
+        if it pays a higher fee rate. Transactions with the same fee rate are ordered by their arrival.
+        :param max_size: Maximum number of transactions
+        """
+        self.max_size = max_size
+        # Iterates in the arrival order of the transactions
+        self.entries = {}
+        self._sequence = itertools.count()
+        # Heaps with the highest and the lowest fee rate on top.
+        # Removed transactions stay in the heaps until they reach the top.
+        self._best = []
+        self._worst = []
+        # Is incremented with every change, so a miner can detect a changed mempool
+        self.version = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, transaction: Transaction):
+        return transaction.hash_transaction().digest() in self.entries
+
+    @property
+    def transactions(self):
+        """
+        :return: All transactions in their arrival order
+        :rtype: [Transaction]
+        """
+        return [entry.transaction for entry in self.entries.values()]
+
+    def _is_current(self, txid: bytes, sequence: int):
+        entry = self.entries.get(txid)
+        return entry is not None and entry.sequence == sequence
+
+    def _lowest_entry(self):
+        while self._worst and not self._is_current(self._worst[0][2], -self._worst[0][1]):
+            heapq.heappop(self._worst)
+        if not self._worst:
+            return None
+        return self.entries[self._worst[0][2]]
+
+    def add(self, transaction: Transaction):
+        """
+        Adds a transaction. If the mempool is full, the transaction with the lowest fee rate is evicted.
+        :param transaction: Verified transaction
+        :return: True if the transaction was added and the list of evicted transactions
+        :rtype: (bool, [Transaction])
+        """
+        entry = MempoolEntry(transaction, next(self._sequence))
+        if entry.txid in self.entries:
+            return False, []
+
+        evicted = []
+        if len(self.entries) >= self.max_size:
+            lowest = self._lowest_entry()
+            if lowest is None or lowest.fee_rate >= entry.fee_rate:
+                return False, []
+            self.remove(lowest.transaction)
+            evicted.append(lowest.transaction)
+
+        self.entries[entry.txid] = entry
+        heapq.heappush(self._best, (-entry.fee_rate, entry.sequence, entry.txid))
+        heapq.heappush(self._worst, (entry.fee_rate, -entry.sequence, entry.txid))
+        self._compact()
+        self.version += 1
+        return True, evicted
+
+    def _compact(self):
+        """
+        Rebuilds the heaps if they mostly contain removed transactions
+        """
+        if len(self._best) <= 2 * len(self.entries) + 64:
+            return
+        self._best = [(-entry.fee_rate, entry.sequence, entry.txid) for entry in self.entries.values()]
+        self._worst = [(entry.fee_rate, -entry.sequence, entry.txid) for entry in self.entries.values()]
+        heapq.heapify(self._best)
+        heapq.heapify(self._worst)
+
+    def remove(self, transaction: Transaction):
+        """
+        Removes a transaction, e.g. because it is part of a mined block
+        :param transaction: Transaction to remove
+        :return: True if the transaction was in the mempool
+        """
+        if self.entries.pop(transaction.hash_transaction().digest(), None) is None:
+            return False
+        self.version += 1
+        return True
+
+    def select(self, max_count: int, max_size: int):
+        """
+        Selects the transactions with the highest fee rates for a block
+        :param max_count: Maximum number of transactions
+        :param max_size: Maximum encoded size of all transactions in bytes
+        :return: Selected entries in their arrival order
+        :rtype: [MempoolEntry]
+        """
+        selected = []
+        popped = []
+        size = 0
+        while self._best and len(selected) < max_count:
+            item = heapq.heappop(self._best)
+            if not self._is_current(item[2], item[1]):
+                continue
+            popped.append(item)
+            entry = self.entries[item[2]]
+            # A smaller transaction with a lower fee rate may still fit
+            if size + entry.size > max_size:
+                continue
+            selected.append(entry)
+            size += entry.size
+        for item in popped:
+            heapq.heappush(self._best, item)
+        return sorted(selected, key=lambda selected_entry: selected_entry.sequence)
@@ -0,0 +1,115 @@
+import hashlib
+
+# Root of a tree without leaves
+EMPTY_ROOT = hashlib.sha256(b'').digest()
+
+
+def hash_pair(left: bytes, right: bytes):
+    """
+    :return: Hash of two child nodes
+    :rtype: bytes
+    """
+    return hashlib.sha256(left + right).digest()
+
+
+class MerkleTree:
+
+    def __init__(self, leaves: [bytes] = None):
+        """
+        Binary Merkle tree over the hashes of transactions.
+        If a level has an odd number of nodes, the last node is paired with itself.
+        All levels are kept, so a leaf can be appended and a proof can be created in O(log n).
+        :param leaves: Raw hashes of the leaves
+        """
+        self.levels = [[]]
+        for leaf in leaves or []:
+            self.append(leaf)
+
+    def append(self, leaf: bytes):
+        """
+        Appends a leaf and updates the nodes on the path to the root
+        :param leaf: Raw hash of the leaf, e.g. the digest of a transaction hash
+        """
+        self.levels[0].append(leaf)
+        index = len(self.levels[0]) - 1
+        level = 0
+        # Only the last node of every level changes, because the new leaf is the last leaf
+        while len(self.levels[level]) > 1:
+            nodes = self.levels[level]
+            parent_index = index // 2
+            left = nodes[parent_index * 2]
+            right = nodes[parent_index * 2 + 1] if parent_index * 2 + 1 < len(nodes) else left
+            if level + 1 == len(self.levels):
+                self.levels.append([])
+            parents = self.levels[level + 1]
+            if parent_index < len(parents):
+                parents[parent_index] = hash_pair(left, right)
+            else:
+                parents.append(hash_pair(left, right))
+            index = parent_index
+            level += 1
+
+    def __len__(self):
+        return len(self.levels[0])
+
+    def copy(self):
+        """
+        :return: Tree with the same nodes which is not changed by appending to this tree
+        :rtype: MerkleTree
+        """
+        tree = MerkleTree()
+        tree.levels = [list(nodes) for nodes in self.levels]
+        return tree
+
+    @property
+    def root(self):
+        """
+        :return: Root of the tree in hex
+        :rtype: str
+        """
+        if len(self) == 0:
+            return EMPTY_ROOT.hex()
+        return self.levels[-1][0].hex()
+
+    def get_proof(self, index: int):
+        """
+        Creates an inclusion proof for a leaf
+        :param index: Position of the leaf
+        :return: List of (sibling hash in hex, True if the sibling is the left node) from the leaf to the root
+        :rtype: [(str, bool)]
+        """
+        if index < 0 or index >= len(self):
+            raise IndexError("Leaf index out of range")
+        proof = []
+        for nodes in self.levels[:-1]:
+            if index % 2 == 0:
+                sibling = nodes[index + 1] if index + 1 < len(nodes) else nodes[index]
+                proof.append((sibling.hex(), False))
+            else:
+                proof.append((nodes[index - 1].hex(), True))
+            index //= 2
+        return proof
+
+    @staticmethod
+    def verify_proof(leaf: bytes, proof: [(str, bool)], root: str):
+        """
+        Checks an inclusion proof without the other leaves of the tree
+        :param leaf: Raw hash of the leaf
+        :param proof: Proof created by get_proof
+        :param root: Root of the tree in hex, e.g. the merkle root of a block
+        :return: True if the leaf is part of the tree with the given root
+        """
+        node = leaf
+        for sibling, sibling_is_left in proof:
+            sibling = bytes.fromhex(sibling)
+            node = hash_pair(sibling, node) if sibling_is_left else hash_pair(node, sibling)
+        return node.hex() == root
+
+    @classmethod
+    def from_transactions(cls, transactions):
+        """
+        :param transactions: Transactions of a block
+        :return: Tree with the hashes of the transactions as leaves
+        :rtype: MerkleTree
+        """
+        return cls([tx.hash_transaction().digest() for tx in transactions])
@@ -1,11 +1,15 @@
 from crypto.blockchain.transaction import Transaction
 from crypto.client.client import Client
+from crypto.client.key_provider import KeyProvider
 
 
 class Miner:
 
-    def __init__(self):
-        self.miner = Client()
+    def __init__(self, key_provider: KeyProvider = None):
+        """
+        :param key_provider: Source of the key of the miner, see Client
+        """
+        self.miner = Client(key_provider)
 
     def create_mining_transaction(self, supply_user: Client, reward: int):
         reward_transaction = Transaction(supply_user.public_key, self.miner.public_key, reward)
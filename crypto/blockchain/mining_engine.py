@@ -0,0 +1,152 @@
+import hashlib
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from crypto.blockchain.block import Block, meets_target
+
+# Set by the initializer of every worker process.
+# Smallest nonce found so far by any worker or -1 if no nonce was found yet.
+_FOUND_NONCE = None
+
+NO_NONCE_FOUND = -1
+
+
+def _init_worker(found_nonce):
+    global _FOUND_NONCE
+    _FOUND_NONCE = found_nonce
+
+
+def _publish_nonce(nonce: int):
+    with _FOUND_NONCE.get_lock():
+        if _FOUND_NONCE.value == NO_NONCE_FOUND or nonce < _FOUND_NONCE.value:
+            _FOUND_NONCE.value = nonce
+
+
+def _search_nonce_range(header_prefix: bytes, target: int, start_nonce: int, end_nonce: int, check_interval: int):
+    """
+    Searches a valid nonce in the range [start_nonce, end_nonce).
+    Uses the same header layout as Block.hash_block.
+    The search is cancelled as soon as another worker found a smaller nonce, so the
+    result is always the same as the result of a sequential search.
+    :param header_prefix: Encoded header fields in front of the nonce
+    :param target: Number which the hash has to be lower than
+    :param start_nonce: First nonce to try
+    :param end_nonce: First nonce which will not be tried
+    :param check_interval: Number of hashes between two checks if the search was cancelled
+    :return: Tuple of the found nonce (None if no nonce was found), its hash and the number of computed hashes
+    """
+    midstate = hashlib.sha256(header_prefix)
+    for nonce in range(start_nonce, end_nonce):
+        digest = Block.hash_nonce(midstate, nonce)
+        if meets_target(digest, target):
+            _publish_nonce(nonce)
+            return nonce, digest.hex(), nonce - start_nonce + 1
+        if (nonce - start_nonce) % check_interval == 0 and NO_NONCE_FOUND != _FOUND_NONCE.value < nonce:
+            return None, None, nonce - start_nonce + 1
+    return None, None, end_nonce - start_nonce
+
+
+class MiningResult:
+
+    def __init__(self, nonce: int, block_hash: str, hashes: int, elapsed: float):
+        """
+        Result of a proof of work
+        :param nonce: Nonce which was found
+        :param block_hash: Hash of the block with the found nonce
+        :param hashes: Number of computed hashes by all workers
+        :param elapsed: Duration of the search in seconds
+        """
+        self.nonce = nonce
+        self.hash = block_hash
+        self.hashes = hashes
+        self.elapsed = elapsed
+
+    @property
+    def hash_rate(self):
+        """
+        :return: Computed hashes per second
+        :rtype: float
+        """
+        if self.elapsed <= 0:
+            return float(self.hashes)
+        return self.hashes / self.elapsed
+
+
+class ParallelMiningEngine:
+
+    def __init__(self, workers: int = None, chunk_size: int = 20000, check_interval: int = 1024):
+        """
+        Proof of work engine which splits the nonce space over a pool of processes.
+        Every worker searches a chunk of nonces. As soon as one worker finds a valid nonce,
+        all workers searching larger nonces are cancelled.
+        :param workers: Number of worker processes. Default is the number of cores
+        :param chunk_size: Number of nonces which are searched by a worker at once
+        :param check_interval: Number of hashes between two checks if the search was cancelled
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.check_interval = check_interval
+        self.last_result = None
+        self._found_nonce = multiprocessing.Value('q', NO_NONCE_FOUND)
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                             initializer=_init_worker,
+                                             initargs=(self._found_nonce,))
+        return self._pool
+
+    def mine(self, block: Block, end_nonce: int = None):
+        """
+        Searches a nonce starting at the current nonce of the block and sets the nonce and the hash of the block.
+        The smallest valid nonce is used, like in a sequential search.
+        :param block: Block which should be mined
+        :param end_nonce: Optional first nonce which will not be tried, so a caller can check for
+        cancellation between the searched ranges. Without an end the search runs until a nonce is found
+        :return: Result of the search including the hash rate or None if no nonce was found in the range
+        :rtype: MiningResult
+        """
+        start_time = time.perf_counter()
+        pool = self._get_pool()
+        self._found_nonce.value = NO_NONCE_FOUND
+        header_prefix = block.header_prefix()
+
+        next_nonce = block.nonce
+        running = set()
+        found = []
+        hashes = 0
+        while running or (not found and (end_nonce is None or next_nonce < end_nonce)):
+            # Keeps every worker busy until a nonce was found
+            while not found and len(running) < self.workers and (end_nonce is None or next_nonce < end_nonce):
+                chunk_end = next_nonce + self.chunk_size
+                if end_nonce is not None:
+                    chunk_end = min(chunk_end, end_nonce)
+                running.add(pool.submit(_search_nonce_range, header_prefix, block.target, next_nonce,
+                                        chunk_end, self.check_interval))
+                next_nonce = chunk_end
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                nonce, computed_hash, computed_hashes = future.result()
+                hashes += computed_hashes
+                if nonce is not None:
+                    found.append((nonce, computed_hash))
+
+        if not found:
+            self.last_result = MiningResult(None, None, hashes, time.perf_counter() - start_time)
+            return None
+        nonce, computed_hash = min(found)
+        block.nonce = nonce
+        block.hash = computed_hash
+        self.last_result = MiningResult(nonce, computed_hash, hashes, time.perf_counter() - start_time)
+        return self.last_result
+
+    def close(self):
+        """
+        Stops the worker processes
+        """
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
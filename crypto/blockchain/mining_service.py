@@ -0,0 +1,147 @@
+import threading
+import time
+
+from crypto.blockchain.block import Block, meets_target
+
+
+class MiningService:
+
+    def __init__(self, blockchain, batch_size: int = 20000, idle_interval: float = 0.1,
+                 refresh_interval: float = 1.0, mine_empty_blocks: bool = False):
+        """
+        Mines candidate blocks from the mempool on a background thread, so the request handling
+        never waits for a proof of work.
+        The search is interrupted after every batch of nonces. It restarts with a new candidate block if
+        the last block of the blockchain changed or if new transactions arrived, e.g. with higher fees.
+        If the blockchain has a mining engine, every batch is searched by the worker processes of the engine.
+        :param blockchain: Blockchain which gets the mined blocks
+        :param batch_size: Number of nonces between two checks for a new candidate block
+        :param idle_interval: Seconds to wait for new transactions if the mempool is empty
+        :param refresh_interval: Minimum seconds before a candidate block is replaced because of new transactions.
+        A changed last block always replaces the candidate block immediately
+        :param mine_empty_blocks: Mines blocks without transactions if the mempool is empty, e.g. to start a
+        chain. Every mined block creates a reward for the next block, so the chain keeps growing
+        """
+        self.blockchain = blockchain
+        self.batch_size = batch_size
+        self.idle_interval = idle_interval
+        self.refresh_interval = refresh_interval
+        self.mine_empty_blocks = mine_empty_blocks
+        self.blocks_mined = 0
+        self.restarts = 0
+        self.hashes = 0
+        self.candidate = None
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._started_at = None
+        metrics = blockchain.metrics
+        self.hashes_counter = metrics.counter('mining_hashes_total', "Hashed nonces of the background mining")
+        self.blocks_counter = metrics.counter('mining_blocks_total', "Blocks mined in the background")
+        self.restarts_counter = metrics.counter('mining_restarts_total', "Replaced outdated candidate blocks")
+        metrics.gauge('mining_hash_rate', "Hashes per second since the start of the mining",
+                      lambda: self.status()["hash_rate"])
+
+    @property
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """
+        Starts the mining thread if it is not running yet
+        """
+        if self.is_running:
+            return
+        self._stop_event.clear()
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="mining-service", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        """
+        Stops the mining thread after the current batch of nonces
+        :param timeout: Maximum seconds to wait for the thread
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if not self._thread.is_alive():
+                self._thread = None
+
+    def status(self):
+        """
+        :return: State of the service, the current candidate block and the hash rate since the start
+        :rtype: dict
+        """
+        candidate = self.candidate
+        elapsed = time.perf_counter() - self._started_at if self._started_at is not None else 0
+        return {
+            "running": self.is_running,
+            "height": self.blockchain.get_last_block.index,
+            "candidate_index": candidate.index if candidate is not None else None,
+            "candidate_transactions": len(candidate.transactions) if candidate is not None else 0,
+            "blocks_mined": self.blocks_mined,
+            "restarts": self.restarts,
+            "hashes": self.hashes,
+            "hash_rate": self.hashes / elapsed if elapsed > 0 else 0.0,
+        }
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            candidate = self.blockchain.create_candidate_block(self.mine_empty_blocks)
+            self.candidate = candidate
+            if candidate is None:
+                self._stop_event.wait(self.idle_interval)
+                continue
+            if self._search(candidate) and self.blockchain.submit_block(candidate):
+                self.blocks_mined += 1
+                self.blocks_counter.inc()
+        self.candidate = None
+
+    def _is_outdated(self, candidate: Block, mempool_version: int, created_at: float):
+        """
+        :return: True if the candidate block does not extend the last block anymore or
+        if new transactions are waiting since the refresh interval
+        """
+        if candidate.previous_hash != self.blockchain.get_last_block.hash:
+            return True
+        return self.blockchain.mempool.version != mempool_version and \
+            time.perf_counter() - created_at >= self.refresh_interval
+
+    def _search(self, candidate: Block):
+        """
+        Searches a valid nonce in batches until it is found, the service is stopped or the candidate is outdated
+        :param candidate: Block created by the blockchain
+        :return: True if a valid nonce was found
+        """
+        mempool_version = self.blockchain.mempool.version
+        created_at = time.perf_counter()
+        engine = self.blockchain.mining_engine
+        midstate = candidate.header_midstate()
+        target = candidate.target
+        nonce = candidate.nonce
+        while not self._stop_event.is_set():
+            end_nonce = nonce + self.batch_size
+            if engine is not None:
+                candidate.nonce = nonce
+                result = engine.mine(candidate, end_nonce)
+                self.hashes += engine.last_result.hashes
+                self.hashes_counter.inc(engine.last_result.hashes)
+                if result is not None:
+                    return True
+            else:
+                for nonce in range(nonce, end_nonce):
+                    digest = Block.hash_nonce(midstate, nonce)
+                    if meets_target(digest, target):
+                        self.hashes += nonce - end_nonce + self.batch_size + 1
+                        self.hashes_counter.inc(nonce - end_nonce + self.batch_size + 1)
+                        candidate.nonce = nonce
+                        candidate.hash = digest.hex()
+                        return True
+                self.hashes += self.batch_size
+                self.hashes_counter.inc(self.batch_size)
+            nonce = end_nonce
+            if self._is_outdated(candidate, mempool_version, created_at):
+                self.restarts += 1
+                self.restarts_counter.inc()
+                return False
+        return False
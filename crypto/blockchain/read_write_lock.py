@@ -0,0 +1,104 @@
+import threading
+
+
+class _Guard:
+
+    def __init__(self, acquire, release):
+        """
+        Holds a lock within a with block. Guards are stateless, so one guard serves all threads
+        """
+        self._acquire = acquire
+        self._release = release
+
+    def __enter__(self):
+        self._acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._release()
+        return False
+
+
+class ReadWriteLock:
+
+    def __init__(self):
+        """
+        Lock which is shared by many readers or held by one writer.
+        Waiting writers are preferred, so a steady stream of readers can not starve a writer.
+        Both sides are reentrant: a writer may take the write or the read lock again and a reader may
+        take the read lock again, even if a writer is waiting. A reader can not upgrade to the write lock.
+        """
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._waiting_writers = 0
+        self._writer = None
+        self._writer_depth = 0
+        # Read depth of the current thread, so nested reads do not wait for a waiting writer
+        self._local = threading.local()
+        self._read_guard = _Guard(self.acquire_read, self.release_read)
+        self._write_guard = _Guard(self.acquire_write, self.release_write)
+
+    def _read_depth(self):
+        return getattr(self._local, 'depth', 0)
+
+    def acquire_read(self):
+        depth = self._read_depth()
+        if depth > 0 or self._writer == threading.get_ident():
+            self._local.depth = depth + 1
+            return
+        with self._condition:
+            while self._writer is not None or self._waiting_writers > 0:
+                self._condition.wait()
+            self._readers += 1
+        self._local.depth = 1
+
+    def release_read(self):
+        depth = self._read_depth()
+        if depth == 0:
+            raise RuntimeError("Read lock is not held")
+        self._local.depth = depth - 1
+        if depth > 1 or self._writer == threading.get_ident():
+            return
+        with self._condition:
+            self._readers -= 1
+            if self._readers == 0:
+                self._condition.notify_all()
+
+    def acquire_write(self):
+        thread = threading.get_ident()
+        if self._writer == thread:
+            self._writer_depth += 1
+            return
+        if self._read_depth() > 0:
+            raise RuntimeError("A reader can not upgrade to the write lock")
+        with self._condition:
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers > 0:
+                    self._condition.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = thread
+            self._writer_depth = 1
+
+    def release_write(self):
+        if self._writer != threading.get_ident():
+            raise RuntimeError("Write lock is not held")
+        self._writer_depth -= 1
+        if self._writer_depth > 0:
+            return
+        with self._condition:
+            self._writer = None
+            self._condition.notify_all()
+
+    def read(self):
+        """
+        :return: Context manager which holds the read lock within a with block
+        """
+        return self._read_guard
+
+    def write(self):
+        """
+        :return: Context manager which holds the write lock within a with block
+        """
+        return self._write_guard
@@ -1,14 +1,18 @@
 from crypto.blockchain.transaction import Transaction
 from crypto.client.client import Client
+from crypto.client.key_provider import KeyProvider
 
 
 class Token:
 
-    def __init__(self):
+    def __init__(self, key_provider: KeyProvider = None):
+        """
+        :param key_provider: Source of the keys of the initial and the supply user, see Client
+        """
         self.name = "RarCoin"
         self.total_supply = 1000
-        self.init_user = Client()
-        self.supply_user = Client()
+        self.init_user = Client(key_provider)
+        self.supply_user = Client(key_provider)
 
     def create_supply_transaction(self):
         transaction = Transaction(self.init_user.public_key, self.supply_user.public_key, self.total_supply)
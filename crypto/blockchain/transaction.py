@@ -4,24 +4,84 @@ from Crypto.Hash import SHA256
 from Crypto.PublicKey.RSA import RsaKey
 from Crypto.Signature import pkcs1_15
 
+from crypto.blockchain.address import Address
+from crypto.blockchain.encoding import encode_timestamp, encode_transaction_body
+
 
 class Transaction:
+    # A chain holds millions of transactions, so they have no attribute dictionary
+    __slots__ = ('sender', 'recipient', 'signature', 'amount', 'fee', 'timestamp',
+                 '_sender_der', '_recipient_der', '_sender_address', '_recipient_address')
 
-    def __init__(self, sender: RsaKey, recipient: RsaKey, amount: int):
+    def __init__(self, sender: RsaKey, recipient: RsaKey, amount: int, fee: int = 0):
         """
         Creates a new transaction
         :param sender: Public key of the sender
         :param recipient: Public key of the recipient
         :param amount: Amount to send
+        :param fee: Fee which the sender pays for the processing. Transactions with higher fees are mined first
         """
         self.sender = sender
         self.recipient = recipient
         self.signature = None
         self.amount = amount
+        self.fee = fee
         self.timestamp = datetime.now()
+        # DER encoded keys and addresses, computed once on first use
+        self._sender_der = None
+        self._recipient_der = None
+        self._sender_address = None
+        self._recipient_address = None
+
+    @property
+    def sender_der(self):
+        """
+        :return: DER encoded public key of the sender
+        :rtype: bytes
+        """
+        if self._sender_der is None:
+            self._sender_der = self.sender.public_key().export_key('DER')
+        return self._sender_der
+
+    @property
+    def recipient_der(self):
+        """
+        :return: DER encoded public key of the recipient
+        :rtype: bytes
+        """
+        if self._recipient_der is None:
+            self._recipient_der = self.recipient.public_key().export_key('DER')
+        return self._recipient_der
+
+    @property
+    def sender_address(self):
+        """
+        :return: Address of the sender
+        :rtype: Address
+        """
+        if self._sender_address is None:
+            self._sender_address = Address.from_der(self.sender_der)
+        return self._sender_address
+
+    @property
+    def recipient_address(self):
+        """
+        :return: Address of the recipient
+        :rtype: Address
+        """
+        if self._recipient_address is None:
+            self._recipient_address = Address.from_der(self.recipient_der)
+        return self._recipient_address
 
     def encoded_transaction(self):
-        return (str(self.sender) + str(self.recipient) + str(self.amount)).encode('utf-8')
+        """
+        Encodes the signed content of a transaction with the versioned binary encoding.
+        These bytes are used for hashing and signing.
+        :return: Encoded transaction
+        :rtype: bytes
+        """
+        return encode_transaction_body(self.sender_address, self.recipient_address, self.amount, self.fee,
+                                       encode_timestamp(self.timestamp))
 
     def sign_transaction(self, private_key: RsaKey):
         """
@@ -61,7 +121,9 @@ class Transaction:
 
     def to_dict(self):
         return {
-            "sender": str(self.sender.public_key().export_key('DER').hex()),
-            "recipient": str(self.recipient.public_key().export_key('DER').hex()),
-            "amount": self.amount
+            "sender": self.sender_der.hex(),
+            "recipient": self.recipient_der.hex(),
+            "amount": self.amount,
+            "fee": self.fee,
+            "timestamp": str(self.timestamp)
         }
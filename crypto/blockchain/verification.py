@@ -0,0 +1,152 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from Crypto.Hash import SHA256
+from Crypto.PublicKey import RSA
+from Crypto.PublicKey.RSA import RsaKey
+from Crypto.Signature import pkcs1_15
+
+# Enough entries to keep the verified transactions of a large mempool
+DEFAULT_CACHE_SIZE = 100000
+
+
+class VerificationCache:
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE):
+        """
+        Remembers transactions with a valid signature, so they are not verified again.
+        If the cache is full, the least recently used entry is evicted.
+        Invalid signatures are not cached.
+        :param max_size: Maximum number of cached transactions
+        """
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # The cache is shared by the request threads
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def cache_key(transaction):
+        """
+        :param transaction: Signed transaction
+        :return: Key of the transaction in the cache
+        :rtype: bytes
+        """
+        return transaction.hash_transaction().digest() + transaction.signature
+
+    def contains(self, key: bytes):
+        """
+        Looks up a key and counts the hit or the miss
+        :param key: Key created by cache_key
+        :return: True if the signature was already verified
+        """
+        with self._lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return True
+            self.misses += 1
+            return False
+
+    def add(self, key: bytes):
+        """
+        Adds a verified transaction and evicts the least recently used entry if the cache is full
+        :param key: Key created by cache_key
+        """
+        with self._lock:
+            self.entries[key] = True
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def verify_transaction(self, transaction):
+        """
+        Verifies a transaction if it is not cached
+        :param transaction: Transaction to verify
+        :return: True if the transaction is signed correctly otherwise False
+        """
+        if transaction.signature is None:
+            return False
+        key = self.cache_key(transaction)
+        if self.contains(key):
+            return True
+        if transaction.verify_transaction():
+            self.add(key)
+            return True
+        return False
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def _verify_signature(public_key, message: bytes, signature: bytes):
+    """
+    Verifies a signature. Can be executed by a process pool if the public key is passed as bytes.
+    :param public_key: Public key of the signer as RsaKey or DER encoded
+    :param message: Signed message
+    :param signature: Signature of the message
+    :return: True if the signature is valid otherwise False
+    """
+    try:
+        if not isinstance(public_key, RsaKey):
+            public_key = RSA.import_key(public_key)
+        pkcs1_15.new(public_key).verify(SHA256.new(message), signature)
+        return True
+    except (ValueError, TypeError):
+        return False
+
+
+def verify_transactions(transactions, executor: Executor = None, cache: VerificationCache = None):
+    """
+    Verifies the signatures of many transactions in parallel
+    :param transactions: Transactions to verify
+    :param executor: Thread or process pool for the verification.
+    Without an executor a thread pool with one thread per core is used
+    :param cache: Optional cache of already verified transactions. Valid transactions are added to the cache
+    :return: For each transaction True if the signature is valid otherwise False
+    :rtype: [bool]
+    """
+    # Keys can not be pickled, so they are exported for a process pool
+    export_keys = isinstance(executor, ProcessPoolExecutor)
+    results = [tx.signature is not None for tx in transactions]
+    cache_keys = {}
+    # Only the signed transactions which are not cached have to be verified
+    indexes = []
+    for i, tx in enumerate(transactions):
+        if not results[i]:
+            continue
+        if cache is not None:
+            cache_keys[i] = cache.cache_key(tx)
+            if cache.contains(cache_keys[i]):
+                continue
+        indexes.append(i)
+    if len(indexes) == 0:
+        return results
+
+    public_keys = []
+    messages = []
+    signatures = []
+    for i in indexes:
+        tx = transactions[i]
+        public_keys.append(tx.sender_der if export_keys else tx.sender)
+        # The messages are encoded before, because they have to be equal to the signed messages
+        messages.append(tx.encoded_transaction())
+        signatures.append(tx.signature)
+
+    arguments = (public_keys, messages, signatures)
+    if executor is None:
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as default_executor:
+            verified = list(default_executor.map(_verify_signature, *arguments))
+    else:
+        verified = executor.map(_verify_signature, *arguments)
+
+    for i, is_valid in zip(indexes, verified):
+        results[i] = is_valid
+        if is_valid and cache is not None:
+            cache.add(cache_keys[i])
+    return results
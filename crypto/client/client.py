@@ -1,20 +1,29 @@
-from Crypto.PublicKey import RSA
+from Crypto.PublicKey.RSA import RsaKey
+
+from crypto.client.key_provider import KeyProvider, read_key_from_file
+
+# Generates a new random key for every client without a key provider
+DEFAULT_KEY_PROVIDER = KeyProvider()
 
 
 class Client:
 
-    def __init__(self):
+    def __init__(self, key_provider: KeyProvider = None, private_key: RsaKey = None):
         """
         Creates a new RSA key pair
+        :param key_provider: Source of the key, e.g. a DeterministicKeyPool for tests or a FileKeyProvider.
+        Without a provider a new key is generated
+        :param private_key: Existing key of the client. Takes precedence over the key provider
         """
-        self.private_key = RSA.generate(1024)
+        if private_key is None:
+            private_key = (key_provider or DEFAULT_KEY_PROVIDER).next_key()
+        self.private_key = private_key
         self.public_key = self.private_key.publickey()
 
-    def save_key_to_file(self):
-        file = open('myKey.pem', 'wb')
-        file.write(self.private_key.exportKey('PEM'))
-        file.close()
+    def save_key_to_file(self, path: str = 'myKey.pem'):
+        with open(path, 'wb') as file:
+            file.write(self.private_key.exportKey('PEM'))
 
-    def read_key_from_file(self):
-        file = open('myKey.pem', 'r')
-        return RSA.importKey(file.read())
+    @staticmethod
+    def read_key_from_file(path: str = 'myKey.pem'):
+        return read_key_from_file(path)
@@ -0,0 +1,139 @@
+import hashlib
+import os
+import threading
+
+from Crypto.PublicKey import RSA
+
+KEY_SIZE = 1024
+
+
+def read_key_from_file(path: str):
+    """
+    :param path: PEM file of a key
+    :return: Imported key
+    :rtype: RsaKey
+    """
+    with open(path, 'r') as file:
+        return RSA.import_key(file.read())
+
+
+class KeyProvider:
+    """
+    Source of the key pairs of new clients. The default provider generates a new random key for every client
+    """
+
+    def __init__(self, key_size: int = KEY_SIZE):
+        self.key_size = key_size
+
+    def next_key(self):
+        """
+        :return: Private key of the next client
+        :rtype: RsaKey
+        """
+        return RSA.generate(self.key_size)
+
+
+class DeterministicRandom:
+
+    def __init__(self, seed: bytes):
+        """
+        Byte stream of SHA256 in counter mode. Makes the key generation reproducible, so it is only
+        suitable for tests and benchmarks
+        :param seed: Seed of the stream
+        """
+        self.seed = seed
+        self.counter = 0
+
+    def read(self, length: int):
+        blocks = []
+        for _ in range((length + 31) // 32):
+            blocks.append(hashlib.sha256(self.seed + self.counter.to_bytes(8, 'little')).digest())
+            self.counter += 1
+        return b''.join(blocks)[:length]
+
+
+class DeterministicKeyPool(KeyProvider):
+    # Generated keys by seed, key size and position. Pools with the same seed share the keys,
+    # so every key is generated once per process
+    _keys = {}
+    _lock = threading.Lock()
+
+    def __init__(self, seed: int = 0, key_size: int = KEY_SIZE, size: int = 0):
+        """
+        Hands out a reproducible sequence of distinct keys. Every pool starts at the first key of its seed,
+        e.g. every test can use a new pool without generating the keys again.
+        The keys are derived from the public seed, so they must never protect real funds.
+        :param seed: Seed of the keys
+        :param key_size: Size of the keys in bits
+        :param size: Number of keys which are generated in advance
+        """
+        super().__init__(key_size)
+        self.seed = seed
+        self.position = 0
+        for position in range(size):
+            self.get_key(position)
+
+    def get_key(self, position: int):
+        """
+        :param position: Position of the key in the sequence
+        :return: Private key at the position
+        :rtype: RsaKey
+        """
+        cache_key = (self.seed, self.key_size, position)
+        with self._lock:
+            key = self._keys.get(cache_key)
+            if key is None:
+                seed = "{}:{}:{}".format(self.seed, self.key_size, position).encode('utf-8')
+                key = RSA.generate(self.key_size, randfunc=DeterministicRandom(seed).read)
+                self._keys[cache_key] = key
+        return key
+
+    def next_key(self):
+        key = self.get_key(self.position)
+        self.position += 1
+        return key
+
+
+class FileKeyProvider(KeyProvider):
+
+    def __init__(self, paths: [str], generate_missing: bool = False, key_size: int = KEY_SIZE):
+        """
+        Hands out keys which were saved with Client.save_key_to_file, e.g. the persistent keys of a node
+        :param paths: PEM files in the order in which the keys are handed out
+        :param generate_missing: If True a missing file is created with a new key, e.g. on the first start
+        of a node, so the same keys are used after a restart
+        :param key_size: Size of generated keys in bits
+        """
+        super().__init__(key_size)
+        self.paths = list(paths)
+        self.generate_missing = generate_missing
+        self.position = 0
+
+    def next_key(self):
+        """
+        :raises LookupError: If all keys were handed out
+        """
+        if self.position >= len(self.paths):
+            raise LookupError("All {} key files are used".format(len(self.paths)))
+        path = self.paths[self.position]
+        if self.generate_missing and not os.path.exists(path):
+            key = RSA.generate(self.key_size)
+            self._write_key(path, key)
+        else:
+            key = read_key_from_file(path)
+        self.position += 1
+        return key
+
+    @staticmethod
+    def _write_key(path: str, key):
+        """
+        Writes the key readable only by the owner. The file appears complete or not at all
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temporary_path = path + '.tmp'
+        descriptor = os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(descriptor, 'wb') as file:
+            file.write(key.export_key('PEM'))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, path)
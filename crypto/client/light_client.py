@@ -0,0 +1,205 @@
+import http.client
+import json
+import struct
+
+from crypto.blockchain.account_state import AccountState
+from crypto.blockchain.address import Address
+from crypto.blockchain.block import GENESIS_PREVIOUS_HASH
+from crypto.blockchain.codec import decode_headers, decode_transaction
+from crypto.blockchain.header_chain import HeaderChain
+from crypto.blockchain.merkle_tree import MerkleTree
+from crypto.client.client import Client
+from crypto.network.connection_pool import ConnectionPool
+from crypto.network.sync import MAX_HEADERS_PER_REQUEST, SyncError
+
+# Maximum number of merkle proofs which a node returns for one request
+MAX_PROOFS_PER_REQUEST = 1000
+
+
+class LightClient:
+
+    def __init__(self, client: Client, node: str, connection_pool: ConnectionPool = None,
+                 header_chain: HeaderChain = None):
+        """
+        Wallet which follows the chain of a node without downloading its blocks (simplified payment verification).
+        Only the headers are downloaded and checked. The transactions of the client are checked with merkle proofs
+        against the merkle roots of the headers, so memory and bandwidth grow with the number of headers and
+        the number of own transactions instead of the size of the chain.
+        The node can not invent transactions, but it can hide transactions of the client.
+        :param client: Keys of the wallet
+        :param node: URL of the node
+        :param connection_pool: Pool of the HTTP connections to the node
+        :param header_chain: Optional header chain with the difficulty rules of the node.
+        Default are the rules of a default Blockchain
+        """
+        self.client = client
+        self.address = Address.from_key(client.public_key)
+        self.node = node
+        self.connection_pool = connection_pool or ConnectionPool()
+        self.header_chain = HeaderChain() if header_chain is None else header_chain
+        # Proven transactions of the client: (height, txid) to (height, position, transaction).
+        # The position is sent by the node, so it does not identify a transaction
+        self.transactions = {}
+
+    def request(self, path: str, allow_missing: bool = False):
+        """
+        :param allow_missing: True to return None if the node does not know the requested resource
+        :return: Body of a successful GET request to the node
+        :rtype: bytes
+        :raises SyncError: If the node can not be reached or the request failed
+        """
+        try:
+            status, data = self.connection_pool.request(self.node, 'GET', path)
+        except (OSError, http.client.HTTPException) as error:
+            raise SyncError("Node {} is not reachable: {}".format(self.node, error))
+        if status == 404 and allow_missing:
+            return None
+        if status != 200:
+            raise SyncError("Node {} answered {} with status {}".format(self.node, path, status))
+        return data
+
+    def request_json(self, path: str, allow_missing: bool = False):
+        data = self.request(path, allow_missing)
+        if data is None:
+            return None
+        try:
+            return json.loads(data)
+        except ValueError as error:
+            raise SyncError("Invalid answer of node {}: {}".format(self.node, error))
+
+    def fetch_headers(self, from_height: int):
+        data = self.request('/headers/?from_height={}&limit={}'.format(from_height, MAX_HEADERS_PER_REQUEST))
+        try:
+            return decode_headers(data)
+        except (ValueError, struct.error) as error:
+            raise SyncError("Invalid headers of node {}: {}".format(self.node, error))
+
+    def sync_headers(self):
+        """
+        Downloads the headers which are missing in the header chain.
+        Steps back exponentially from the local tip if the node switched to another branch.
+        :return: True if the header chain changed
+        :raises SyncError: If the node can not be reached or sent invalid headers
+        """
+        chain = self.header_chain
+        status = self.request_json('/status/')
+        if len(chain) > 0 and status.get("hash") == chain[-1].hash:
+            return False
+        height = len(chain)
+        step = 1
+        while True:
+            headers = self.fetch_headers(height)
+            previous_hash = GENESIS_PREVIOUS_HASH if height == 0 else chain[height - 1].hash
+            if len(headers) > 0 and headers[0].previous_hash == previous_hash:
+                break
+            if height == 0:
+                raise SyncError("Node {} has no chain which starts with a genesis block".format(self.node))
+            height = max(0, height - step)
+            step *= 2
+        while len(headers) > 0 and headers[-1].index < status.get("height", 0):
+            next_headers = self.fetch_headers(headers[-1].index + 1)
+            if len(next_headers) == 0:
+                break
+            headers.extend(next_headers)
+        try:
+            return chain.add_headers(headers)
+        except ValueError as error:
+            raise SyncError("Node {} sent invalid headers: {}".format(self.node, error))
+
+    def check_proof(self, entry: dict):
+        """
+        Checks a transaction of the node against the header chain
+        :param entry: Transaction with its merkle proof, see the /transactions/<txid>/proof endpoint
+        :return: Height, position and transaction or None if the block is not part of the header chain,
+        e.g. because the headers are outdated
+        :rtype: (int, int, Transaction)
+        :raises SyncError: If the transaction or its proof is invalid
+        """
+        try:
+            transaction = decode_transaction(bytes.fromhex(entry["transaction"]))[0]
+            height = entry["block_height"]
+            position = entry["position"]
+            proof = [(sibling, sibling_is_left) for sibling, sibling_is_left in entry["proof"]]
+        except (KeyError, TypeError, ValueError, struct.error) as error:
+            raise SyncError("Invalid proof of node {}: {}".format(self.node, error))
+        if not isinstance(height, int) or not isinstance(position, int):
+            raise SyncError("Invalid proof of node {}: the position is not a number".format(self.node))
+        # The position of the leaf is encoded by the sides of its siblings
+        if position != sum(1 << level for level, (_, sibling_is_left) in enumerate(proof) if sibling_is_left):
+            raise SyncError("Invalid proof of node {}: the position does not match the proof".format(self.node))
+        if not 0 <= height < len(self.header_chain) or \
+                self.header_chain[height].hash != entry.get("block_hash"):
+            return None
+        try:
+            is_valid = MerkleTree.verify_proof(transaction.hash_transaction().digest(), proof,
+                                               self.header_chain[height].merkle_root)
+        except (TypeError, ValueError) as error:
+            raise SyncError("Invalid proof of node {}: {}".format(self.node, error))
+        if not is_valid:
+            raise SyncError("Node {} sent a transaction which is not part of block {}".format(self.node, height))
+        return height, position, transaction
+
+    def update_transactions(self):
+        """
+        Syncs the headers and requests the proofs of all transactions of the client.
+        Only proven transactions of the header chain are kept
+        :return: Height, position and transaction of every proven transaction
+        :rtype: [(int, int, Transaction)]
+        :raises SyncError: If the node can not be reached or sent invalid data
+        """
+        self.sync_headers()
+        transactions = {}
+        offset = 0
+        while True:
+            entries = self.request_json('/addresses/{}/proofs?offset={}&limit={}'.format(
+                self.address.hex(), offset, MAX_PROOFS_PER_REQUEST)).get("transactions", [])
+            for entry in entries:
+                location = self.check_proof(entry)
+                if location is None:
+                    continue
+                transaction = location[2]
+                if self.address not in (transaction.sender_address, transaction.recipient_address):
+                    raise SyncError("Node {} sent a transaction of another address".format(self.node))
+                transactions[(location[0], transaction.hash_transaction().digest())] = location
+            if len(entries) < MAX_PROOFS_PER_REQUEST:
+                break
+            offset += len(entries)
+        self.transactions = transactions
+        return sorted(transactions.values(), key=lambda location: location[:2])
+
+    def verify_transaction(self, txid: bytes):
+        """
+        Checks if a transaction was mined, e.g. a payment to another address. Call sync_headers first
+        to count the confirmations of the latest blocks
+        :param txid: Raw hash of the transaction
+        :return: Number of confirmations, which is 1 if the transaction is part of the last block,
+        or 0 if the transaction is not part of the header chain
+        :rtype: int
+        :raises SyncError: If the node can not be reached or sent invalid data
+        """
+        entry = self.request_json('/transactions/{}/proof'.format(txid.hex()), allow_missing=True)
+        if entry is None:
+            return 0
+        location = self.check_proof(entry)
+        if location is None or location[2].hash_transaction().digest() != txid:
+            return 0
+        return self.get_confirmations(location[0])
+
+    def get_confirmations(self, height: int):
+        """
+        :param height: Height of a block of the header chain
+        :return: Number of blocks from the height up to the tip
+        :rtype: int
+        """
+        return len(self.header_chain) - height
+
+    def get_balance(self):
+        """
+        Books the proven transactions of the client. Call update_transactions first to get the latest balance
+        :return: Balance of the client
+        :rtype: int
+        """
+        state = AccountState()
+        for _, _, transaction in self.transactions.values():
+            state.apply_transaction(transaction)
+        return state.get_balance(self.address)
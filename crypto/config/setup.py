@@ -1,8 +1,74 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 from crypto.blockchain.blockchain import Blockchain
+from crypto.blockchain.mining_service import MiningService
+from crypto.client.key_provider import FileKeyProvider
+from crypto.monitoring.metrics import MetricsRegistry
+from crypto.monitoring.profiler import SamplingProfiler
+from crypto.network.peers import PeerRegistry
+from crypto.network.sync import ChainSynchronizer
+from crypto.storage.block_store import BlockStore
+from crypto.storage.chain_index import ChainIndex
+from crypto.storage.snapshot import SnapshotStore
 from flask import Flask, request
 
-# TODO Means that every node init it own blockchain
-BLOCKCHAIN = Blockchain()
+# Directory of the persistent blocks. Without a directory the blocks are only kept in memory
+DATA_DIR = os.environ.get('BLOCKCHAIN_DATA_DIR')
+
+# Timers and counters of the hot paths, exposed by the /metrics endpoint. BLOCKCHAIN_METRICS=0 disables them
+METRICS = MetricsRegistry(enabled=os.environ.get('BLOCKCHAIN_METRICS', '1') != '0')
+
+# Samples the stacks of the node while it is started by the /profiler/start/ endpoint or BLOCKCHAIN_PROFILER=1
+PROFILER = SamplingProfiler()
+METRICS.gauge('profiler_samples', "Stack samples of the sampling profiler", lambda: PROFILER.samples)
+
+BLOCK_STORE = BlockStore(DATA_DIR) if DATA_DIR else None
+
+# Balances of the chain every Blockchain.SNAPSHOT_INTERVAL blocks. A restarted node starts from the newest snapshot
+# of its blocks and only replays the blocks above it
+SNAPSHOTS = SnapshotStore(os.path.join(DATA_DIR, 'snapshots')) if DATA_DIR else None
+
+# A node without DATA_DIR may only keep the transactions of the newest blocks, e.g. BLOCKCHAIN_PRUNE_DEPTH=1000
+PRUNE_DEPTH = int(os.environ['BLOCKCHAIN_PRUNE_DEPTH']) if os.environ.get('BLOCKCHAIN_PRUNE_DEPTH') else None
+
+# Keys of the initial user, the supply user and the miner. They are generated on the first start and kept in DATA_DIR,
+# so a restarted node still owns the supply address of its genesis block and can spend its mining rewards
+NODE_KEYS = FileKeyProvider([os.path.join(DATA_DIR, 'keys', name + '.pem') for name in ('init', 'supply', 'miner')],
+                            generate_missing=True) if DATA_DIR else None
+
+# Every node creates its own genesis block. The nodes converge on the chain with the most work, see SYNCHRONIZER
+BLOCKCHAIN = Blockchain(block_store=BLOCK_STORE,
+                        key_provider=NODE_KEYS,
+                        chain_index=ChainIndex(os.path.join(DATA_DIR, 'chain.idx')) if DATA_DIR else None,
+                        metrics=METRICS,
+                        snapshot=SNAPSHOTS.find(BLOCK_STORE) if DATA_DIR else None,
+                        snapshot_store=SNAPSHOTS,
+                        prune_depth=PRUNE_DEPTH,
+                        checkpoint_path=os.path.join(DATA_DIR, 'validation.json') if DATA_DIR else None)
+
+# Mines the opened transactions in the background. Is started by main.py or the /mining/start/ endpoint
+MINING_SERVICE = MiningService(BLOCKCHAIN)
+
+# Known nodes, e.g. BLOCKCHAIN_PEERS=http://127.0.0.1:5001,http://127.0.0.1:5002
+PEERS = PeerRegistry()
+for peer_url in filter(None, os.environ.get('BLOCKCHAIN_PEERS', '').split(',')):
+    PEERS.add(peer_url)
+
+# Switches to the chain of the peer with the most work. Is started by main.py or the /sync/ endpoint syncs once
+SYNCHRONIZER = ChainSynchronizer(BLOCKCHAIN, PEERS)
+
+# Trusted peer whose snapshot main.py loads before the first synchronization, so a new node without DATA_DIR
+# does not download and replay all blocks, e.g. BLOCKCHAIN_BOOTSTRAP_PEER=http://127.0.0.1:5001
+BOOTSTRAP_PEER = os.environ.get('BLOCKCHAIN_BOOTSTRAP_PEER')
+
+# Pool for the signature verification of submitted transactions, so the request handling is not blocked
+VERIFICATION_EXECUTOR = ThreadPoolExecutor(max_workers=os.cpu_count())
+
+# A node does not start with damaged or manipulated stored blocks. The checkpoint in DATA_DIR remembers
+# the validated height, so a restart only validates the blocks which were added since the last validation
+if DATA_DIR and not BLOCKCHAIN.validate_chain(VERIFICATION_EXECUTOR):
+    raise ValueError("The stored block at height {} is invalid: {}".format(*BLOCKCHAIN.chain_validator.error))
 
 # Flask setup
 NODE = Flask(__name__)
@@ -1,19 +1,18 @@
-from crypto.blockchain.transaction import Transaction
-from crypto.client.client import Client
-from crypto.config.setup import BLOCKCHAIN, NODE
+import os
 
-if __name__ == '__main__':
-    blockchain = BLOCKCHAIN
-    NODE.run()
-
-    sender = Client()
-    receiver = Client()
-    test_transaction = Transaction(sender.public_key, receiver.public_key, 100)
-    test_transaction.sign_transaction(sender.private_key)
-    test_transaction.verify_transaction()
+from crypto.config.setup import BOOTSTRAP_PEER, MINING_SERVICE, NODE, PROFILER, SYNCHRONIZER
 
-    blockchain.add_new_transaction(test_transaction)
-    blockchain.mine_block()
-
-    balance_sender = blockchain.get_balance_for_address(sender.public_key)
-    print(balance_sender)
+if __name__ == '__main__':
+    if os.environ.get('BLOCKCHAIN_PROFILER') == '1':
+        PROFILER.start()
+    if BOOTSTRAP_PEER:
+        SYNCHRONIZER.bootstrap(BOOTSTRAP_PEER)
+    # The blocks are mined and synchronized in the background, so the node handles requests meanwhile
+    MINING_SERVICE.start()
+    SYNCHRONIZER.start()
+    try:
+        NODE.run()
+    finally:
+        SYNCHRONIZER.stop()
+        MINING_SERVICE.stop()
+        PROFILER.stop()
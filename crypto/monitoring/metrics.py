@@ -0,0 +1,205 @@
+import bisect
+import threading
+import time
+
+# Upper bounds of the histogram buckets in seconds, from 10 microseconds to 10 seconds
+DEFAULT_BUCKETS = (0.00001, 0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+
+def _format_value(value: float):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+
+    def __init__(self, name: str, documentation: str, enabled: bool = True):
+        """
+        :param name: Name in the exposition format, e.g. blockchain_blocks_total
+        :param documentation: Description which is exposed as HELP line
+        :param enabled: Disabled metrics ignore all updates
+        """
+        self.name = name
+        self.documentation = documentation
+        self.enabled = enabled
+        self._lock = threading.Lock()
+
+    def render(self):
+        """
+        :return: Lines of the metric in the Prometheus text format
+        :rtype: [str]
+        """
+        return ["# HELP {} {}".format(self.name, self.documentation),
+                "# TYPE {} {}".format(self.name, self.TYPE)] + self.samples()
+
+
+class Counter(Metric):
+    TYPE = 'counter'
+
+    def __init__(self, name: str, documentation: str, enabled: bool = True):
+        super().__init__(name, documentation, enabled)
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.value += amount
+
+    def samples(self):
+        return ["{} {}".format(self.name, _format_value(self.value))]
+
+
+class Gauge(Metric):
+    TYPE = 'gauge'
+
+    def __init__(self, name: str, documentation: str, enabled: bool = True, function=None):
+        """
+        :param function: Optional function which returns the current value when the metric is rendered,
+        e.g. the size of the mempool. Then the hot paths do not have to update the gauge
+        """
+        super().__init__(name, documentation, enabled)
+        self.value = 0
+        self.function = function
+
+    def set(self, value: float):
+        if self.enabled:
+            self.value = value
+
+    def samples(self):
+        value = self.function() if self.function is not None else self.value
+        return ["{} {}".format(self.name, _format_value(value))]
+
+
+class Timer:
+
+    def __init__(self, histogram):
+        """
+        Observes the seconds between entering and leaving a with block
+        """
+        self.histogram = histogram
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class _DisabledTimer:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+# Timers of disabled histograms do not measure anything, so one instance is shared
+DISABLED_TIMER = _DisabledTimer()
+
+
+class Histogram(Metric):
+    TYPE = 'histogram'
+
+    def __init__(self, name: str, documentation: str, enabled: bool = True, buckets=DEFAULT_BUCKETS):
+        """
+        :param buckets: Sorted upper bounds of the buckets. The +Inf bucket is added
+        """
+        super().__init__(name, documentation, enabled)
+        self.buckets = tuple(buckets)
+        # Number of observations per bucket, the last entry counts the observations above all bounds
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        if not self.enabled:
+            return
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[position] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        """
+        :return: Context manager which observes the duration of a with block
+        """
+        if not self.enabled:
+            return DISABLED_TIMER
+        return Timer(self)
+
+    def samples(self):
+        with self._lock:
+            counts = list(self.counts)
+            total, count = self.sum, self.count
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += bucket_count
+            lines.append('{}_bucket{{le="{}"}} {}'.format(self.name, _format_value(bound), cumulative))
+        lines.append("{}_sum {}".format(self.name, _format_value(total)))
+        lines.append("{}_count {}".format(self.name, count))
+        return lines
+
+
+class MetricsRegistry:
+
+    def __init__(self, enabled: bool = True):
+        """
+        Collects the metrics of a node and renders them in the Prometheus text format.
+        The metrics are created once and updated on the hot paths. A disabled registry hands out
+        disabled metrics, so the instrumentation only costs a method call which returns immediately.
+        :param enabled: False to ignore all updates, e.g. in tests and benchmarks
+        """
+        self.enabled = enabled
+        self.metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric_class, name: str, documentation: str, **arguments):
+        with self._lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = metric_class(name, documentation, self.enabled, **arguments)
+                self.metrics[name] = metric
+            elif not isinstance(metric, metric_class):
+                raise ValueError("Metric {} is already registered as {}".format(name, metric.TYPE))
+            return metric
+
+    def counter(self, name: str, documentation: str):
+        """
+        :return: The counter with the name. It is created if it does not exist yet
+        :rtype: Counter
+        """
+        return self._register(Counter, name, documentation)
+
+    def gauge(self, name: str, documentation: str, function=None):
+        """
+        :param function: Optional function which returns the current value, see Gauge.
+        Replaces the function of an existing gauge, e.g. of a replaced service
+        :rtype: Gauge
+        """
+        gauge = self._register(Gauge, name, documentation)
+        if function is not None:
+            gauge.function = function
+        return gauge
+
+    def histogram(self, name: str, documentation: str, buckets=DEFAULT_BUCKETS):
+        """
+        :rtype: Histogram
+        """
+        return self._register(Histogram, name, documentation, buckets=buckets)
+
+    def render(self):
+        """
+        :return: All metrics in the Prometheus text exposition format
+        :rtype: str
+        """
+        with self._lock:
+            metrics = sorted(self.metrics.values(), key=lambda metric: metric.name)
+        return "".join(line + "\n" for metric in metrics for line in metric.render())
@@ -0,0 +1,82 @@
+import sys
+import threading
+from collections import Counter
+
+
+class SamplingProfiler:
+
+    def __init__(self, interval: float = 0.01, max_depth: int = 64):
+        """
+        Samples the stacks of all threads of the node in an interval. Unlike a tracing profiler it does not slow
+        down the sampled code, so it can be switched on in a running node. It is off until it is started.
+        The result is in the collapsed stack format, which flame graph tools read.
+        :param interval: Seconds between two samples
+        :param max_depth: Maximum number of frames of a sampled stack
+        """
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = 0
+        self.stacks = Counter()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """
+        Starts sampling on a background thread if it is not running yet
+        """
+        if self.is_running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if not self._thread.is_alive():
+                self._thread = None
+
+    def reset(self):
+        with self._lock:
+            self.samples = 0
+            self.stacks = Counter()
+
+    def _run(self):
+        own_thread = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            self.sample(ignored_thread=own_thread)
+
+    def sample(self, ignored_thread: int = None):
+        """
+        Records the current stack of every thread
+        :param ignored_thread: Identifier of a thread which is not sampled, e.g. the sampling thread
+        """
+        stacks = []
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == ignored_thread:
+                continue
+            names = []
+            while frame is not None and len(names) < self.max_depth:
+                code = frame.f_code
+                names.append("{}:{}".format(code.co_filename, code.co_name))
+                frame = frame.f_back
+            stacks.append(";".join(reversed(names)))
+        with self._lock:
+            self.samples += 1
+            self.stacks.update(stacks)
+
+    def report(self, limit: int = None):
+        """
+        :param limit: Maximum number of stacks, starting with the most frequent stack
+        :return: One line per stack with the frames from the outermost to the innermost and the number of samples
+        :rtype: str
+        """
+        with self._lock:
+            stacks = self.stacks.most_common(limit)
+        return "".join("{} {}\n".format(stack, count) for stack, count in stacks)
@@ -0,0 +1,84 @@
+"""
+Starts a cluster of local nodes to test the synchronization.
+The first node mines, the other nodes sync with their peers until all nodes have the same last block.
+
+Run with: python -m crypto.network.cluster --nodes 3 --blocks 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from crypto.network.connection_pool import ConnectionPool
+
+
+def start_node(port: int, peers: [str]):
+    environment = dict(os.environ, BLOCKCHAIN_PEERS=','.join(peers))
+    return subprocess.Popen([sys.executable, '-m', 'crypto.api.async_server', '127.0.0.1', str(port)],
+                            env=environment)
+
+
+def request_json(pool: ConnectionPool, peer: str, method: str, path: str):
+    status, data = pool.request(peer, method, path)
+    return json.loads(data)
+
+
+def wait_until_ready(pool: ConnectionPool, peer: str, timeout: float = 30.0):
+    end = time.perf_counter() + timeout
+    while True:
+        try:
+            return request_json(pool, peer, 'GET', '/status/')
+        except OSError:
+            if time.perf_counter() > end:
+                raise
+            time.sleep(0.2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--nodes', type=int, default=3)
+    parser.add_argument('--base-port', type=int, default=5100)
+    parser.add_argument('--blocks', type=int, default=5, help='Blocks which are mined by the first node')
+    parser.add_argument('--timeout', type=float, default=60.0)
+    args = parser.parse_args()
+
+    urls = ['http://127.0.0.1:{}'.format(args.base_port + number) for number in range(args.nodes)]
+    processes = [start_node(args.base_port + number, [url for url in urls if url != urls[number]])
+                 for number in range(args.nodes)]
+    pool = ConnectionPool()
+    try:
+        for url in urls:
+            wait_until_ready(pool, url)
+        # The first block is empty, afterwards every block contains the reward of its predecessor
+        pool.request(urls[0], 'POST', '/mining/start/', json.dumps({"empty_blocks": True}),
+                     {'Content-Type': 'application/json'})
+        end = time.perf_counter() + args.timeout
+        while request_json(pool, urls[0], 'GET', '/status/')["height"] < args.blocks:
+            if time.perf_counter() > end:
+                raise TimeoutError("The first node did not mine {} blocks".format(args.blocks))
+            time.sleep(0.2)
+        request_json(pool, urls[0], 'POST', '/mining/stop/')
+
+        start = time.perf_counter()
+        for url in urls[1:]:
+            request_json(pool, url, 'POST', '/sync/')
+        elapsed = time.perf_counter() - start
+
+        statuses = [request_json(pool, url, 'GET', '/status/') for url in urls]
+        for url, status in zip(urls, statuses):
+            print("{}: height {} hash {}".format(url, status["height"], status["hash"]))
+        print("Synchronized {} nodes in {:.2f}s".format(args.nodes - 1, elapsed))
+        if len({status["hash"] for status in statuses}) != 1:
+            sys.exit("The nodes did not converge")
+    finally:
+        pool.close()
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+import http.client
+import threading
+from urllib.parse import urlparse
+
+
+class ConnectionPool:
+
+    def __init__(self, max_idle_per_peer: int = 4, timeout: float = 10.0):
+        """
+        Keeps HTTP connections to the peers open, so a sync does not open a new connection for every request.
+        Every connection is only used by one thread at a time.
+        :param max_idle_per_peer: Maximum number of idle connections which are kept per peer
+        :param timeout: Timeout of a request in seconds
+        """
+        self.max_idle_per_peer = max_idle_per_peer
+        self.timeout = timeout
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def _acquire(self, peer: str):
+        with self._lock:
+            connections = self._idle.get(peer)
+            if connections:
+                return connections.pop()
+        parsed_url = urlparse(peer)
+        return http.client.HTTPConnection(parsed_url.hostname, parsed_url.port, timeout=self.timeout)
+
+    def _release(self, peer: str, connection: http.client.HTTPConnection):
+        with self._lock:
+            connections = self._idle.setdefault(peer, [])
+            if len(connections) < self.max_idle_per_peer:
+                connections.append(connection)
+                return
+        connection.close()
+
+    def request(self, peer: str, method: str, path: str, body: bytes = None, headers: dict = None):
+        """
+        Sends a request to a peer over a pooled connection
+        :param peer: URL of the peer
+        :param method: HTTP method
+        :param path: Path including the query
+        :param body: Optional request body
+        :param headers: Optional request headers
+        :return: Status code and body of the response
+        :rtype: (int, bytes)
+        :raises OSError: If the peer can not be reached
+        :raises http.client.HTTPException: If the response is invalid
+        """
+        connection = self._acquire(peer)
+        try:
+            connection.request(method, path, body=body, headers=headers or {})
+            response = connection.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            raise
+        if response.will_close:
+            connection.close()
+        else:
+            self._release(peer, connection)
+        return response.status, data
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
@@ -0,0 +1,74 @@
+import threading
+from urllib.parse import urlparse
+
+
+def normalize_peer_url(url: str):
+    """
+    :param url: Address of a node, e.g. http://127.0.0.1:5001/
+    :return: URL without a trailing slash
+    :rtype: str
+    :raises ValueError: If the URL is not an http URL with a host
+    """
+    parsed_url = urlparse(url)
+    if parsed_url.scheme != 'http' or not parsed_url.hostname:
+        raise ValueError("Invalid peer URL {}".format(url))
+    return 'http://{}'.format(parsed_url.netloc)
+
+
+class PeerRegistry:
+
+    def __init__(self, max_peers: int = 64, max_failures: int = 3):
+        """
+        Known nodes of the network. Peers which fail repeatedly are removed.
+        :param max_peers: Maximum number of registered peers
+        :param max_failures: Number of consecutive failed requests after which a peer is removed
+        """
+        self.max_peers = max_peers
+        self.max_failures = max_failures
+        self.failures = {}
+        self._lock = threading.Lock()
+
+    def add(self, url: str):
+        """
+        Registers a peer
+        :param url: Address of the node
+        :return: True if the peer was added, False if it is already known or the registry is full
+        :raises ValueError: If the URL is invalid
+        """
+        url = normalize_peer_url(url)
+        with self._lock:
+            if url in self.failures or len(self.failures) >= self.max_peers:
+                return False
+            self.failures[url] = 0
+            return True
+
+    def remove(self, url: str):
+        with self._lock:
+            self.failures.pop(url, None)
+
+    def record_success(self, url: str):
+        with self._lock:
+            if url in self.failures:
+                self.failures[url] = 0
+
+    def record_failure(self, url: str):
+        """
+        Counts a failed request and removes the peer after too many consecutive failures
+        """
+        with self._lock:
+            if url not in self.failures:
+                return
+            self.failures[url] += 1
+            if self.failures[url] >= self.max_failures:
+                del self.failures[url]
+
+    def __contains__(self, url: str):
+        return url in self.failures
+
+    def __len__(self):
+        return len(self.failures)
+
+    def __iter__(self):
+        with self._lock:
+            peers = list(self.failures)
+        return iter(peers)
@@ -0,0 +1,299 @@
+import http.client
+import json
+import struct
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+
+from crypto.blockchain.block import GENESIS_PREVIOUS_HASH
+from crypto.blockchain.chain_view import ChainView
+from crypto.blockchain.codec import decode_blocks, decode_headers
+from crypto.blockchain.header_chain import validate_headers
+from crypto.network.connection_pool import ConnectionPool
+from crypto.network.peers import PeerRegistry
+from crypto.storage.snapshot import StateSnapshot
+
+# Maximum number of headers which a node returns for one request
+MAX_HEADERS_PER_REQUEST = 2000
+
+
+class SyncError(Exception):
+    """
+    A peer did not answer or sent invalid data
+    """
+
+
+class ChainSynchronizer:
+
+    def __init__(self, blockchain, peers: PeerRegistry, connection_pool: ConnectionPool = None,
+                 executor: Executor = None, blocks_per_request: int = 100, validation_executor: Executor = None):
+        """
+        Synchronizes the blockchain with the chain of the peer with the most work.
+        The headers are downloaded first and their proof of work, references and difficulties are checked,
+        before the blocks of the branch are downloaded in parallel from all peers with the same chain.
+        :param blockchain: Local blockchain
+        :param peers: Known peers
+        :param connection_pool: Pool of the HTTP connections to the peers
+        :param executor: Thread pool for the parallel block downloads.
+        Without an executor a thread pool with two threads per peer is used
+        :param blocks_per_request: Number of blocks which are downloaded with one request
+        :param validation_executor: Pool for the validation of the downloaded blocks,
+        see Blockchain.replace_chain
+        """
+        self.blockchain = blockchain
+        self.peers = peers
+        self.connection_pool = connection_pool or ConnectionPool()
+        self.executor = executor
+        self.blocks_per_request = blocks_per_request
+        self.validation_executor = validation_executor
+        self._stop_event = threading.Event()
+        self._thread = None
+        # Last unexpected error of the background synchronization, which keeps running after it
+        self.last_error = None
+
+    def request(self, peer: str, path: str):
+        """
+        :return: Body of a successful GET request to the peer
+        :rtype: bytes
+        :raises SyncError: If the peer can not be reached or the request failed
+        """
+        try:
+            status, data = self.connection_pool.request(peer, 'GET', path)
+        except (OSError, http.client.HTTPException) as error:
+            self.peers.record_failure(peer)
+            raise SyncError("Peer {} is not reachable: {}".format(peer, error))
+        if status != 200:
+            self.peers.record_failure(peer)
+            raise SyncError("Peer {} answered {} with status {}".format(peer, path, status))
+        self.peers.record_success(peer)
+        return data
+
+    def get_status(self, peer: str):
+        """
+        :return: Height, hash of the last block and total work of the chain of the peer
+        :rtype: dict
+        :raises SyncError: If the peer can not be reached or sent an invalid status
+        """
+        try:
+            status = json.loads(self.request(peer, '/status/'))
+        except ValueError as error:
+            raise SyncError("Invalid status of peer {}: {}".format(peer, error))
+        if not isinstance(status, dict):
+            raise SyncError("Invalid status of peer {}: not an object".format(peer))
+        for field, field_type in (("height", int), ("work", int), ("hash", str)):
+            # bool is a subclass of int but no valid number here
+            if not isinstance(status.get(field), field_type) or isinstance(status.get(field), bool):
+                raise SyncError("Invalid status of peer {}: {} is missing or invalid".format(peer, field))
+        return status
+
+    def fetch_headers(self, peer: str, from_height: int, limit: int = MAX_HEADERS_PER_REQUEST):
+        """
+        :return: Headers of the chain of the peer starting at the height
+        :rtype: [BlockHeader]
+        """
+        data = self.request(peer, '/headers/?from_height={}&limit={}'.format(from_height, limit))
+        try:
+            return decode_headers(data)
+        except (ValueError, struct.error) as error:
+            raise SyncError("Invalid headers of peer {}: {}".format(peer, error))
+
+    def fetch_snapshot(self, peer: str):
+        """
+        :return: Balances after the last block of the peer
+        :rtype: StateSnapshot
+        """
+        data = self.request(peer, '/snapshot/')
+        try:
+            return StateSnapshot.decode(data)
+        except (ValueError, struct.error) as error:
+            raise SyncError("Invalid snapshot of peer {}: {}".format(peer, error))
+
+    def bootstrap(self, peer: str):
+        """
+        Starts the local chain from a snapshot of a peer instead of replaying the chain from the genesis block.
+        Only the headers up to the snapshot are downloaded and checked, the balances of the snapshot are trusted.
+        The blocks above the snapshot are synchronized as usual afterwards.
+        :param peer: URL of a trusted peer
+        :return: True if the local chain was replaced, False if it already has more work
+        :raises SyncError: If the peer can not be reached or sent invalid data
+        """
+        snapshot = self.fetch_snapshot(peer)
+        headers = []
+        while len(headers) <= snapshot.height:
+            next_headers = self.fetch_headers(peer, len(headers),
+                                              min(MAX_HEADERS_PER_REQUEST, snapshot.height + 1 - len(headers)))
+            if len(next_headers) == 0:
+                raise SyncError("Peer {} has no headers up to its snapshot".format(peer))
+            headers.extend(next_headers)
+        if len(headers) != snapshot.height + 1 or headers[-1].hash != snapshot.block_hash:
+            raise SyncError("The snapshot of peer {} does not belong to its headers".format(peer))
+        reason = self.validate_headers(0, headers)
+        if reason is not None:
+            self.peers.remove(peer)
+            raise SyncError("Peer {} sent invalid headers: {}".format(peer, reason))
+        if self.blockchain.get_branch_work(0, headers) <= self.blockchain.total_work:
+            return False
+        self.blockchain.load_snapshot(snapshot, headers)
+        return True
+
+    def find_fork_height(self, peer: str):
+        """
+        Finds the first height at which the chain of the peer differs from the local chain.
+        Steps back exponentially from the local tip, so only a few requests are needed for a short fork.
+        :return: Fork height and the first headers of the peer starting at the fork height
+        :rtype: (int, [BlockHeader])
+        """
+        height = len(self.blockchain.blocks)
+        step = 1
+        while True:
+            headers = self.fetch_headers(peer, height)
+            # A reorganization may shorten the local chain while the headers are downloaded
+            with self.blockchain.lock.read():
+                blocks = self.blockchain.blocks
+                if height > len(blocks):
+                    height = len(blocks)
+                    continue
+                previous_hash = GENESIS_PREVIOUS_HASH if height == 0 else blocks[height - 1].hash
+                if len(headers) > 0 and headers[0].previous_hash == previous_hash:
+                    # Skips the headers which are equal to the local blocks
+                    common = 0
+                    while common < len(headers) and height + common < len(blocks) and \
+                            headers[common].hash == blocks[height + common].hash:
+                        common += 1
+                    return height + common, headers[common:]
+            if height == 0:
+                raise SyncError("Peer {} has no chain which starts with a genesis block".format(peer))
+            height = max(0, height - step)
+            step *= 2
+
+    def download_headers(self, peer: str, peer_height: int):
+        """
+        Downloads all headers of the peer above the fork height
+        :param peer: URL of the peer
+        :param peer_height: Height of the last block of the peer
+        :return: Fork height and the headers of the branch of the peer
+        :rtype: (int, [BlockHeader])
+        """
+        fork_height, headers = self.find_fork_height(peer)
+        while fork_height + len(headers) <= peer_height:
+            next_headers = self.fetch_headers(peer, fork_height + len(headers))
+            if len(next_headers) == 0:
+                break
+            headers.extend(next_headers)
+        return fork_height, headers
+
+    def validate_headers(self, fork_height: int, headers):
+        """
+        Checks the references, proof of work and difficulties of the headers of a branch.
+        The transactions are checked after the blocks are downloaded.
+        :return: None if the headers are valid otherwise the reason
+        :rtype: str
+        """
+        return validate_headers(ChainView(self.blockchain.blocks, fork_height, headers), fork_height,
+                                self.blockchain.get_expected_difficulty)
+
+    def download_blocks(self, sources: [str], headers):
+        """
+        Downloads the blocks of the headers in ranges, which are distributed over the peers.
+        If a peer fails, its range is downloaded from the next peer.
+        :param sources: Peers which have the blocks of the headers
+        :param headers: Validated headers of the blocks
+        :return: Blocks of the headers
+        :rtype: [Block]
+        """
+        ranges = [(start, min(start + self.blocks_per_request, len(headers)))
+                  for start in range(0, len(headers), self.blocks_per_request)]
+
+        def download_range(range_number: int):
+            start, end = ranges[range_number]
+            errors = []
+            for attempt in range(len(sources)):
+                peer = sources[(range_number + attempt) % len(sources)]
+                try:
+                    data = self.request(peer, '/getBlocks/?from_height={}&limit={}&format=binary'.format(
+                        headers[start].index, end - start))
+                    blocks = decode_blocks(data)
+                except SyncError as error:
+                    errors.append(str(error))
+                    continue
+                except (ValueError, TypeError, struct.error) as error:
+                    errors.append("Invalid blocks of peer {}: {}".format(peer, error))
+                    continue
+                if [block.hash for block in blocks] == [header.hash for header in headers[start:end]]:
+                    return blocks
+                errors.append("Peer {} sent blocks which do not match the headers".format(peer))
+            raise SyncError("; ".join(errors))
+
+        if self.executor is not None:
+            results = self.executor.map(download_range, range(len(ranges)))
+            return [block for blocks in results for block in blocks]
+        with ThreadPoolExecutor(max_workers=2 * len(sources)) as executor:
+            results = executor.map(download_range, range(len(ranges)))
+            return [block for blocks in results for block in blocks]
+
+    def sync(self):
+        """
+        Switches to the chain of the peer with the most work if it has more work than the local chain.
+        Peers with invalid chains are removed.
+        :return: True if the local chain was replaced or extended
+        """
+        statuses = {}
+        for peer in self.peers:
+            try:
+                statuses[peer] = self.get_status(peer)
+            except SyncError:
+                continue
+
+        local_work = self.blockchain.total_work
+        candidates = sorted((peer for peer in statuses if statuses[peer]["work"] > local_work),
+                            key=lambda candidate: statuses[candidate]["work"], reverse=True)
+        for peer in candidates:
+            status = statuses[peer]
+            try:
+                fork_height, headers = self.download_headers(peer, status["height"])
+                if len(headers) == 0 or self.blockchain.get_branch_work(fork_height, headers) <= local_work:
+                    continue
+                reason = self.validate_headers(fork_height, headers)
+                if reason is not None:
+                    self.peers.remove(peer)
+                    continue
+                # Every peer with the same last block has all blocks of the branch
+                sources = [peer] + [other for other in candidates
+                                    if other != peer and statuses[other]["hash"] == status["hash"]]
+                blocks = self.download_blocks(sources, headers)
+            except SyncError:
+                continue
+            if self.blockchain.replace_chain(blocks, self.validation_executor):
+                return True
+        return False
+
+    @property
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: float = 5.0):
+        """
+        Synchronizes periodically on a background thread
+        :param interval: Seconds between two synchronizations
+        """
+        if self.is_running:
+            return
+        self._stop_event.clear()
+
+        def run():
+            while not self._stop_event.is_set():
+                try:
+                    self.sync()
+                except Exception as error:
+                    # A single failed synchronization must not stop the following ones
+                    self.last_error = error
+                self._stop_event.wait(interval)
+
+        self._thread = threading.Thread(target=run, name="chain-synchronizer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if not self._thread.is_alive():
+                self._thread = None
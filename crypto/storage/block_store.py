@@ -0,0 +1,199 @@
+import mmap
+import os
+import struct
+import threading
+from collections import OrderedDict
+
+from crypto.blockchain.block import Block
+from crypto.blockchain.codec import decode_block, encode_block, header_fields, header_from_fields
+
+# offset in the segment file, length of the encoded block, followed by the header of the block:
+# index, previous hash, merkle root, difficulty, nonce, hash, timestamp
+INDEX_ENTRY = struct.Struct('<QIQ32s32sQQ32sq')
+
+SEGMENT_FILE = 'blocks.dat'
+INDEX_FILE = 'blocks.idx'
+
+
+class BlockStore:
+
+    def __init__(self, directory: str, cache_size: int = 128):
+        """
+        Append-only storage of the blocks of a blockchain.
+        The encoded blocks are appended to a segment file. An index file contains the position
+        and the fixed-size header of every block, so only the index has to be read when a node restarts.
+        Blocks are decoded on demand from a memory map of the segment file.
+        Can be used as the block list of a blockchain.
+        :param directory: Directory of the segment and the index file
+        :param cache_size: Number of decoded blocks which are kept in memory
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.cache_size = cache_size
+        self.positions = []
+        self.heights_by_hash = {}
+        # Index entries of all blocks, the headers are unpacked on demand
+        self._entries = bytearray()
+        self._cache = OrderedDict()
+        # The blockchain lets several readers in at once, so the cache, the map and the index are guarded here.
+        # Decoding needs the GIL anyway, so it is done while holding the lock and a map is never closed under a reader
+        self._lock = threading.Lock()
+        self._segment_path = os.path.join(directory, SEGMENT_FILE)
+        self._index_path = os.path.join(directory, INDEX_FILE)
+        self._map = None
+        self._load_index()
+        self._segment = open(self._segment_path, 'ab')
+        self._index = open(self._index_path, 'ab')
+
+    def _load_index(self):
+        """
+        Reads the index file. Entries of a partially written block are dropped
+        """
+        segment_size = os.path.getsize(self._segment_path) if os.path.exists(self._segment_path) else 0
+        data = b''
+        if os.path.exists(self._index_path):
+            with open(self._index_path, 'rb') as file:
+                data = file.read()
+
+        for entry_offset in range(0, len(data) - INDEX_ENTRY.size + 1, INDEX_ENTRY.size):
+            offset, length, *fields = INDEX_ENTRY.unpack_from(data, entry_offset)
+            if offset + length > segment_size:
+                break
+            self.heights_by_hash[fields[5].hex()] = len(self.positions)
+            self.positions.append((offset, length))
+        self._entries = bytearray(data[:len(self.positions) * INDEX_ENTRY.size])
+
+        # Removes everything which was written after the last complete block
+        end_of_blocks = sum(self.positions[-1]) if self.positions else 0
+        if os.path.exists(self._segment_path) and segment_size > end_of_blocks:
+            os.truncate(self._segment_path, end_of_blocks)
+        if len(data) > len(self.positions) * INDEX_ENTRY.size:
+            os.truncate(self._index_path, len(self.positions) * INDEX_ENTRY.size)
+
+    def append(self, block: Block):
+        """
+        Appends a block to the segment file and its position to the index file
+        :param block: Block with the next height
+        """
+        data = encode_block(block)
+        entry_fields = header_fields(block)
+        with self._lock:
+            offset = sum(self.positions[-1]) if self.positions else 0
+            self._segment.write(data)
+            self._segment.flush()
+            entry = INDEX_ENTRY.pack(offset, len(data), *entry_fields)
+            self._index.write(entry)
+            self._index.flush()
+            self._entries += entry
+            self.heights_by_hash[block.hash] = len(self.positions)
+            self.positions.append((offset, len(data)))
+            self._add_to_cache(len(self.positions) - 1, block)
+
+    def truncate(self, height: int):
+        """
+        Removes all blocks from the height on, e.g. when the blockchain switches to another branch
+        :param height: Height of the first removed block
+        """
+        with self._lock:
+            if height >= len(self.positions):
+                return
+            offset = self.positions[height][0]
+            for removed_height in range(height, len(self.positions)):
+                self._cache.pop(removed_height, None)
+            self.heights_by_hash = {block_hash: block_height
+                                    for block_hash, block_height in self.heights_by_hash.items()
+                                    if block_height < height}
+            del self.positions[height:]
+            del self._entries[height * INDEX_ENTRY.size:]
+            # The map must not reach behind the end of the truncated file
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._segment.flush()
+            self._index.flush()
+            os.truncate(self._segment_path, offset)
+            os.truncate(self._index_path, height * INDEX_ENTRY.size)
+
+    def _get_map(self, end: int):
+        """
+        Has to be called with the lock
+        :param end: Position in the segment file which has to be mapped
+        :return: Memory map which contains at least the segment file up to end
+        """
+        if self._map is None or len(self._map) < end:
+            if self._map is not None:
+                self._map.close()
+            with open(self._segment_path, 'rb') as file:
+                self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def _add_to_cache(self, height: int, block: Block):
+        self._cache[height] = block
+        self._cache.move_to_end(height)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def get_block(self, height: int):
+        """
+        :param height: Height of the block
+        :return: Block at the height, decoded from the segment file if it is not cached
+        :rtype: Block
+        """
+        with self._lock:
+            return self._get_block(height)
+
+    def _get_block(self, height: int):
+        block = self._cache.get(height)
+        if block is not None:
+            self._cache.move_to_end(height)
+            return block
+        offset, length = self.positions[height]
+        block = decode_block(self._get_map(offset + length), offset)
+        self._add_to_cache(height, block)
+        return block
+
+    def get_header(self, height: int):
+        """
+        :param height: Height of the block
+        :return: Header of the block from the index, without decoding the block
+        :rtype: BlockHeader
+        """
+        with self._lock:
+            fields = INDEX_ENTRY.unpack_from(self._entries, height * INDEX_ENTRY.size)[2:]
+        return header_from_fields(*fields)
+
+    def get_block_by_hash(self, block_hash: str):
+        """
+        :param block_hash: Hash of the block in hex
+        :return: Block with the hash or None if the block is not stored
+        :rtype: Block
+        """
+        with self._lock:
+            height = self.heights_by_hash.get(block_hash)
+            if height is None:
+                return None
+            return self._get_block(height)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self.get_block(height) for height in range(*item.indices(len(self)))]
+        if item < 0:
+            item += len(self)
+        if item < 0 or item >= len(self):
+            raise IndexError("Block height out of range")
+        return self.get_block(item)
+
+    def __iter__(self):
+        for height in range(len(self)):
+            yield self.get_block(height)
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._segment.close()
+            self._index.close()
@@ -0,0 +1,157 @@
+import os
+import struct
+
+# height, hash of the block, number of transactions
+BLOCK_RECORD = struct.Struct('<Q32sI')
+# transaction id, address of the sender, address of the recipient
+TRANSACTION_RECORD = struct.Struct('<32s32s32s')
+
+
+class ChainIndex:
+
+    def __init__(self, path: str = None):
+        """
+        Lookup tables of the main chain: block hash to height, transaction id to (height, position)
+        and address to the positions of all of its transactions.
+        The index is updated when a block is appended or removed, so it never has to scan the chain.
+        :param path: Optional file which persists the index, e.g. next to the files of a BlockStore.
+        The file is append-only and is truncated when blocks are removed
+        """
+        self.path = path
+        self.heights_by_hash = {}
+        self.transactions = {}
+        self.history = {}
+        # Hash of every indexed block and the position of its record in the file
+        self.hashes = []
+        self._offsets = []
+        self._end = 0
+        self._file = None
+        if path is not None:
+            self._load()
+            self._file = open(path, 'ab')
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def _load(self):
+        """
+        Reads the records of the index file. Records of a partially written block are dropped
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as file:
+            data = file.read()
+        offset = 0
+        while offset + BLOCK_RECORD.size <= len(data):
+            height, block_hash, transaction_count = BLOCK_RECORD.unpack_from(data, offset)
+            end = offset + BLOCK_RECORD.size + transaction_count * TRANSACTION_RECORD.size
+            if end > len(data) or height != len(self.hashes):
+                break
+            records = TRANSACTION_RECORD.iter_unpack(data[offset + BLOCK_RECORD.size:end])
+            self._index_block(block_hash.hex(), list(records), offset)
+            offset = end
+        self._end = offset
+        if offset < len(data):
+            os.truncate(self.path, offset)
+
+    def _index_block(self, block_hash: str, records: [tuple], offset: int):
+        height = len(self.hashes)
+        self.hashes.append(block_hash)
+        self._offsets.append(offset)
+        self.heights_by_hash[block_hash] = height
+        for position, (txid, sender, recipient) in enumerate(records):
+            self.transactions[txid] = (height, position)
+            self.history.setdefault(sender, []).append((height, position))
+            if recipient != sender:
+                self.history.setdefault(recipient, []).append((height, position))
+
+    def add_block(self, block):
+        """
+        Indexes a block which was appended to the main chain
+        :param block: Block with the next height. The header of a pruned block is indexed without transactions
+        """
+        transactions = getattr(block, 'transactions', ())
+        records = [(tx.hash_transaction().digest(), tx.sender_address, tx.recipient_address) for tx in transactions]
+        data = BLOCK_RECORD.pack(block.index, bytes.fromhex(block.hash), len(records)) + \
+            b''.join(TRANSACTION_RECORD.pack(*record) for record in records)
+        if self._file is not None:
+            self._file.write(data)
+            self._file.flush()
+        self._index_block(block.hash, records, self._end)
+        self._end += len(data)
+
+    def add_transactions(self, transactions: dict):
+        """
+        Adds the positions of transactions whose blocks are only known as headers, e.g. from a snapshot,
+        so these transactions can not be replayed. They are kept in memory and not written to the index file
+        :param transactions: Transaction id to (height, position)
+        """
+        for txid, position in transactions.items():
+            self.transactions.setdefault(txid, position)
+
+    def truncate(self, height: int, removed_blocks=None):
+        """
+        Removes the blocks from the height on, e.g. when the blocks are replaced by another branch
+        :param height: Height of the first removed block
+        :param removed_blocks: The removed blocks, so only their entries are touched.
+        Without the blocks all entries are checked
+        """
+        if height >= len(self.hashes):
+            return
+        for block_hash in self.hashes[height:]:
+            del self.heights_by_hash[block_hash]
+        if removed_blocks is None:
+            txids = [txid for txid, (tx_height, _) in self.transactions.items() if tx_height >= height]
+            addresses = list(self.history)
+        else:
+            txids = [tx.hash_transaction().digest() for block in removed_blocks for tx in block.transactions]
+            addresses = {address for block in removed_blocks for tx in block.transactions
+                         for address in (tx.sender_address, tx.recipient_address)}
+        for txid in txids:
+            if self.transactions.get(txid, (-1, 0))[0] >= height:
+                del self.transactions[txid]
+        for address in addresses:
+            entries = self.history.get(address, [])
+            # The entries of an address are sorted, so the removed entries are at the end
+            while entries and entries[-1][0] >= height:
+                entries.pop()
+            if not entries:
+                self.history.pop(address, None)
+        self._end = self._offsets[height]
+        if self._file is not None:
+            self._file.flush()
+            os.truncate(self.path, self._end)
+        del self.hashes[height:]
+        del self._offsets[height:]
+
+    def get_height(self, block_hash: str):
+        """
+        :return: Height of the block with the hash or None if it is not part of the main chain
+        :rtype: int
+        """
+        return self.heights_by_hash.get(block_hash)
+
+    def get_transaction_position(self, txid: bytes):
+        """
+        :param txid: Raw hash of the transaction
+        :return: Height of the block and position in the block or None if the transaction is unknown
+        :rtype: (int, int)
+        """
+        return self.transactions.get(txid)
+
+    def get_history(self, address: bytes, offset: int = 0, limit: int = None):
+        """
+        :param address: Address of the account, see Address
+        :param offset: Number of skipped entries, starting with the oldest transaction
+        :param limit: Maximum number of entries
+        :return: Height and position of the transactions which were sent or received by the address
+        :rtype: [(int, int)]
+        """
+        entries = self.history.get(address, [])
+        end = len(entries) if limit is None else offset + limit
+        return entries[offset:end]
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,171 @@
+import hashlib
+import os
+import struct
+
+from crypto.blockchain.account_state import AccountState
+from crypto.blockchain.address import Address
+
+SNAPSHOT_MAGIC = b'SNAP'
+SNAPSHOT_VERSION = 2
+# magic, version, height, hash of the block, fee collector, number of balances, number of transactions
+SNAPSHOT_HEADER = struct.Struct('<4sHQ32s32sII')
+# address, balance
+BALANCE_RECORD = struct.Struct('<32sq')
+# transaction id, height of the block, position in the block
+TRANSACTION_RECORD = struct.Struct('<32sQI')
+# The snapshot ends with the SHA256 digest of all bytes in front of it, so a torn write is detected
+CHECKSUM_SIZE = 32
+
+SNAPSHOT_PREFIX = 'snapshot-'
+SNAPSHOT_SUFFIX = '.dat'
+
+
+class StateSnapshot:
+
+    def __init__(self, height: int, block_hash: str, balances: dict, fee_collector: Address,
+                 transactions: dict = None):
+        """
+        Confirmed balances of all addresses after a block of the main chain.
+        A node which loads a snapshot only has to replay the blocks above the height.
+        :param height: Height of the last booked block
+        :param block_hash: Hash of the last booked block in hex
+        :param balances: Balance of every address with a balance other than zero
+        :param fee_collector: Address which collects the transaction fees of the chain
+        :param transactions: Transaction id to (height, position) of every booked transaction,
+        so a node which only knows the headers still rejects a replayed transaction
+        """
+        self.height = height
+        self.block_hash = block_hash
+        self.balances = balances
+        self.fee_collector = fee_collector
+        self.transactions = {} if transactions is None else transactions
+
+    @classmethod
+    def from_account_state(cls, height: int, block_hash: str, account_state: AccountState,
+                           transactions: dict = None):
+        """
+        :return: Snapshot of the confirmed balances. The balances and transactions are copied,
+        so the state may change afterwards
+        :rtype: StateSnapshot
+        """
+        return cls(height, block_hash, dict(account_state.balances), account_state.fee_collector,
+                   dict(transactions or {}))
+
+    def to_account_state(self):
+        """
+        :return: New account state with the balances of the snapshot and without pending transactions
+        :rtype: AccountState
+        """
+        state = AccountState(self.fee_collector)
+        state.balances = dict(self.balances)
+        return state
+
+    def encode(self):
+        """
+        :return: Binary encoding of the snapshot with a trailing checksum
+        :rtype: bytes
+        """
+        parts = [SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, self.height, bytes.fromhex(self.block_hash),
+                                      self.fee_collector, len(self.balances), len(self.transactions))]
+        parts.extend(BALANCE_RECORD.pack(address, balance) for address, balance in self.balances.items())
+        parts.extend(TRANSACTION_RECORD.pack(txid, height, position)
+                     for txid, (height, position) in self.transactions.items())
+        data = b''.join(parts)
+        return data + hashlib.sha256(data).digest()
+
+    @classmethod
+    def decode(cls, data: bytes):
+        """
+        :param data: Snapshot created by encode
+        :return: Decoded snapshot
+        :rtype: StateSnapshot
+        :raises ValueError: If the data is not a complete snapshot
+        """
+        if len(data) < SNAPSHOT_HEADER.size + CHECKSUM_SIZE:
+            raise ValueError("The snapshot is truncated")
+        body = memoryview(data)[:-CHECKSUM_SIZE]
+        if hashlib.sha256(body).digest() != data[-CHECKSUM_SIZE:]:
+            raise ValueError("The checksum of the snapshot does not match")
+        magic, version, height, block_hash, fee_collector, count, transaction_count = \
+            SNAPSHOT_HEADER.unpack_from(body)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise ValueError("Unsupported snapshot format")
+        transactions_offset = SNAPSHOT_HEADER.size + count * BALANCE_RECORD.size
+        if len(body) != transactions_offset + transaction_count * TRANSACTION_RECORD.size:
+            raise ValueError("The number of records does not match the size of the snapshot")
+        balances = {Address(address): balance
+                    for address, balance in BALANCE_RECORD.iter_unpack(body[SNAPSHOT_HEADER.size:transactions_offset])}
+        transactions = {txid: (tx_height, position)
+                        for txid, tx_height, position in TRANSACTION_RECORD.iter_unpack(body[transactions_offset:])}
+        return cls(height, block_hash.hex(), balances, Address(fee_collector), transactions)
+
+
+class SnapshotStore:
+
+    def __init__(self, directory: str, keep: int = 2):
+        """
+        Directory of state snapshots, one file per height.
+        A snapshot is written to a temporary file first and then renamed, so a crash never leaves a
+        partial snapshot behind.
+        :param directory: Directory of the snapshot files
+        :param keep: Number of snapshots which are kept. Older snapshots are deleted when a new one is saved
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.keep = keep
+
+    def path(self, height: int):
+        return os.path.join(self.directory, "{}{:012d}{}".format(SNAPSHOT_PREFIX, height, SNAPSHOT_SUFFIX))
+
+    def heights(self):
+        """
+        :return: Heights of the stored snapshots in ascending order
+        :rtype: [int]
+        """
+        heights = []
+        for name in os.listdir(self.directory):
+            if name.startswith(SNAPSHOT_PREFIX) and name.endswith(SNAPSHOT_SUFFIX):
+                number = name[len(SNAPSHOT_PREFIX):-len(SNAPSHOT_SUFFIX)]
+                if number.isdigit():
+                    heights.append(int(number))
+        return sorted(heights)
+
+    def save(self, snapshot: StateSnapshot):
+        path = self.path(snapshot.height)
+        temporary_path = path + '.tmp'
+        with open(temporary_path, 'wb') as file:
+            file.write(snapshot.encode())
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, path)
+        for height in self.heights()[:-self.keep]:
+            os.remove(self.path(height))
+
+    def load(self, height: int):
+        """
+        :return: Snapshot at the height
+        :rtype: StateSnapshot
+        :raises ValueError: If the snapshot file is damaged
+        """
+        with open(self.path(height), 'rb') as file:
+            return StateSnapshot.decode(file.read())
+
+    def find(self, blocks):
+        """
+        Finds the newest snapshot of a block of the chain, e.g. to skip the replay of the blocks when a node restarts.
+        Snapshots of replaced blocks and damaged files are skipped.
+        :param blocks: Blocks or headers of the main chain. The headers of a BlockStore are read from its index
+        :return: The newest matching snapshot or None
+        :rtype: StateSnapshot
+        """
+        get_header = blocks.get_header if hasattr(blocks, 'get_header') else blocks.__getitem__
+        for height in reversed(self.heights()):
+            if height >= len(blocks):
+                continue
+            try:
+                snapshot = self.load(height)
+            except (OSError, ValueError, struct.error):
+                continue
+            if get_header(height).hash == snapshot.block_hash:
+                return snapshot
+        return None
@@ -0,0 +1,54 @@
+from unittest import TestCase
+
+from crypto.blockchain.address import Address
+from crypto.blockchain.blockchain import Blockchain
+from crypto.blockchain.codec import decode_transaction, encode_transaction
+from crypto.blockchain.transaction import Transaction
+from crypto.client.client import Client
+from crypto.client.key_provider import DeterministicKeyPool
+
+
+class TestAddress(TestCase):
+
+    def setUp(self):
+        self.keys = DeterministicKeyPool()
+        self.test_blockchain = Blockchain(key_provider=self.keys)
+        self.supply_user = self.test_blockchain.token.supply_user
+        self.test_user_1 = Client(self.keys)
+        self.transaction = Transaction(self.supply_user.public_key, self.test_user_1.public_key, 100)
+        self.transaction.sign_transaction(self.supply_user.private_key)
+
+    def test_address_has_fixed_size(self):
+        address = Address.from_key(self.test_user_1.public_key)
+
+        self.assertEqual(len(address), Address.SIZE)
+        self.assertEqual(address, Address.from_key(self.test_user_1.private_key))
+        self.assertEqual(Address.from_hex(address.hex()), address)
+        with self.assertRaises(ValueError):
+            Address(b'\x00' * 20)
+
+    def test_transaction_caches_addresses(self):
+        self.assertEqual(self.transaction.sender_address, Address.from_key(self.supply_user.public_key))
+        self.assertIs(self.transaction.recipient_address, self.transaction.recipient_address)
+
+    def test_transaction_has_no_attribute_dictionary(self):
+        self.assertFalse(hasattr(self.transaction, '__dict__'))
+        with self.assertRaises(AttributeError):
+            self.transaction.memo = "not a field"
+
+    def test_decoded_transactions_share_addresses(self):
+        data = encode_transaction(self.transaction)
+        first, _ = decode_transaction(data)
+        second, _ = decode_transaction(data)
+
+        self.assertIs(first.sender_address, second.sender_address)
+        self.assertIs(first.recipient_der, second.recipient_der)
+
+    def test_balance_by_address(self):
+        self.test_blockchain.add_new_transaction(self.transaction)
+        self.test_blockchain.mine_block()
+
+        address = Address.from_key(self.test_user_1.public_key)
+        self.assertEqual(self.test_blockchain.get_balance_for_address(address), 100)
+        self.assertEqual(self.test_blockchain.get_balance_for_address(self.test_user_1.public_key), 100)
+        self.assertEqual(len(self.test_blockchain.get_address_history(address)), 1)
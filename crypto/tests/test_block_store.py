@@ -0,0 +1,119 @@
+import os
+import tempfile
+import threading
+from unittest import TestCase
+
+from crypto.blockchain.blockchain import Blockchain
+from crypto.blockchain.codec import decode_block, encode_block
+from crypto.blockchain.transaction import Transaction
+from crypto.client.client import Client
+from crypto.client.key_provider import DeterministicKeyPool
+from crypto.storage.block_store import BlockStore, INDEX_FILE, SEGMENT_FILE
+
+
+class TestBlockStore(TestCase):
+
+    def setUp(self):
+        self.keys = DeterministicKeyPool()
+        self.directory = tempfile.mkdtemp()
+        self.store = BlockStore(self.directory)
+        self.test_blockchain = Blockchain(block_store=self.store, key_provider=self.keys)
+        supply_user = self.test_blockchain.token.supply_user
+        self.test_user_1 = Client(self.keys)
+        transaction = Transaction(supply_user.public_key, self.test_user_1.public_key, 100)
+        transaction.sign_transaction(supply_user.private_key)
+        self.test_blockchain.add_new_transaction(transaction)
+        self.test_blockchain.mine_block()
+        self.test_blockchain.mine_block()
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_block_round_trip(self):
+        block = self.test_blockchain.get_block_by_index(1)
+        decoded_block = decode_block(encode_block(block))
+
+        self.assertEqual(decoded_block.to_dict(), block.to_dict())
+        self.assertEqual(decoded_block.timestamp, block.timestamp)
+        self.assertEqual(decoded_block.transactions[0].signature, block.transactions[0].signature)
+        self.assertTrue(decoded_block.transactions[0].verify_transaction())
+        self.assertEqual(decoded_block.hash_block(), block.hash)
+
+    def test_restart_continues_chain(self):
+        last_hash = self.test_blockchain.get_last_block.hash
+        self.store.close()
+
+        self.store = BlockStore(self.directory, cache_size=0)
+        restarted_blockchain = Blockchain(block_store=self.store, key_provider=self.keys)
+
+        self.assertEqual(len(restarted_blockchain.blocks), 3)
+        self.assertEqual(restarted_blockchain.get_last_block.hash, last_hash)
+        self.assertEqual(self.store.get_block_by_hash(last_hash).index, 2)
+        self.assertEqual(restarted_blockchain.get_balance_for_address(self.test_user_1.public_key), 100)
+        self.assertTrue(restarted_blockchain.validate_chain())
+
+    def test_headers_are_read_from_index(self):
+        blocks = list(self.test_blockchain.blocks)
+        self.store.close()
+        self.store = BlockStore(self.directory, cache_size=0)
+
+        for height, block in enumerate(blocks):
+            header = self.store.get_header(height)
+            self.assertEqual(header.header_dict(), block.header_dict())
+            self.assertTrue(header.has_valid_proof_of_work())
+
+    def test_concurrent_readers_while_blocks_are_appended(self):
+        self.store.close()
+        self.store = BlockStore(self.directory, cache_size=2)
+        blockchain = Blockchain(block_store=self.store, key_provider=self.keys)
+        errors = []
+        done = threading.Event()
+
+        def read_blocks():
+            while not done.is_set():
+                try:
+                    blocks = blockchain.get_blocks(0, len(blockchain.blocks))
+                    for previous_block, block in zip(blocks, blocks[1:]):
+                        self.assertEqual(block.previous_hash, previous_block.hash)
+                except Exception as error:
+                    errors.append(error)
+                    return
+
+        readers = [threading.Thread(target=read_blocks) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+        for _ in range(30):
+            block = blockchain.create_candidate_block(allow_empty=True)
+            blockchain.proof_of_work(block)
+            blockchain.submit_block(block)
+        done.set()
+        for reader in readers:
+            reader.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(blockchain.blocks), 33)
+
+    def test_partially_written_block_is_dropped(self):
+        self.store.close()
+        with open(os.path.join(self.directory, SEGMENT_FILE), 'ab') as file:
+            file.write(b'\x01\x02\x03')
+        with open(os.path.join(self.directory, INDEX_FILE), 'ab') as file:
+            file.write(b'\x01\x02')
+
+        self.store = BlockStore(self.directory)
+
+        self.assertEqual(len(self.store), 3)
+        self.assertEqual(self.store[-1].index, 2)
+        self.assertEqual([block.index for block in self.store[0:2]], [0, 1])
+
+    def test_truncate_removes_blocks_from_height(self):
+        first_hash = self.store[1].hash
+        removed_hash = self.store[2].hash
+        self.store.truncate(2)
+
+        self.assertEqual(len(self.store), 2)
+        self.assertIsNone(self.store.get_block_by_hash(removed_hash))
+        self.store.close()
+        self.store = BlockStore(self.directory)
+        self.assertEqual(len(self.store), 2)
+        self.assertEqual(self.store.get_block_by_hash(first_hash).index, 1)
@@ -0,0 +1,51 @@
+from unittest import TestCase
+
+from crypto.blockchain.block import BlockHeader, GENESIS_PREVIOUS_HASH
+from crypto.blockchain.block_tree import BlockTree
+
+
+def create_header(parent, difficulty=1, merkle_root="ab"):
+    if parent is None:
+        return BlockHeader(0, GENESIS_PREVIOUS_HASH, merkle_root, 0, difficulty)
+    return BlockHeader(parent.index + 1, parent.hash, merkle_root, 0, difficulty)
+
+
+class TestBlockTree(TestCase):
+
+    def setUp(self):
+        self.tree = BlockTree(max_fork_depth=2)
+        self.main_chain = [create_header(None)]
+        for _ in range(3):
+            self.main_chain.append(create_header(self.main_chain[-1]))
+        for header in self.main_chain:
+            self.tree.add(header, True)
+
+    def test_cumulative_work(self):
+        side_header = create_header(self.main_chain[1], difficulty=5, merkle_root="cd")
+        node = self.tree.add(side_header)
+
+        self.assertEqual(self.tree.get(self.main_chain[-1].hash).cumulative_work, 4)
+        self.assertEqual(node.cumulative_work, 7)
+        self.assertFalse(node.on_main_chain)
+
+    def test_branch_of_side_tip(self):
+        side_1 = create_header(self.main_chain[1], merkle_root="cd")
+        side_2 = create_header(side_1, merkle_root="cd")
+        self.tree.add(side_1)
+        self.tree.add(side_2)
+
+        self.assertEqual(self.tree.get_branch(side_2.hash), (2, [side_1, side_2]))
+        self.assertEqual(self.tree.get_branch(self.main_chain[-1].hash), (4, []))
+
+    def test_prune_drops_deep_side_branches(self):
+        side_1 = create_header(self.main_chain[0], merkle_root="cd")
+        side_2 = create_header(side_1, merkle_root="cd")
+        recent_side = create_header(self.main_chain[2], merkle_root="ef")
+        for header in [side_1, side_2, recent_side]:
+            self.tree.add(header)
+
+        self.tree.prune(4)
+        self.assertNotIn(side_1.hash, self.tree)
+        # Descendants of a dropped block are dropped, too
+        self.assertNotIn(side_2.hash, self.tree)
+        self.assertIn(recent_side.hash, self.tree)
@@ -1,15 +1,22 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 from unittest import TestCase
 
+from crypto.blockchain.address import Address
 from crypto.blockchain.block import Block
 from crypto.blockchain.blockchain import Blockchain
+from crypto.blockchain.header_chain import HeaderChain
+from crypto.blockchain.merkle_tree import MerkleTree
 from crypto.blockchain.transaction import Transaction
 from crypto.client.client import Client
+from crypto.client.key_provider import DeterministicKeyPool
 
 
 class TestBlockchain(TestCase):
 
     def setUp(self):
-        self.test_blockchain = Blockchain()
+        self.keys = DeterministicKeyPool()
+        self.test_blockchain = Blockchain(key_provider=self.keys)
 
         # Test block
         self.test_block_index = 100
@@ -18,7 +25,7 @@ class TestBlockchain(TestCase):
 
         # Test transaction with signing
         self.supply_user = self.test_blockchain.token.supply_user
-        self.test_user_1 = Client()
+        self.test_user_1 = Client(self.keys)
         self.test_block_transaction = Transaction(self.supply_user.public_key, self.test_user_1.public_key, 100)
         self.test_block_transaction.sign_transaction(self.supply_user.private_key)
         self.test_block_transaction_list = [self.test_block_transaction]
@@ -34,14 +41,15 @@ class TestBlockchain(TestCase):
     def test_genesis_block_creation(self):
         last_block = self.test_blockchain.get_last_block
         token = self.test_blockchain.token
-        init_transaction = token.create_supply_transaction()
-        init_transaction_hash = self.test_blockchain.hash_transactions([init_transaction])
+        init_transaction_hash = self.test_blockchain.hash_transactions(last_block.transactions)
 
         self.assertEqual(last_block.index, 0)
         self.assertEqual(last_block.previous_hash, "0000000000000000000000000000000000000000000000000000000000000000")
         self.assertEqual(last_block.merkle_root, init_transaction_hash)
         self.assertEqual(len(last_block.transactions), 1)
         self.assertEqual(last_block.transactions[0].amount, 1000)
+        self.assertEqual(last_block.transactions[0].sender_address, Address.from_key(token.init_user.public_key))
+        self.assertEqual(last_block.transactions[0].recipient_address, Address.from_key(token.supply_user.public_key))
 
     def test_mine_block(self):
         self.test_blockchain.add_new_transaction(self.test_block_transaction)
@@ -69,6 +77,7 @@ class TestBlockchain(TestCase):
             self.test_block_transaction_list,
             proof_calc_nonce
         )
+        block_to_compare.timestamp = self.test_block.timestamp
 
         # If the hash of a block starts with '00' the nonce should not be changed
         nonce_block_to_compare = self.test_blockchain.proof_of_work(block_to_compare)
@@ -93,8 +102,8 @@ class TestBlockchain(TestCase):
         self.assertTrue(middle_block.timestamp > gen_block.timestamp)
 
         # second block after gensis
-        test_user_2 = Client()
-        new_transaction_1 = Transaction(self.test_user_1.public_key, test_user_2.public_key, 100)
+        test_user_2 = Client(self.keys)
+        new_transaction_1 = Transaction(self.test_user_1.public_key, test_user_2.public_key, 99)
         new_transaction_1.sign_transaction(self.test_user_1.private_key)
         new_transaction_2 = Transaction(self.test_user_1.public_key, test_user_2.public_key, 1)
         new_transaction_2.sign_transaction(self.test_user_1.private_key)
@@ -107,14 +116,15 @@ class TestBlockchain(TestCase):
         self.assertNotEqual(last_block.hash, middle_block_hash)
         self.assertEqual(last_block.previous_hash, middle_block_hash)
         self.assertEqual(len(last_block.transactions), 3)
+        self.assertEqual(last_block.merkle_root, self.test_blockchain.hash_transactions(last_block.transactions))
         self.assertEqual(len(self.test_blockchain.blocks), 3)
         self.assertTrue(last_block.timestamp > middle_block.timestamp)
 
     def test_balance_of_address(self):
         supply_user = self.test_blockchain.token.supply_user
-        test_user_1 = Client()
-        test_user_2 = Client()
-        test_user_3 = Client()
+        test_user_1 = Client(self.keys)
+        test_user_2 = Client(self.keys)
+        test_user_3 = Client(self.keys)
 
         new_transaction_0 = Transaction(supply_user.public_key, test_user_1.public_key, 200)
         new_transaction_0.sign_transaction(supply_user.private_key)
@@ -150,8 +160,8 @@ class TestBlockchain(TestCase):
         self.assertEqual(self.test_blockchain.get_balance_for_address(test_user_3.public_key), 30)
 
     def test_transaction_with_too_little_balance(self):
-        test_user_1 = Client()
-        test_user_2 = Client()
+        test_user_1 = Client(self.keys)
+        test_user_2 = Client(self.keys)
 
         new_transaction_1 = Transaction(test_user_1.public_key, test_user_2.public_key, 100)
         new_transaction_1.sign_transaction(test_user_1.private_key)
@@ -176,3 +186,362 @@ class TestBlockchain(TestCase):
 
         self.assertEqual(len(self.test_blockchain.blocks), 1)
         self.assertEqual(len(self.test_blockchain.open_transactions), 0)
+
+    def test_double_spend_in_open_transactions(self):
+        test_user_2 = Client(self.keys)
+        self.test_blockchain.add_new_transaction(self.test_block_transaction)
+        self.test_blockchain.mine_block()
+
+        new_transaction_1 = Transaction(self.test_user_1.public_key, test_user_2.public_key, 80)
+        new_transaction_1.sign_transaction(self.test_user_1.private_key)
+        new_transaction_2 = Transaction(self.test_user_1.public_key, test_user_2.public_key, 30)
+        new_transaction_2.sign_transaction(self.test_user_1.private_key)
+
+        self.assertTrue(self.test_blockchain.add_new_transaction(new_transaction_1))
+        # The balance is 100 but 80 are already spent by an opened transaction
+        self.assertFalse(self.test_blockchain.add_new_transaction(new_transaction_2))
+        self.assertEqual(len(self.test_blockchain.open_transactions), 2)
+        self.assertEqual(self.test_blockchain.get_balance_for_address(self.test_user_1.public_key), 100)
+
+        self.test_blockchain.mine_block()
+
+        self.assertEqual(self.test_blockchain.get_balance_for_address(self.test_user_1.public_key), 20)
+        self.assertEqual(self.test_blockchain.get_balance_for_address(test_user_2.public_key), 80)
+
+    def test_mined_transaction_can_not_be_replayed(self):
+        self.test_blockchain.add_new_transaction(self.test_block_transaction)
+        self.test_blockchain.mine_block()
+
+        self.assertFalse(self.test_blockchain.add_new_transaction(self.test_block_transaction))
+        self.assertEqual(len(self.test_blockchain.mempool), 0)
+
+    def test_transaction_with_negative_amount_is_rejected(self):
+        thief = Client(self.keys)
+        transaction = Transaction(thief.public_key, self.test_user_1.public_key, -500)
+        transaction.sign_transaction(thief.private_key)
+
+        self.assertFalse(self.test_blockchain.add_new_transaction(transaction))
+        self.assertEqual(self.test_blockchain.get_balance_for_address(self.test_user_1.public_key), 0)
+
+    def test_transaction_with_negative_fee_is_rejected(self):
+        transaction = Transaction(self.supply_user.public_key, self.test_user_1.public_key, 10, -50)
+        transaction.sign_transaction(self.supply_user.private_key)
+
+        self.assertFalse(self.test_blockchain.add_new_transaction(transaction))
+        self.assertEqual(len(self.test_blockchain.mempool), 0)
+
+    def test_identical_payment_can_be_made_again(self):
+        self.test_blockchain.add_new_transaction(self.test_block_transaction)
+        self.test_blockchain.mine_block()
+        second_payment = Transaction(self.supply_user.public_key, self.test_user_1.public_key, 100)
+        second_payment.sign_transaction(self.supply_user.private_key)
+
+        self.assertTrue(self.test_blockchain.add_new_transaction(second_payment))
+        self.test_blockchain.mine_block()
+        self.assertEqual(self.test_blockchain.get_balance_for_address(self.test_user_1.public_key), 200)
+
+    def test_rewards_have_own_txids(self):
+        self.test_blockchain.add_new_transaction(self.test_block_transaction)
+        for _ in range(4):
+            self.test_blockchain.mine_block()
+
+        for block in self.test_blockchain.blocks[2:]:
+            reward = block.transactions[0]
+            found_block, position = self.test_blockchain.get_transaction(reward.hash_transaction().digest())
+            self.assertEqual((found_block.hash, position), (block.hash, 0))
+
+    def test_account_state_matches_full_replay(self):
+        self.test_blockchain.add_new_transaction(self.test_block_transaction)
+        self.test_blockchain.mine_block()
+        self.test_blockchain.mine_block()
+
+        self.assertTrue(self.test_blockchain.verify_account_state())
+        rebuilt_state = self.test_blockchain.rebuild_account_state()
+        self.assertEqual(rebuilt_state.get_balance(self.test_user_1.public_key), 100)
+
+    def test_midstate_hash_equal_to_block_hash(self):
+        midstate = self.test_block.header_midstate()
+        for nonce in range(100):
+            self.test_block.nonce = nonce
+            self.assertEqual(Block.hash_nonce(midstate, nonce).hex(), self.test_block.hash_block())
+
+    def test_changed_timestamp_invalidates_proof_of_work(self):
+        self.test_blockchain.proof_of_work(self.test_block)
+        self.assertTrue(self.test_block.has_valid_proof_of_work())
+
+        self.test_block.timestamp += timedelta(hours=1)
+        self.assertFalse(self.test_block.has_valid_proof_of_work())
+
+    def test_block_with_invalid_proof_of_work_is_rejected(self):
+        last_block = self.test_blockchain.get_last_block
+        new_block = Block(1, last_block.hash, "ffabff123", [], 0)
+        self.test_blockchain.proof_of_work(new_block)
+        new_block.nonce += 1
+        new_block.hash = new_block.hash_block()
+        while new_block.has_valid_proof_of_work():
+            new_block.nonce += 1
+            new_block.hash = new_block.hash_block()
+
+        self.assertFalse(self.test_blockchain.add_block_to_chain(new_block))
+        self.assertEqual(len(self.test_blockchain.blocks), 1)
+
+    def test_block_with_wrong_difficulty_is_rejected(self):
+        last_block = self.test_blockchain.get_last_block
+        new_block = Block(1, last_block.hash, "ffabff123", [], 0, 1)
+        self.test_blockchain.proof_of_work(new_block)
+
+        self.assertFalse(self.test_blockchain.add_block_to_chain(new_block))
+        self.assertEqual(len(self.test_blockchain.blocks), 1)
+
+    def test_difficulty_retargeting(self):
+        blockchain = Blockchain(retarget_interval=3, target_block_time=10, key_provider=self.keys)
+        supply_user = blockchain.token.supply_user
+        new_transaction = Transaction(supply_user.public_key, self.test_user_1.public_key, 100)
+        new_transaction.sign_transaction(supply_user.private_key)
+        blockchain.add_new_transaction(new_transaction)
+        blockchain.mine_block()
+        blockchain.mine_block()
+        # Blocks were mined faster than the target block time
+        start = blockchain.blocks[0].timestamp
+        blockchain.blocks[1].timestamp = start + timedelta(seconds=5)
+        blockchain.blocks[2].timestamp = start + timedelta(seconds=10)
+
+        self.assertEqual(blockchain.get_next_difficulty(), 512)
+
+        # Blocks were mined much slower than the target block time, the adjustment is limited to 4
+        blockchain.blocks[2].timestamp = start + timedelta(seconds=1000)
+        self.assertEqual(blockchain.get_next_difficulty(), 64)
+
+        blockchain.blocks[2].timestamp = start + timedelta(seconds=10)
+        blockchain.mine_block()
+        new_block = blockchain.get_last_block
+        self.assertEqual(new_block.index, 3)
+        self.assertEqual(new_block.difficulty, 512)
+        self.assertTrue(new_block.has_valid_proof_of_work())
+        self.assertEqual(blockchain.get_next_difficulty(), 512)
+
+    def test_retarget_parameters_are_validated(self):
+        for arguments in [{"target_block_time": 0}, {"target_block_time": -1}, {"retarget_interval": 1}]:
+            with self.assertRaises(ValueError):
+                Blockchain(key_provider=self.keys, **arguments)
+            with self.assertRaises(ValueError):
+                HeaderChain(**arguments)
+
+    def test_block_dated_before_previous_block_is_rejected(self):
+        last_block = self.test_blockchain.get_last_block
+        block = Block(1, last_block.hash, self.test_blockchain.hash_transactions([self.test_block_transaction]),
+                      [self.test_block_transaction], 0, last_block.difficulty)
+        block.timestamp = last_block.timestamp - timedelta(seconds=1)
+        self.test_blockchain.proof_of_work(block)
+
+        self.assertFalse(self.test_blockchain.is_valid_next_block(block))
+        self.assertFalse(self.test_blockchain.add_block(block))
+        self.assertEqual(len(self.test_blockchain.blocks), 1)
+
+    def test_merkle_proof_of_mined_transaction(self):
+        self.test_blockchain.add_new_transaction(self.test_block_transaction)
+        self.test_blockchain.mine_block()
+        block = self.test_blockchain.get_last_block
+
+        self.assertEqual(block.merkle_root, self.test_blockchain.hash_transactions(block.transactions))
+        proof = self.test_blockchain.get_merkle_proof(block.index, 0)
+        self.assertTrue(MerkleTree.verify_proof(self.test_block_transaction.hash_transaction().digest(),
+                                                proof, block.merkle_root))
+
+    def test_add_new_transactions_in_batch(self):
+        test_user_2 = Client(self.keys)
+        supply_user = self.supply_user
+        valid_transaction = Transaction(supply_user.public_key, test_user_2.public_key, 600)
+        valid_transaction.sign_transaction(supply_user.private_key)
+        wrong_signed_transaction = Transaction(supply_user.public_key, test_user_2.public_key, 10)
+        wrong_signed_transaction.sign_transaction(test_user_2.private_key)
+        unsigned_transaction = Transaction(supply_user.public_key, test_user_2.public_key, 10)
+        # The balance of the supply user is not enough after the first transaction
+        too_expensive_transaction = Transaction(supply_user.public_key, test_user_2.public_key, 600)
+        too_expensive_transaction.sign_transaction(supply_user.private_key)
+
+        results = self.test_blockchain.add_new_transactions([valid_transaction,
+                                                             wrong_signed_transaction,
+                                                             unsigned_transaction,
+                                                             too_expensive_transaction,
+                                                             self.test_block_transaction])
+
+        self.assertEqual(results, [True, False, False, False, True])
+        self.assertEqual(self.test_blockchain.open_transactions, [valid_transaction, self.test_block_transaction])
+
+    def test_transactions_with_highest_fees_are_mined_first(self):
+        self.test_blockchain.MAX_BLOCK_TRANSACTIONS = 1
+        low_fee = Transaction(self.supply_user.public_key, self.test_user_1.public_key, 10, 1)
+        low_fee.sign_transaction(self.supply_user.private_key)
+        high_fee = Transaction(self.supply_user.public_key, self.test_user_1.public_key, 20, 5)
+        high_fee.sign_transaction(self.supply_user.private_key)
+        self.assertTrue(self.test_blockchain.add_new_transaction(low_fee))
+        self.assertTrue(self.test_blockchain.add_new_transaction(high_fee))
+
+        self.test_blockchain.mine_block()
+        self.assertEqual(self.test_blockchain.get_last_block.transactions, [high_fee])
+        # The reward pays out the fees of the block, the other transaction waits for the next block
+        reward = self.test_blockchain.open_transactions[0]
+        self.assertEqual(reward.amount, self.test_blockchain.MINING_REWARD + 5)
+        self.assertEqual(self.test_blockchain.open_transactions[1:], [low_fee])
+
+        self.test_blockchain.MAX_BLOCK_TRANSACTIONS = 2
+        self.test_blockchain.mine_block()
+        self.assertEqual(self.test_blockchain.get_last_block.transactions, [reward, low_fee])
+        miner_key = self.test_blockchain.miner.miner.public_key
+        self.assertEqual(self.test_blockchain.get_balance_for_address(miner_key), 6)
+        self.assertEqual(self.test_blockchain.get_balance_for_address(self.test_user_1.public_key), 30)
+        self.assertEqual(self.test_blockchain.get_balance_for_address(self.supply_user.public_key), 1000 - 30 - 6)
+        self.assertTrue(self.test_blockchain.verify_account_state())
+
+    def test_fee_counts_for_balance_check(self):
+        transaction = Transaction(self.supply_user.public_key, self.test_user_1.public_key, 1000, 1)
+        transaction.sign_transaction(self.supply_user.private_key)
+        self.assertFalse(self.test_blockchain.add_new_transaction(transaction))
+
+    def create_branch_block(self, parent, transactions):
+        block = Block(parent.index + 1, parent.hash, self.test_blockchain.hash_transactions(transactions),
+                      transactions, 0, parent.difficulty)
+        self.test_blockchain.proof_of_work(block)
+        return block
+
+    def create_fork(self):
+        self.test_blockchain.add_new_transaction(self.test_block_transaction)
+        self.test_blockchain.mine_block()
+        fork_block = self.test_blockchain.get_last_block
+        self.test_user_2 = Client(self.keys)
+        self.test_user_3 = Client(self.keys)
+        main_transaction = Transaction(self.test_user_1.public_key, self.test_user_3.public_key, 30)
+        main_transaction.sign_transaction(self.test_user_1.private_key)
+        self.test_blockchain.add_new_transaction(main_transaction)
+        self.test_blockchain.mine_block()
+        side_transactions = []
+        for amount in [20, 5]:
+            transaction = Transaction(self.test_user_1.public_key, self.test_user_2.public_key, amount)
+            transaction.sign_transaction(self.test_user_1.private_key)
+            side_transactions.append(transaction)
+        side_block_1 = self.create_branch_block(fork_block, side_transactions[:1])
+        side_block_2 = self.create_branch_block(side_block_1, side_transactions[1:])
+        return main_transaction, side_block_1, side_block_2
+
+    def test_block_with_forged_transaction_is_rejected_at_tip(self):
+        attacker = Client(self.keys)
+        forged_transaction = Transaction(self.supply_user.public_key, attacker.public_key, 900)
+        forged_transaction.sign_transaction(attacker.private_key)
+        block = self.create_branch_block(self.test_blockchain.get_last_block, [forged_transaction])
+
+        with ThreadPoolExecutor() as executor:
+            self.assertFalse(self.test_blockchain.add_block(block, executor))
+        self.assertEqual(len(self.test_blockchain.blocks), 1)
+        self.assertEqual(self.test_blockchain.get_balance_for_address(attacker.public_key), 0)
+
+    def test_block_with_wrong_merkle_root_is_rejected_at_tip(self):
+        block = self.create_branch_block(self.test_blockchain.get_last_block, [self.test_block_transaction])
+        block.transactions = []
+
+        self.assertFalse(self.test_blockchain.add_block(block))
+        self.assertEqual(len(self.test_blockchain.blocks), 1)
+
+    def test_valid_block_extends_tip(self):
+        block = self.create_branch_block(self.test_blockchain.get_last_block, [self.test_block_transaction])
+
+        self.assertTrue(self.test_blockchain.add_block(block))
+        self.assertEqual(self.test_blockchain.get_last_block.hash, block.hash)
+        self.assertEqual(self.test_blockchain.get_balance_for_address(self.test_user_1.public_key), 100)
+
+    def test_block_with_replayed_transaction_is_rejected(self):
+        self.test_blockchain.add_new_transaction(self.test_block_transaction)
+        self.test_blockchain.mine_block()
+        block = self.create_branch_block(self.test_blockchain.get_last_block, [self.test_block_transaction])
+
+        self.assertFalse(self.test_blockchain.add_block(block))
+        self.assertEqual(self.test_blockchain.get_balance_for_address(self.test_user_1.public_key), 100)
+
+    def test_block_which_overspends_is_rejected(self):
+        transaction = Transaction(self.test_user_1.public_key, Client(self.keys).public_key, 50)
+        transaction.sign_transaction(self.test_user_1.private_key)
+        block = self.create_branch_block(self.test_blockchain.get_last_block, [transaction])
+
+        self.assertFalse(self.test_blockchain.add_block(block))
+        self.assertEqual(len(self.test_blockchain.blocks), 1)
+
+    def test_branch_which_overspends_is_rejected(self):
+        _, side_block_1, _ = self.create_fork()
+        last_hash = self.test_blockchain.get_last_block.hash
+        transaction = Transaction(self.test_user_1.public_key, self.test_user_2.public_key, 90)
+        transaction.sign_transaction(self.test_user_1.private_key)
+        side_block_2 = self.create_branch_block(side_block_1, [transaction])
+
+        with ThreadPoolExecutor() as executor:
+            self.assertFalse(self.test_blockchain.replace_chain([side_block_1, side_block_2], executor))
+            self.assertTrue(self.test_blockchain.add_block(side_block_1, executor))
+            self.assertFalse(self.test_blockchain.add_block(side_block_2, executor))
+        self.assertEqual(self.test_blockchain.get_last_block.hash, last_hash)
+        self.assertTrue(self.test_blockchain.verify_account_state())
+
+    def test_supply_address_without_balance_only_pays_the_reward(self):
+        transaction = Transaction(self.supply_user.public_key, self.test_user_1.public_key,
+                                  self.test_blockchain.token.total_supply)
+        transaction.sign_transaction(self.supply_user.private_key)
+        block_1 = self.create_branch_block(self.test_blockchain.get_last_block, [transaction])
+        self.assertTrue(self.test_blockchain.add_block(block_1))
+
+        def reward(amount):
+            return self.test_blockchain.miner.create_mining_transaction(self.supply_user, amount)
+
+        payment = Transaction(self.test_user_1.public_key, Client(self.keys).public_key, 5)
+        payment.sign_transaction(self.test_user_1.private_key)
+        for transactions in [[reward(2)], [reward(1), reward(1)], [payment, reward(1)]]:
+            self.assertFalse(self.test_blockchain.add_block(self.create_branch_block(block_1, transactions)))
+        self.assertTrue(self.test_blockchain.add_block(self.create_branch_block(block_1, [reward(1)])))
+        self.assertEqual(self.test_blockchain.get_balance_for_address(self.supply_user.public_key), -1)
+
+    def test_side_branch_with_less_work_is_kept(self):
+        main_transaction, side_block_1, _ = self.create_fork()
+        last_hash = self.test_blockchain.get_last_block.hash
+        with ThreadPoolExecutor() as executor:
+            self.assertTrue(self.test_blockchain.add_block(side_block_1, executor))
+
+        self.assertEqual(self.test_blockchain.get_last_block.hash, last_hash)
+        self.assertIn(side_block_1.hash, self.test_blockchain.block_tree.side_blocks)
+        self.assertIsNone(self.test_blockchain.get_block_by_hash(side_block_1.hash))
+        self.assertEqual(self.test_blockchain.get_balance_for_address(self.test_user_3.public_key), 30)
+
+    def test_reorganization_to_branch_with_more_work(self):
+        main_transaction, side_block_1, side_block_2 = self.create_fork()
+        displaced_block = self.test_blockchain.get_last_block
+        with ThreadPoolExecutor() as executor:
+            self.test_blockchain.add_block(side_block_1, executor)
+            self.assertTrue(self.test_blockchain.add_block(side_block_2, executor))
+
+        self.assertEqual(self.test_blockchain.get_last_block.hash, side_block_2.hash)
+        self.assertEqual(len(self.test_blockchain.blocks), 4)
+        self.assertIn(displaced_block.hash, self.test_blockchain.block_tree.side_blocks)
+        self.assertEqual(self.test_blockchain.total_work,
+                         self.test_blockchain.block_tree.get(side_block_2.hash).cumulative_work)
+        # The balances were reverted and booked again only for the blocks above the fork
+        self.assertTrue(self.test_blockchain.verify_account_state())
+        self.assertEqual(self.test_blockchain.get_balance_for_address(self.test_user_2.public_key), 25)
+        self.assertEqual(self.test_blockchain.get_balance_for_address(self.test_user_3.public_key), 0)
+        # The displaced transaction is opened again, the reward of the displaced block is dropped
+        self.assertIn(main_transaction, self.test_blockchain.mempool)
+        self.assertEqual(self.test_blockchain.pending_rewards, [])
+        self.assertEqual(self.test_blockchain.account_state.get_available_balance(self.test_user_1.public_key), 45)
+        # The indexes only contain the blocks of the new branch
+        self.assertIsNone(self.test_blockchain.get_transaction(main_transaction.hash_transaction().digest()))
+        self.assertEqual(len(self.test_blockchain.get_address_history(self.test_user_2.public_key)), 2)
+
+        self.test_blockchain.mine_block()
+        self.assertEqual(self.test_blockchain.get_last_block.transactions, [main_transaction])
+        with ThreadPoolExecutor() as executor:
+            self.assertTrue(self.test_blockchain.validate_chain(executor))
+
+    def test_revert_block_restores_balances(self):
+        self.test_blockchain.add_new_transaction(self.test_block_transaction)
+        self.test_blockchain.mine_block()
+        balances = dict(self.test_blockchain.account_state.balances)
+        block = self.test_blockchain.get_last_block
+
+        self.test_blockchain.account_state.apply_block(block)
+        self.test_blockchain.account_state.revert_block(block)
+        self.assertEqual(self.test_blockchain.account_state.balances, balances)
@@ -0,0 +1,70 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from crypto.blockchain.account_state import address_of
+from crypto.blockchain.blockchain import Blockchain
+from crypto.blockchain.transaction import Transaction
+from crypto.client.client import Client
+from crypto.client.key_provider import DeterministicKeyPool
+from crypto.storage.block_store import BlockStore
+from crypto.storage.chain_index import ChainIndex
+
+
+class TestChainIndex(TestCase):
+
+    def setUp(self):
+        self.keys = DeterministicKeyPool()
+        self.directory = tempfile.mkdtemp()
+        self.index_path = os.path.join(self.directory, 'chain.idx')
+        self.store = BlockStore(self.directory)
+        self.index = ChainIndex(self.index_path)
+        self.test_blockchain = Blockchain(block_store=self.store, chain_index=self.index, key_provider=self.keys)
+        self.supply_user = self.test_blockchain.token.supply_user
+        self.test_user_1 = Client(self.keys)
+        self.transaction = Transaction(self.supply_user.public_key, self.test_user_1.public_key, 100)
+        self.transaction.sign_transaction(self.supply_user.private_key)
+        self.test_blockchain.add_new_transaction(self.transaction)
+        self.test_blockchain.mine_block()
+        self.test_blockchain.mine_block()
+
+    def tearDown(self):
+        self.index.close()
+        self.store.close()
+
+    def test_lookups(self):
+        block, position = self.test_blockchain.get_transaction(self.transaction.hash_transaction().digest())
+        self.assertEqual((block.index, position), (1, 0))
+        self.assertEqual(self.test_blockchain.get_block_by_hash(block.hash), block)
+        self.assertIsNone(self.test_blockchain.get_transaction(b'\0' * 32))
+
+        history = self.test_blockchain.get_address_history(self.test_user_1.public_key)
+        self.assertEqual([(height, position) for height, position, _ in history], [(1, 0)])
+        supply_history = self.test_blockchain.get_address_history(self.supply_user.public_key, offset=1, limit=1)
+        self.assertEqual([(height, position) for height, position, _ in supply_history], [(1, 0)])
+
+    def test_restart_loads_index_from_file(self):
+        self.index.close()
+        self.index = ChainIndex(self.index_path)
+
+        self.assertEqual(self.index.hashes, [block.hash for block in self.test_blockchain.blocks])
+        self.assertEqual(self.index.get_transaction_position(self.transaction.hash_transaction().digest()), (1, 0))
+
+    def test_missing_blocks_are_indexed_on_restart(self):
+        self.index.truncate(1)
+        self.index.close()
+        self.store.close()
+
+        self.store = BlockStore(self.directory)
+        self.index = ChainIndex(self.index_path)
+        self.assertEqual(len(self.index), 1)
+        restarted_blockchain = Blockchain(block_store=self.store, chain_index=self.index, key_provider=self.keys)
+        self.assertEqual(self.index.hashes, [block.hash for block in restarted_blockchain.blocks])
+
+    def test_truncate_removes_entries_of_removed_blocks(self):
+        removed_blocks = self.test_blockchain.blocks[1:]
+        self.index.truncate(1, removed_blocks)
+
+        self.assertIsNone(self.index.get_transaction_position(self.transaction.hash_transaction().digest()))
+        self.assertEqual(self.index.get_history(address_of(self.test_user_1.public_key)), [])
+        self.assertEqual(os.path.getsize(self.index_path), self.index._end)
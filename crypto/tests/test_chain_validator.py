@@ -0,0 +1,138 @@
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from unittest import TestCase
+
+from crypto.blockchain.block import Block
+from crypto.blockchain.blockchain import Blockchain
+from crypto.blockchain.chain_validator import ChainValidator
+from crypto.blockchain.header_chain import MAX_FUTURE_BLOCK_TIME, validate_headers
+from crypto.blockchain.transaction import Transaction
+from crypto.client.client import Client
+from crypto.client.key_provider import DeterministicKeyPool
+
+
+class TestChainValidator(TestCase):
+
+    def setUp(self):
+        self.keys = DeterministicKeyPool()
+        self.test_blockchain = Blockchain(key_provider=self.keys)
+        supply_user = self.test_blockchain.token.supply_user
+        self.test_user_1 = Client(self.keys)
+        for amount in [100, 50]:
+            transaction = Transaction(supply_user.public_key, self.test_user_1.public_key, amount)
+            transaction.sign_transaction(supply_user.private_key)
+            self.test_blockchain.add_new_transaction(transaction)
+            self.test_blockchain.mine_block()
+        self.executor = ThreadPoolExecutor(max_workers=2)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def append_block(self, transactions: [Transaction], timestamp: datetime = None):
+        """
+        Appends a block with a valid proof of work and merkle root but without any other checks
+        """
+        last_block = self.test_blockchain.get_last_block
+        block = Block(last_block.index + 1, last_block.hash, self.test_blockchain.hash_transactions(transactions),
+                      transactions, 0, self.test_blockchain.get_next_difficulty())
+        if timestamp is not None:
+            block.timestamp = timestamp
+        self.test_blockchain.proof_of_work(block)
+        self.test_blockchain.blocks.append(block)
+        return block
+
+    def signed_transaction(self, sender: Client, recipient: Client, amount: int, fee: int = 0):
+        transaction = Transaction(sender.public_key, recipient.public_key, amount, fee)
+        transaction.sign_transaction(sender.private_key)
+        return transaction
+
+    def test_valid_chain(self):
+        self.assertTrue(self.test_blockchain.validate_chain(self.executor))
+        self.assertEqual(self.test_blockchain.chain_validator.validated_height, 2)
+
+    def test_valid_chain_with_process_pool(self):
+        self.assertTrue(self.test_blockchain.validate_chain())
+
+    def test_wrong_previous_hash(self):
+        self.test_blockchain.blocks[2].previous_hash = "00ff"
+
+        self.assertFalse(self.test_blockchain.validate_chain(self.executor))
+        self.assertEqual(self.test_blockchain.chain_validator.error[0], 2)
+        # The blocks in front of the invalid block are still validated
+        self.assertEqual(self.test_blockchain.chain_validator.validated_height, 1)
+
+    def test_block_dated_before_previous_block(self):
+        self.append_block([], self.test_blockchain.get_last_block.timestamp - timedelta(seconds=1))
+
+        self.assertFalse(self.test_blockchain.validate_chain(self.executor))
+        self.assertEqual(self.test_blockchain.chain_validator.error,
+                         (3, "timestamp is earlier than the timestamp of the previous block"))
+        self.assertEqual(validate_headers(self.test_blockchain.blocks, 1, self.test_blockchain.get_expected_difficulty),
+                         "header 3: timestamp is earlier than the timestamp of the previous block")
+
+    def test_block_dated_far_in_the_future(self):
+        self.append_block([], datetime.now() + MAX_FUTURE_BLOCK_TIME + timedelta(minutes=1))
+
+        self.assertFalse(self.test_blockchain.validate_chain(self.executor))
+        self.assertEqual(self.test_blockchain.chain_validator.error, (3, "timestamp is too far in the future"))
+
+    def test_changed_transaction(self):
+        self.test_blockchain.blocks[1].transactions[0].amount = 1000
+
+        self.assertFalse(self.test_blockchain.validate_chain(self.executor))
+        self.assertEqual(self.test_blockchain.chain_validator.error,
+                         (1, "merkle root does not match the transactions"))
+
+    def test_invalid_signature(self):
+        block = self.test_blockchain.blocks[1]
+        block.transactions[0].sign_transaction(self.test_user_1.private_key)
+        # Remove the transaction from the verification cache of the blockchain
+        self.test_blockchain.verification_cache.entries.clear()
+
+        self.assertFalse(self.test_blockchain.validate_chain(self.executor))
+        self.assertEqual(self.test_blockchain.chain_validator.error[0], 1)
+
+    def test_negative_amount(self):
+        thief = Client(self.keys)
+        self.append_block([self.signed_transaction(thief, self.test_user_1, -500)])
+
+        self.assertFalse(self.test_blockchain.validate_chain(self.executor))
+        self.assertEqual(self.test_blockchain.chain_validator.error, (3, "transaction amount is not positive"))
+
+    def test_negative_fee(self):
+        self.append_block([self.signed_transaction(self.test_user_1, Client(self.keys), 10, -50)])
+
+        self.assertFalse(self.test_blockchain.validate_chain(self.executor))
+        self.assertEqual(self.test_blockchain.chain_validator.error, (3, "transaction fee is negative"))
+
+    def test_repeated_last_transaction(self):
+        transactions = [self.signed_transaction(self.test_user_1, Client(self.keys), amount) for amount in (1, 2, 3)]
+        self.append_block(transactions + transactions[-1:])
+
+        self.assertEqual(self.test_blockchain.get_last_block.merkle_root,
+                         self.test_blockchain.hash_transactions(transactions))
+        self.assertFalse(self.test_blockchain.validate_chain(self.executor))
+        self.assertEqual(self.test_blockchain.chain_validator.error, (3, "duplicate transaction"))
+
+    def test_resume_from_checkpoint(self):
+        checkpoint_path = os.path.join(tempfile.mkdtemp(), "checkpoint.json")
+        validator = ChainValidator(checkpoint_path)
+        blocks = self.test_blockchain.blocks
+        self.assertTrue(validator.validate(blocks[:2], executor=self.executor))
+
+        restarted_validator = ChainValidator(checkpoint_path)
+        self.assertEqual(restarted_validator.get_start_height(blocks), 2)
+        self.assertTrue(restarted_validator.validate(blocks, executor=self.executor))
+        self.assertEqual(restarted_validator.validated_height, 2)
+
+        # The checkpoint does not match a different chain
+        self.assertEqual(restarted_validator.get_start_height(Blockchain(key_provider=self.keys).blocks), 0)
+
+    def test_blockchain_keeps_checkpoint(self):
+        checkpoint_path = os.path.join(tempfile.mkdtemp(), "checkpoint.json")
+        blockchain = Blockchain(key_provider=self.keys, checkpoint_path=checkpoint_path)
+        self.assertTrue(blockchain.validate_chain(self.executor))
+
+        self.assertEqual(ChainValidator(checkpoint_path).validated_hash, blockchain.get_last_block.hash)
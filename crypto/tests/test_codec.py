@@ -0,0 +1,66 @@
+from unittest import TestCase
+
+from crypto.blockchain.blockchain import Blockchain
+from crypto.blockchain.codec import decode_blocks, decode_headers, decode_transaction, encode_blocks, encode_headers, \
+    encode_transaction
+from crypto.blockchain.encoding import TRANSACTION_BODY
+from crypto.blockchain.transaction import Transaction
+from crypto.client.client import Client
+from crypto.client.key_provider import DeterministicKeyPool
+
+
+class TestCodec(TestCase):
+
+    def setUp(self):
+        self.keys = DeterministicKeyPool()
+        self.test_blockchain = Blockchain(key_provider=self.keys)
+        self.supply_user = self.test_blockchain.token.supply_user
+        self.test_user_1 = Client(self.keys)
+        self.transaction = Transaction(self.supply_user.public_key, self.test_user_1.public_key, 100)
+        self.transaction.sign_transaction(self.supply_user.private_key)
+
+    def test_transaction_round_trip(self):
+        decoded_transaction, offset = decode_transaction(encode_transaction(self.transaction))
+
+        self.assertEqual(offset, len(encode_transaction(self.transaction)))
+        self.assertEqual(decoded_transaction.to_dict(), self.transaction.to_dict())
+        self.assertEqual(decoded_transaction.encoded_transaction(), self.transaction.encoded_transaction())
+        self.assertTrue(decoded_transaction.verify_transaction())
+
+    def test_signed_content_has_fixed_width(self):
+        self.assertEqual(len(self.transaction.encoded_transaction()), TRANSACTION_BODY.size)
+
+    def test_unsupported_version(self):
+        data = bytearray(encode_transaction(self.transaction))
+        data[0] = 0
+
+        with self.assertRaises(ValueError):
+            decode_transaction(data)
+
+    def test_blocks_round_trip(self):
+        self.test_blockchain.add_new_transaction(self.transaction)
+        self.test_blockchain.mine_block()
+        blocks = self.test_blockchain.blocks
+
+        decoded_blocks = decode_blocks(encode_blocks(blocks))
+
+        self.assertEqual([block.to_dict() for block in decoded_blocks], [block.to_dict() for block in blocks])
+        self.assertEqual(decoded_blocks[1].merkle_root, self.test_blockchain.hash_transactions(blocks[1].transactions))
+
+    def test_headers_round_trip(self):
+        self.test_blockchain.add_new_transaction(self.transaction)
+        self.test_blockchain.mine_block()
+        blocks = self.test_blockchain.blocks
+
+        headers = decode_headers(encode_headers(blocks))
+
+        self.assertEqual([header.header_dict() for header in headers], [block.header_dict() for block in blocks])
+        self.assertTrue(all(header.has_valid_proof_of_work() for header in headers))
+
+    def test_timestamp_out_of_range(self):
+        data = bytearray(encode_headers(self.test_blockchain.blocks))
+        # The timestamp is the last field of the header
+        data[-8:] = (2 ** 62).to_bytes(8, 'little')
+
+        with self.assertRaises(ValueError):
+            decode_headers(bytes(data))
@@ -0,0 +1,102 @@
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+from crypto.blockchain.account_state import address_of
+from crypto.blockchain.blockchain import Blockchain
+from crypto.blockchain.mining_service import MiningService
+from crypto.blockchain.transaction import Transaction
+from crypto.client.client import Client
+from crypto.client.key_provider import DeterministicKeyPool
+
+USERS = 4
+WRITERS = 4
+READERS = 3
+DURATION = 1.5
+
+
+class TestConcurrency(TestCase):
+
+    def setUp(self):
+        self.keys = DeterministicKeyPool()
+        # The difficulty stays the same, so the stress test is not slowed down by retargeting
+        self.blockchain = Blockchain(retarget_interval=1000, key_provider=self.keys)
+        self.users = [Client(self.keys) for _ in range(USERS)]
+        supply_user = self.blockchain.token.supply_user
+        for user in self.users:
+            transaction = Transaction(supply_user.public_key, user.public_key, 200)
+            transaction.sign_transaction(supply_user.private_key)
+            self.assertTrue(self.blockchain.add_new_transaction(transaction))
+        self.blockchain.mine_block()
+        self.stop_event = threading.Event()
+        self.errors = []
+        self.accepted = []
+        self.reads = 0
+
+    def run_thread(self, function):
+        def run():
+            try:
+                while not self.stop_event.is_set():
+                    function()
+            except Exception as error:
+                self.errors.append(error)
+                self.stop_event.set()
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def submit_transaction(self, generator: random.Random):
+        sender, recipient = generator.sample(self.users, 2)
+        transaction = Transaction(sender.public_key, recipient.public_key, generator.randint(1, 5),
+                                  generator.randint(0, 2))
+        transaction.sign_transaction(sender.private_key)
+        if self.blockchain.add_new_transaction(transaction):
+            self.accepted.append(transaction)
+
+    def check_invariants(self):
+        blockchain = self.blockchain
+        with blockchain.lock.read():
+            # Every transaction moves coins, so the balances always add up to zero
+            self.assertEqual(sum(blockchain.account_state.balances.values()), 0)
+            for user in self.users:
+                self.assertGreaterEqual(blockchain.account_state.get_available_balance(user.public_key), 0)
+            self.assertEqual(blockchain.blocks[-1].previous_hash, blockchain.blocks[-2].hash)
+            self.assertEqual(len(blockchain.chain_index), len(blockchain.blocks))
+            for transaction in blockchain.mempool.transactions:
+                self.assertIsNone(blockchain.chain_index.get_transaction_position(
+                    transaction.hash_transaction().digest()))
+        blocks = blockchain.get_blocks(0, len(blockchain.get_all_blocks))
+        for previous_block, block in zip(blocks, blocks[1:]):
+            self.assertEqual(block.previous_hash, previous_block.hash)
+        self.reads += 1
+
+    def test_invariants_hold_under_load(self):
+        mining_service = MiningService(self.blockchain, batch_size=200, refresh_interval=0.05)
+        threads = [self.run_thread(lambda generator=random.Random(seed): self.submit_transaction(generator))
+                   for seed in range(WRITERS)]
+        threads += [self.run_thread(self.check_invariants) for _ in range(READERS)]
+        mining_service.start()
+        self.stop_event.wait(DURATION)
+        self.stop_event.set()
+        mining_service.stop()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.errors, [])
+        self.assertGreater(self.reads, 0)
+        self.assertGreater(mining_service.blocks_mined, 0)
+        while len(self.blockchain.mempool) > 0:
+            self.blockchain.mine_block()
+        self.check_invariants()
+        self.assertTrue(self.blockchain.verify_account_state())
+        with ThreadPoolExecutor() as executor:
+            self.assertTrue(self.blockchain.validate_chain(executor))
+        # Every accepted transaction was mined exactly once
+        positions = {self.blockchain.get_transaction(tx.hash_transaction().digest())[0].index
+                     for tx in self.accepted}
+        self.assertNotIn(None, positions)
+        mined = sum(len(block.transactions) for block in self.blockchain.blocks[2:])
+        rewards = sum(1 for block in self.blockchain.blocks[2:] for tx in block.transactions
+                      if address_of(tx.recipient) == address_of(self.blockchain.miner.miner.public_key))
+        self.assertEqual(mined - rewards, len(self.accepted))
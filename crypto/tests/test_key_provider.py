@@ -0,0 +1,71 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from crypto.blockchain.blockchain import Blockchain
+from crypto.blockchain.transaction import Transaction
+from crypto.client.client import Client
+from crypto.client.key_provider import DeterministicKeyPool, FileKeyProvider
+from crypto.storage.block_store import BlockStore
+
+
+class TestKeyProvider(TestCase):
+
+    def test_pools_with_the_same_seed_hand_out_the_same_keys(self):
+        first_pool = DeterministicKeyPool()
+        second_pool = DeterministicKeyPool()
+
+        first_keys = [first_pool.next_key() for _ in range(3)]
+        second_keys = [second_pool.next_key() for _ in range(3)]
+        self.assertEqual(first_keys, second_keys)
+        self.assertEqual(len({key.n for key in first_keys}), 3)
+
+    def test_seeds_create_different_keys(self):
+        self.assertNotEqual(DeterministicKeyPool(seed=1).next_key(), DeterministicKeyPool(seed=2).next_key())
+
+    def test_client_uses_key_provider(self):
+        pool = DeterministicKeyPool()
+        client = Client(pool)
+
+        self.assertEqual(client.private_key, pool.get_key(0))
+        self.assertEqual(Client(private_key=client.private_key).public_key, client.public_key)
+
+    def test_file_key_provider(self):
+        path = os.path.join(tempfile.mkdtemp(), 'key.pem')
+        client = Client(DeterministicKeyPool())
+        client.save_key_to_file(path)
+        provider = FileKeyProvider([path])
+
+        self.assertEqual(Client(provider).private_key, client.private_key)
+        with self.assertRaises(LookupError):
+            provider.next_key()
+
+    def test_file_key_provider_generates_missing_keys(self):
+        path = os.path.join(tempfile.mkdtemp(), 'keys', 'key.pem')
+        key = FileKeyProvider([path], generate_missing=True).next_key()
+
+        self.assertEqual(FileKeyProvider([path]).next_key(), key)
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o600)
+
+    def test_restarted_node_keeps_its_keys(self):
+        directory = tempfile.mkdtemp()
+        paths = [os.path.join(directory, 'keys', name + '.pem') for name in ('init', 'supply', 'miner')]
+        blockchain = Blockchain(difficulty=1, block_store=BlockStore(os.path.join(directory, 'blocks')),
+                                key_provider=FileKeyProvider(paths, generate_missing=True))
+        supply_user = blockchain.token.supply_user
+        transaction = Transaction(supply_user.public_key, Client(DeterministicKeyPool()).public_key, 10)
+        transaction.sign_transaction(supply_user.private_key)
+        blockchain.add_new_transaction(transaction)
+        # The reward of the first block is part of the second block
+        blockchain.mine_block()
+        blockchain.mine_block()
+
+        restarted = Blockchain(difficulty=1, block_store=BlockStore(os.path.join(directory, 'blocks')),
+                               key_provider=FileKeyProvider(paths, generate_missing=True))
+        miner = restarted.miner.miner
+        self.assertTrue(restarted.can_pay_rewards)
+        self.assertEqual(restarted.get_balance_for_address(miner.public_key), restarted.MINING_REWARD)
+        transaction = Transaction(miner.public_key, Client(DeterministicKeyPool()).public_key,
+                                  restarted.MINING_REWARD)
+        transaction.sign_transaction(miner.private_key)
+        self.assertTrue(restarted.add_new_transaction(transaction))
@@ -0,0 +1,141 @@
+import json
+from unittest import TestCase, mock
+
+from crypto.blockchain.blockchain import Blockchain
+from crypto.blockchain.transaction import Transaction
+from crypto.client.client import Client
+from crypto.client.key_provider import DeterministicKeyPool
+from crypto.client.light_client import LightClient
+from crypto.config.setup import NODE
+from crypto.network.sync import SyncError
+
+
+class FlaskConnectionPool:
+
+    def __init__(self, test_client):
+        """
+        Sends the requests of a light client to the routes of the node without a server
+        """
+        self.test_client = test_client
+        self.paths = []
+
+    def request(self, peer, method, path, body=None, headers=None):
+        self.paths.append(path)
+        response = self.test_client.open(path, method=method, data=body, headers=headers)
+        return response.status_code, response.get_data()
+
+
+class RepeatingConnectionPool(FlaskConnectionPool):
+
+    def request(self, peer, method, path, body=None, headers=None):
+        """
+        Answers every proof of an address twice, like a node which tries to count a payment twice
+        """
+        status, data = super().request(peer, method, path, body, headers)
+        if path.startswith('/addresses/'):
+            answer = json.loads(data)
+            answer["transactions"] = answer["transactions"] * 2
+            data = json.dumps(answer).encode('utf-8')
+        return status, data
+
+
+class TestLightClient(TestCase):
+
+    def setUp(self):
+        self.keys = DeterministicKeyPool()
+        self.blockchain = Blockchain(key_provider=self.keys)
+        # The routes of the node serve this blockchain instead of the blockchain of the node
+        patcher = mock.patch('crypto.api.node_service.BLOCKCHAIN', self.blockchain)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pool = FlaskConnectionPool(NODE.test_client())
+        self.wallet = Client(self.keys)
+        self.light_client = LightClient(self.wallet, 'http://node:5000', self.pool)
+        self.payments = [self.transfer(self.blockchain.token.supply_user, self.wallet, amount)
+                         for amount in (30, 12)]
+        self.blockchain.mine_block()
+        self.transfer(self.blockchain.token.supply_user, Client(self.keys), 5)
+        self.blockchain.mine_block()
+
+    def transfer(self, sender: Client, recipient: Client, amount: int):
+        transaction = Transaction(sender.public_key, recipient.public_key, amount, 1)
+        transaction.sign_transaction(sender.private_key)
+        self.assertTrue(self.blockchain.add_new_transaction(transaction))
+        return transaction
+
+    def test_proves_own_transactions_with_headers(self):
+        transactions = self.light_client.update_transactions()
+
+        self.assertEqual([header.hash for header in self.light_client.header_chain.headers],
+                         [block.hash for block in self.blockchain.blocks])
+        self.assertEqual([tx.amount for _, _, tx in transactions], [30, 12])
+        self.assertEqual(self.light_client.get_balance(),
+                         self.blockchain.get_balance_for_address(self.wallet.public_key))
+        # No block was downloaded
+        self.assertFalse(any(path.startswith(('/getBlocks/', '/blocks/')) for path in self.pool.paths))
+
+    def test_follows_new_blocks(self):
+        self.light_client.update_transactions()
+        self.assertFalse(self.light_client.sync_headers())
+
+        self.transfer(self.wallet, Client(self.keys), 10)
+        self.blockchain.mine_block()
+        self.light_client.update_transactions()
+
+        self.assertEqual(len(self.light_client.header_chain), len(self.blockchain.blocks))
+        self.assertEqual(self.light_client.get_balance(), 31)
+
+    def test_books_every_reward(self):
+        for _ in range(3):
+            self.blockchain.mine_block()
+        miner = self.blockchain.miner.miner
+        light_client = LightClient(miner, 'http://node:5000', self.pool)
+
+        self.assertEqual(len(light_client.update_transactions()), 4)
+        self.assertEqual(light_client.get_balance(), self.blockchain.get_balance_for_address(miner.public_key))
+
+    def test_verify_transaction_counts_confirmations(self):
+        self.light_client.sync_headers()
+        txid = self.payments[0].hash_transaction().digest()
+
+        self.assertEqual(self.light_client.verify_transaction(txid), 2)
+        self.assertEqual(self.light_client.verify_transaction(b'\x00' * 32), 0)
+
+    def test_rejects_invalid_proof(self):
+        self.light_client.sync_headers()
+        txid = self.payments[0].hash_transaction().hexdigest()
+        entry = self.pool.test_client.get('/transactions/{}/proof'.format(txid)).get_json()
+        self.assertIsNotNone(self.light_client.check_proof(entry))
+
+        sibling, sibling_is_left = entry["proof"][0]
+        entry["proof"][0] = ['00' * 32, sibling_is_left]
+        with self.assertRaises(SyncError):
+            self.light_client.check_proof(entry)
+
+    def test_repeated_proof_is_counted_once(self):
+        light_client = LightClient(self.wallet, 'http://node:5000', RepeatingConnectionPool(self.pool.test_client))
+
+        self.assertEqual(len(light_client.update_transactions()), 2)
+        self.assertEqual(light_client.get_balance(), 42)
+
+    def test_rejects_proof_with_other_position(self):
+        self.light_client.sync_headers()
+        txid = self.payments[0].hash_transaction().hexdigest()
+        entry = self.pool.test_client.get('/transactions/{}/proof'.format(txid)).get_json()
+        entry["position"] += 4
+        with self.assertRaises(SyncError):
+            self.light_client.check_proof(entry)
+
+        entry["position"] -= 4
+        entry["proof"][0][0] = 'not hex'
+        with self.assertRaises(SyncError):
+            self.light_client.check_proof(entry)
+
+    def test_rejects_headers_with_invalid_proof_of_work(self):
+        headers = [block.header for block in self.blockchain.blocks]
+        # The declared hash no longer belongs to the header
+        headers[1].nonce += 1
+
+        with self.assertRaises(ValueError):
+            self.light_client.header_chain.add_headers(headers)
+        self.assertEqual(len(self.light_client.header_chain), 0)
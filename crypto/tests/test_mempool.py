@@ -0,0 +1,74 @@
+from unittest import TestCase
+
+from crypto.blockchain.mempool import Mempool
+from crypto.blockchain.transaction import Transaction
+from crypto.client.client import Client
+from crypto.client.key_provider import DeterministicKeyPool
+
+
+class TestMempool(TestCase):
+
+    def setUp(self):
+        self.keys = DeterministicKeyPool()
+        self.sender = Client(self.keys)
+        self.recipient = Client(self.keys)
+
+    def create_transaction(self, amount, fee):
+        transaction = Transaction(self.sender.public_key, self.recipient.public_key, amount, fee)
+        transaction.sign_transaction(self.sender.private_key)
+        return transaction
+
+    def test_duplicate_transaction_is_rejected(self):
+        mempool = Mempool()
+        transaction = self.create_transaction(1, 0)
+        self.assertEqual(mempool.add(transaction), (True, []))
+        self.assertEqual(mempool.add(transaction), (False, []))
+        self.assertEqual(len(mempool), 1)
+
+    def test_full_mempool_evicts_lowest_fee_rate(self):
+        mempool = Mempool(max_size=2)
+        low = self.create_transaction(1, 1)
+        high = self.create_transaction(2, 5)
+        mempool.add(low)
+        mempool.add(high)
+
+        # The same fee rate does not evict the first transaction
+        self.assertEqual(mempool.add(self.create_transaction(3, 1)), (False, []))
+        added, evicted = mempool.add(self.create_transaction(4, 3))
+
+        self.assertTrue(added)
+        self.assertEqual(evicted, [low])
+        self.assertNotIn(low, mempool)
+        self.assertIn(high, mempool)
+
+    def test_select_highest_fee_rates_in_arrival_order(self):
+        mempool = Mempool()
+        transactions = [self.create_transaction(amount, fee) for amount, fee in enumerate([1, 4, 0, 3, 2])]
+        for transaction in transactions:
+            mempool.add(transaction)
+
+        selected = [entry.transaction for entry in mempool.select(3, 1000000)]
+        self.assertEqual(selected, [transactions[1], transactions[3], transactions[4]])
+        # Selecting does not remove transactions
+        self.assertEqual(len(mempool), 5)
+
+    def test_select_respects_size_limit(self):
+        mempool = Mempool()
+        transactions = [self.create_transaction(amount, amount) for amount in range(1, 4)]
+        for transaction in transactions:
+            mempool.add(transaction)
+        entry_size = mempool.select(1, 1000000)[0].size
+
+        selected = [entry.transaction for entry in mempool.select(10, 2 * entry_size)]
+        self.assertEqual(selected, transactions[1:])
+
+    def test_removed_transactions_are_not_selected(self):
+        mempool = Mempool()
+        transactions = [self.create_transaction(amount, amount) for amount in range(1, 200)]
+        for transaction in transactions:
+            mempool.add(transaction)
+        for transaction in transactions[10:]:
+            self.assertTrue(mempool.remove(transaction))
+
+        selected = [entry.transaction for entry in mempool.select(100, 1000000)]
+        self.assertEqual(selected, transactions[:10])
@@ -0,0 +1,51 @@
+import hashlib
+from unittest import TestCase
+
+from crypto.blockchain.merkle_tree import MerkleTree, hash_pair
+
+
+def create_leaves(count):
+    return [hashlib.sha256(str(i).encode('utf-8')).digest() for i in range(count)]
+
+
+def compute_root(leaves):
+    nodes = list(leaves)
+    while len(nodes) > 1:
+        if len(nodes) % 2 == 1:
+            nodes.append(nodes[-1])
+        nodes = [hash_pair(nodes[i], nodes[i + 1]) for i in range(0, len(nodes), 2)]
+    return nodes[0].hex()
+
+
+class TestMerkleTree(TestCase):
+
+    def test_incremental_root_equal_to_full_computation(self):
+        leaves = create_leaves(17)
+        tree = MerkleTree()
+        for count, leaf in enumerate(leaves, 1):
+            tree.append(leaf)
+            self.assertEqual(tree.root, compute_root(leaves[:count]))
+
+    def test_single_leaf_is_root(self):
+        leaf = create_leaves(1)[0]
+        self.assertEqual(MerkleTree([leaf]).root, leaf.hex())
+
+    def test_proofs_of_all_leaves(self):
+        for count in [1, 2, 3, 8, 13]:
+            leaves = create_leaves(count)
+            tree = MerkleTree(leaves)
+            for index, leaf in enumerate(leaves):
+                proof = tree.get_proof(index)
+                self.assertTrue(MerkleTree.verify_proof(leaf, proof, tree.root))
+
+    def test_proof_with_wrong_leaf(self):
+        leaves = create_leaves(5)
+        tree = MerkleTree(leaves)
+        proof = tree.get_proof(2)
+
+        self.assertFalse(MerkleTree.verify_proof(leaves[3], proof, tree.root))
+
+    def test_proof_with_index_out_of_range(self):
+        tree = MerkleTree(create_leaves(3))
+        with self.assertRaises(IndexError):
+            tree.get_proof(3)
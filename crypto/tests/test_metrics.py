@@ -0,0 +1,94 @@
+import threading
+from unittest import TestCase
+
+from crypto.blockchain.blockchain import Blockchain
+from crypto.blockchain.transaction import Transaction
+from crypto.client.client import Client
+from crypto.client.key_provider import DeterministicKeyPool
+from crypto.monitoring.metrics import DISABLED_TIMER, MetricsRegistry
+from crypto.monitoring.profiler import SamplingProfiler
+
+
+class TestMetrics(TestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_render_counter_and_gauge(self):
+        counter = self.registry.counter('test_events_total', "Events")
+        counter.inc()
+        counter.inc(2)
+        self.registry.gauge('test_size', "Size", lambda: 7)
+
+        self.assertEqual(self.registry.render(), "# HELP test_events_total Events\n"
+                                                 "# TYPE test_events_total counter\n"
+                                                 "test_events_total 3\n"
+                                                 "# HELP test_size Size\n"
+                                                 "# TYPE test_size gauge\n"
+                                                 "test_size 7\n")
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = self.registry.histogram('test_seconds', "Durations", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.7, 2.0):
+            histogram.observe(value)
+
+        lines = self.registry.render().splitlines()
+        self.assertIn('test_seconds_bucket{le="0.1"} 1', lines)
+        self.assertIn('test_seconds_bucket{le="1.0"} 3', lines)
+        self.assertIn('test_seconds_bucket{le="+Inf"} 4', lines)
+        self.assertIn('test_seconds_count 4', lines)
+
+    def test_registry_returns_existing_metric(self):
+        self.assertIs(self.registry.counter('test_total', "Test"), self.registry.counter('test_total', "Test"))
+        with self.assertRaises(ValueError):
+            self.registry.histogram('test_total', "Test")
+
+    def test_disabled_registry_ignores_updates(self):
+        registry = MetricsRegistry(enabled=False)
+        counter = registry.counter('test_total', "Test")
+        histogram = registry.histogram('test_seconds', "Test")
+        counter.inc()
+        with histogram.time():
+            pass
+
+        self.assertEqual(counter.value, 0)
+        self.assertEqual(histogram.count, 0)
+        self.assertIs(histogram.time(), DISABLED_TIMER)
+
+    def test_blockchain_records_hot_paths(self):
+        keys = DeterministicKeyPool()
+        blockchain = Blockchain(key_provider=keys, metrics=self.registry)
+        supply_user = blockchain.token.supply_user
+        transaction = Transaction(supply_user.public_key, Client(keys).public_key, 10)
+        transaction.sign_transaction(supply_user.private_key)
+        blockchain.add_new_transaction(transaction)
+        blockchain.mine_block()
+        blockchain.get_balance_for_address(supply_user.public_key)
+
+        self.assertEqual(blockchain.accepted_transactions.value, 1)
+        self.assertEqual(blockchain.transaction_verification_timer.count, 1)
+        self.assertEqual(blockchain.proof_of_work_timer.count, 2)
+        self.assertGreaterEqual(blockchain.proof_of_work_hashes.value, 2)
+        self.assertEqual(blockchain.balance_lookup_timer.count, 1)
+        self.assertIn("blockchain_height 1\n", self.registry.render())
+
+
+class TestSamplingProfiler(TestCase):
+
+    def test_sample_records_stacks_of_other_threads(self):
+        profiler = SamplingProfiler()
+        event = threading.Event()
+
+        def wait_for_event():
+            event.wait()
+
+        thread = threading.Thread(target=wait_for_event)
+        thread.start()
+        try:
+            profiler.sample()
+        finally:
+            event.set()
+            thread.join()
+
+        self.assertEqual(profiler.samples, 1)
+        self.assertIn("wait_for_event", profiler.report())
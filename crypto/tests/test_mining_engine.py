@@ -0,0 +1,43 @@
+from unittest import TestCase
+
+from crypto.blockchain.block import Block, meets_target
+from crypto.blockchain.mining_engine import ParallelMiningEngine
+
+
+class TestParallelMiningEngine(TestCase):
+
+    def setUp(self):
+        self.engine = ParallelMiningEngine(workers=2, chunk_size=64, check_interval=16)
+
+    def tearDown(self):
+        self.engine.close()
+
+    def test_mined_hash_is_equal_to_block_hash(self):
+        block = Block(1, "00123456ab", "ffabff123", [], 0)
+        result = self.engine.mine(block)
+
+        self.assertEqual(block.nonce, result.nonce)
+        self.assertEqual(block.hash, block.hash_block())
+        self.assertTrue(block.has_valid_proof_of_work())
+        self.assertGreaterEqual(result.hashes, 1)
+        self.assertGreater(result.hash_rate, 0)
+
+    def test_same_nonce_as_sequential_search(self):
+        block = Block(2, "00abcdef", "123abc", [], 0)
+        midstate = block.header_midstate()
+        sequential_nonce = 0
+        while not meets_target(Block.hash_nonce(midstate, sequential_nonce), block.target):
+            sequential_nonce += 1
+
+        self.engine.mine(block)
+
+        self.assertEqual(block.nonce, sequential_nonce)
+
+    def test_search_in_limited_range(self):
+        block = Block(3, "00abcdef", "456def", [], 0)
+        expected_nonce = self.engine.mine(block).nonce
+
+        block.nonce = 0
+        self.assertIsNone(self.engine.mine(block, end_nonce=expected_nonce))
+        self.assertEqual(block.nonce, 0)
+        self.assertEqual(self.engine.mine(block, end_nonce=expected_nonce + 1).nonce, expected_nonce)
@@ -0,0 +1,77 @@
+import time
+from unittest import TestCase
+
+from crypto.blockchain.blockchain import Blockchain
+from crypto.blockchain.mining_service import MiningService
+from crypto.blockchain.transaction import Transaction
+from crypto.client.client import Client
+from crypto.client.key_provider import DeterministicKeyPool
+
+
+def wait_until(condition, timeout=10.0):
+    end = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > end:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+class TestMiningService(TestCase):
+
+    def setUp(self):
+        self.keys = DeterministicKeyPool()
+        self.blockchain = Blockchain(key_provider=self.keys)
+        self.service = MiningService(self.blockchain, batch_size=64, idle_interval=0.01, refresh_interval=0)
+        self.supply_user = self.blockchain.token.supply_user
+        self.test_user_1 = Client(self.keys)
+
+    def tearDown(self):
+        self.service.stop(timeout=10)
+
+    def create_transaction(self, amount, fee=0):
+        transaction = Transaction(self.supply_user.public_key, self.test_user_1.public_key, amount, fee)
+        transaction.sign_transaction(self.supply_user.private_key)
+        return transaction
+
+    def test_mines_submitted_transactions_in_background(self):
+        self.service.start()
+        transaction = self.create_transaction(100)
+        self.assertTrue(self.blockchain.add_new_transaction(transaction))
+
+        self.assertTrue(wait_until(lambda: transaction not in self.blockchain.mempool))
+        self.assertTrue(wait_until(lambda: self.service.status()["blocks_mined"] >= 1))
+        self.assertTrue(any(transaction in block.transactions for block in self.blockchain.blocks))
+        self.assertEqual(self.blockchain.get_balance_for_address(self.test_user_1.public_key), 100)
+
+    def test_stop_and_status(self):
+        self.assertFalse(self.service.status()["running"])
+        self.service.start()
+        self.assertTrue(self.service.status()["running"])
+        self.service.stop(timeout=10)
+
+        status = self.service.status()
+        self.assertFalse(status["running"])
+        self.assertEqual(status["height"], self.blockchain.get_last_block.index)
+
+    def test_candidate_is_outdated_by_new_tip(self):
+        self.assertIsNone(self.blockchain.create_candidate_block())
+
+        self.blockchain.add_new_transaction(self.create_transaction(10))
+        candidate = self.blockchain.create_candidate_block()
+        version = self.blockchain.mempool.version
+        self.assertFalse(self.service._is_outdated(candidate, version, time.perf_counter()))
+
+        self.blockchain.mine_block()
+        self.assertTrue(self.service._is_outdated(candidate, version, time.perf_counter()))
+        # A block which does not extend the last block anymore is rejected
+        self.blockchain.proof_of_work(candidate)
+        self.assertFalse(self.blockchain.submit_block(candidate))
+
+    def test_candidate_is_outdated_by_new_transactions(self):
+        self.blockchain.add_new_transaction(self.create_transaction(10))
+        candidate = self.blockchain.create_candidate_block()
+        version = self.blockchain.mempool.version
+
+        self.blockchain.add_new_transaction(self.create_transaction(20, 5))
+        self.assertTrue(self.service._is_outdated(candidate, version, time.perf_counter()))
@@ -0,0 +1,167 @@
+import json
+import struct
+from unittest import TestCase
+
+from crypto.api.node_service import BLOCK_JSON_CACHE
+from crypto.blockchain.address import Address
+from crypto.blockchain.codec import decode_blocks, encode_block, encode_transaction
+from crypto.blockchain.transaction import Transaction
+from crypto.client.client import Client
+from crypto.config.setup import BLOCKCHAIN, NODE
+from crypto.storage.snapshot import StateSnapshot
+
+
+class TestNodeService(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        supply_user = BLOCKCHAIN.token.supply_user
+        cls.test_user_1 = Client()
+        transaction = Transaction(supply_user.public_key, cls.test_user_1.public_key, 100)
+        transaction.sign_transaction(supply_user.private_key)
+        BLOCKCHAIN.add_new_transaction(transaction)
+        cls.transaction = transaction
+        BLOCKCHAIN.mine_block()
+        BLOCKCHAIN.mine_block()
+
+    def setUp(self):
+        self.client = NODE.test_client()
+
+    def test_get_all_blocks(self):
+        response = self.client.get('/getBlocks/')
+        blocks = json.loads(response.get_data(as_text=True))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([block["hash"] for block in blocks], [block.hash for block in BLOCKCHAIN.blocks])
+        self.assertEqual(len(blocks), len(BLOCKCHAIN.blocks))
+
+    def test_get_blocks_with_range(self):
+        response = self.client.get('/getBlocks/?from_height=1&limit=1')
+        blocks = json.loads(response.get_data(as_text=True))
+
+        self.assertEqual([block["index"] for block in blocks], [1])
+        self.assertIn(BLOCKCHAIN.blocks[1].hash, BLOCK_JSON_CACHE.entries)
+
+        response = self.client.get('/getBlocks/?from_height=100')
+        self.assertEqual(json.loads(response.get_data(as_text=True)), [])
+
+    def test_get_blocks_binary(self):
+        response = self.client.get('/getBlocks/?format=binary&from_height=1')
+        blocks = decode_blocks(response.get_data())
+
+        self.assertEqual([block.hash for block in blocks], [block.hash for block in BLOCKCHAIN.blocks[1:]])
+
+    def test_unchanged_chain_is_not_modified(self):
+        response = self.client.get('/getBlocks/')
+        etag = response.headers['ETag']
+
+        response = self.client.get('/getBlocks/', headers={'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.get_data(), b'')
+
+    def test_get_block_by_height_and_hash(self):
+        block = BLOCKCHAIN.get_block_by_index(1)
+
+        response = self.client.get('/blocks/1')
+        self.assertEqual(json.loads(response.get_data(as_text=True))["hash"], block.hash)
+
+        response = self.client.get('/blocks/hash/' + block.hash)
+        self.assertEqual(json.loads(response.get_data(as_text=True))["index"], 1)
+
+        self.assertEqual(self.client.get('/blocks/1000').status_code, 404)
+        self.assertEqual(self.client.get('/blocks/hash/00ff').status_code, 404)
+
+    def test_get_balance(self):
+        address = self.test_user_1.public_key.export_key('DER').hex()
+        response = self.client.get('/balance/' + address)
+
+        self.assertEqual(response.get_json()["balance"], 100)
+        self.assertEqual(self.client.get('/balance/00ff').status_code, 400)
+
+    def test_get_balance_by_address(self):
+        address = Address.from_key(self.test_user_1.public_key).hex()
+        response = self.client.get('/balance/' + address)
+
+        self.assertEqual(response.get_json()["balance"], 100)
+
+    def test_get_metrics(self):
+        response = self.client.get('/metrics')
+        text = response.get_data(as_text=True)
+
+        self.assertTrue(response.content_type.startswith('text/plain; version=0.0.4'))
+        self.assertIn("# TYPE blockchain_proof_of_work_seconds histogram", text)
+        self.assertIn("blockchain_height {}\n".format(BLOCKCHAIN.get_last_block.index), text)
+
+    def test_profiler(self):
+        self.assertEqual(self.client.post('/profiler/start/', json={"interval": 0}).status_code, 400)
+        self.assertTrue(self.client.post('/profiler/start/', json={"interval": 0.001, "reset": True})
+                        .get_json()["running"])
+        self.assertFalse(self.client.post('/profiler/stop/').get_json()["running"])
+        self.assertEqual(self.client.get('/profiler/').status_code, 200)
+
+    def test_submit_transactions(self):
+        test_user_2 = Client()
+        transaction = Transaction(self.test_user_1.public_key, test_user_2.public_key, 10)
+        transaction.sign_transaction(self.test_user_1.private_key)
+        too_expensive_transaction = Transaction(self.test_user_1.public_key, test_user_2.public_key, 1000)
+        too_expensive_transaction.sign_transaction(self.test_user_1.private_key)
+
+        response = self.client.post('/transactions/', json={"transaction": encode_transaction(transaction).hex()})
+        self.assertEqual(response.get_json(), {"accepted": True})
+
+        second_transaction = Transaction(self.test_user_1.public_key, test_user_2.public_key, 20)
+        second_transaction.sign_transaction(self.test_user_1.private_key)
+        response = self.client.post('/transactions/bulk/', json={"transactions": [
+            encode_transaction(second_transaction).hex(),
+            encode_transaction(too_expensive_transaction).hex()
+        ]})
+        self.assertEqual(response.get_json(), {"accepted": [True, False]})
+
+        response = self.client.post('/transactions/', json={"transaction": "00ff"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_reject_malformed_submissions(self):
+        transaction = Transaction(self.test_user_1.public_key, Client().public_key, 10)
+        transaction.sign_transaction(self.test_user_1.private_key)
+        # The timestamp is the last field of an encoded transaction
+        out_of_range = encode_transaction(transaction)[:-8] + struct.pack('<q', 2 ** 63 - 1)
+        block = encode_block(BLOCKCHAIN.blocks[1])
+        block = block[:1 + 120] + struct.pack('<q', -2 ** 63) + block[1 + 128:]
+
+        for path, body in [('/transactions/', {"transaction": out_of_range.hex()}),
+                           ('/transactions/', [out_of_range.hex()]),
+                           ('/transactions/', {}),
+                           ('/transactions/bulk/', {"transactions": None}),
+                           ('/transactions/bulk/', {"transactions": "00ff"}),
+                           ('/transactions/bulk/', {"transactions": [None]}),
+                           ('/transactions/bulk/', None)]:
+            response = self.client.post(path, json=body)
+            self.assertEqual(response.status_code, 400, (path, body))
+        self.assertEqual(self.client.post('/blocks/', data=block).status_code, 400)
+
+    def test_get_transaction_by_txid(self):
+        txid = self.transaction.hash_transaction().hexdigest()
+        response = self.client.get('/transactions/' + txid)
+        body = response.get_json()
+
+        self.assertEqual(body["block_height"], 1)
+        self.assertEqual(body["block_hash"], BLOCKCHAIN.blocks[1].hash)
+        self.assertEqual(body["transaction"]["amount"], 100)
+        self.assertEqual(self.client.get('/transactions/' + '00' * 32).status_code, 404)
+        self.assertEqual(self.client.get('/transactions/xyz').status_code, 400)
+
+    def test_get_address_history(self):
+        address = self.test_user_1.public_key.export_key('DER').hex()
+        response = self.client.get('/addresses/{}/transactions'.format(address))
+        entries = response.get_json()["transactions"]
+
+        self.assertEqual([(entry["block_height"], entry["position"]) for entry in entries], [(1, 0)])
+        self.assertEqual(entries[0]["txid"], self.transaction.hash_transaction().hexdigest())
+
+    def test_get_snapshot(self):
+        response = self.client.get('/snapshot/')
+        snapshot = StateSnapshot.decode(response.get_data())
+
+        self.assertEqual(snapshot.block_hash, BLOCKCHAIN.get_last_block.hash)
+        self.assertEqual(snapshot.balances, BLOCKCHAIN.account_state.balances)
@@ -0,0 +1,85 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+from crypto.blockchain.block import Block
+from crypto.blockchain.blockchain import Blockchain
+from crypto.blockchain.transaction import Transaction
+from crypto.client.client import Client
+from crypto.client.key_provider import DeterministicKeyPool
+
+
+class TestPruning(TestCase):
+
+    def setUp(self):
+        self.keys = DeterministicKeyPool()
+        self.full_blockchain = Blockchain(key_provider=self.keys)
+        self.pruned_blockchain = Blockchain(prune_depth=2, key_provider=self.keys)
+        self.user = Client(self.keys)
+        self.transactions = []
+        for amount in range(1, 7):
+            self.transactions.append(self.transfer(self.pruned_blockchain, amount))
+            self.pruned_blockchain.mine_block()
+
+    def transfer(self, blockchain: Blockchain, amount: int):
+        supply_user = blockchain.token.supply_user
+        transaction = Transaction(supply_user.public_key, self.user.public_key, amount, 1)
+        transaction.sign_transaction(supply_user.private_key)
+        self.assertTrue(blockchain.add_new_transaction(transaction))
+        return transaction
+
+    def test_old_blocks_keep_only_their_headers(self):
+        blocks = self.pruned_blockchain.blocks
+        self.assertEqual(self.pruned_blockchain.pruned_height, len(blocks) - 2)
+        self.assertFalse(any(isinstance(block, Block) for block in blocks[:-2]))
+        self.assertTrue(all(isinstance(block, Block) for block in blocks[-2:]))
+        for previous_block, block in zip(blocks, blocks[1:]):
+            self.assertEqual(block.previous_hash, previous_block.hash)
+            self.assertTrue(block.has_valid_proof_of_work())
+
+    def test_pruned_chain_keeps_balances(self):
+        self.assertEqual(self.pruned_blockchain.get_balance_for_address(self.user.public_key), 21)
+        self.assertTrue(self.pruned_blockchain.verify_account_state())
+        self.assertEqual(self.pruned_blockchain.fee_collector,
+                         self.pruned_blockchain.account_state.fee_collector)
+
+    def test_pruned_chain_is_valid(self):
+        with ThreadPoolExecutor() as executor:
+            self.assertTrue(self.pruned_blockchain.validate_chain(executor))
+
+    def test_pruned_transactions_can_not_be_looked_up(self):
+        txids = [tx.hash_transaction().digest() for tx in self.transactions]
+
+        self.assertIsNone(self.pruned_blockchain.get_transaction(txids[0]))
+        self.assertIsNone(self.pruned_blockchain.get_merkle_proof(1, 0))
+        self.assertIsNotNone(self.pruned_blockchain.get_transaction(txids[-1]))
+        history = self.pruned_blockchain.get_address_history(self.user.public_key)
+        self.assertEqual([tx.amount for _, _, tx in history], [5, 6])
+        # The index still knows the pruned transactions, so they can not be replayed
+        self.assertFalse(self.pruned_blockchain.add_new_transaction(self.transactions[0]))
+
+    def test_branch_below_pruned_blocks_is_rejected(self):
+        fork_height = self.pruned_blockchain.pruned_height - 1
+        branch = []
+        previous_block = self.pruned_blockchain.blocks[fork_height - 1]
+        for index in range(fork_height, len(self.pruned_blockchain.blocks) + 2):
+            block = Block(index, previous_block.hash, previous_block.merkle_root, [], 0, previous_block.difficulty)
+            self.pruned_blockchain.proof_of_work(block)
+            branch.append(block)
+            previous_block = block
+
+        self.assertFalse(self.pruned_blockchain.replace_chain(branch))
+
+    def test_snapshot_and_headers_bootstrap_a_node(self):
+        snapshot = self.pruned_blockchain.create_snapshot()
+        self.full_blockchain.load_snapshot(snapshot, self.pruned_blockchain.blocks)
+
+        self.assertEqual(self.full_blockchain.get_last_block.hash, self.pruned_blockchain.get_last_block.hash)
+        self.assertEqual(self.full_blockchain.account_state.balances, self.pruned_blockchain.account_state.balances)
+        self.assertEqual(self.full_blockchain.total_work, self.pruned_blockchain.total_work)
+        # The transactions below the snapshot are known from the snapshot, so they can not be replayed
+        self.assertFalse(self.full_blockchain.add_new_transaction(self.transactions[0]))
+        self.transfer(self.pruned_blockchain, 7)
+        self.pruned_blockchain.mine_block()
+        self.assertTrue(self.full_blockchain.add_block(self.pruned_blockchain.get_last_block))
+        self.assertEqual(self.full_blockchain.get_balance_for_address(self.user.public_key), 28)
+        self.assertTrue(self.full_blockchain.verify_account_state())
@@ -0,0 +1,62 @@
+import threading
+import time
+from unittest import TestCase
+
+from crypto.blockchain.read_write_lock import ReadWriteLock
+
+
+class TestReadWriteLock(TestCase):
+
+    def setUp(self):
+        self.lock = ReadWriteLock()
+
+    def try_read(self):
+        acquired = threading.Event()
+
+        def read():
+            with self.lock.read():
+                acquired.set()
+
+        thread = threading.Thread(target=read, daemon=True)
+        thread.start()
+        return acquired.wait(0.2)
+
+    def test_readers_share_the_lock(self):
+        with self.lock.read():
+            self.assertTrue(self.try_read())
+
+    def test_writer_excludes_readers(self):
+        with self.lock.write():
+            self.assertFalse(self.try_read())
+        self.assertTrue(self.try_read())
+
+    def test_locks_are_reentrant(self):
+        with self.lock.write():
+            with self.lock.write(), self.lock.read():
+                pass
+            self.assertFalse(self.try_read())
+        with self.lock.read(), self.lock.read():
+            self.assertTrue(self.try_read())
+
+    def test_reader_can_not_upgrade(self):
+        with self.lock.read():
+            with self.assertRaises(RuntimeError):
+                self.lock.acquire_write()
+
+    def test_waiting_writer_blocks_new_readers(self):
+        written = threading.Event()
+
+        def write():
+            with self.lock.write():
+                written.set()
+
+        with self.lock.read():
+            writer = threading.Thread(target=write, daemon=True)
+            writer.start()
+            while self.lock._waiting_writers == 0:
+                time.sleep(0.001)
+            self.assertFalse(self.try_read())
+            # A nested read of a reader does not wait for the writer
+            with self.lock.read():
+                pass
+        self.assertTrue(written.wait(1))
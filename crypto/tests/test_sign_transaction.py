@@ -2,13 +2,15 @@ from unittest import TestCase
 
 from crypto.blockchain.transaction import Transaction
 from crypto.client.client import Client
+from crypto.client.key_provider import DeterministicKeyPool
 
 
 class TestTransactionSigning(TestCase):
 
     def setUp(self):
-        self.user_1 = Client()
-        self.user_2 = Client()
+        self.keys = DeterministicKeyPool()
+        self.user_1 = Client(self.keys)
+        self.user_2 = Client(self.keys)
 
     def test_verify_transaction_correct(self):
         transaction = Transaction(self.user_1.public_key, self.user_2.public_key, 100)
@@ -21,6 +23,6 @@ class TestTransactionSigning(TestCase):
 
     def test_verify_transaction_fake_transaction(self):
         transaction = Transaction(self.user_1.public_key, self.user_2.public_key, 100)
-        fake_signing_user = Client()
+        fake_signing_user = Client(self.keys)
         transaction.sign_transaction(fake_signing_user.private_key)
         self.assertFalse(transaction.verify_transaction())
@@ -0,0 +1,102 @@
+import os
+import tempfile
+from unittest import TestCase, mock
+
+from crypto.blockchain.blockchain import Blockchain
+from crypto.blockchain.codec import decode_block
+from crypto.blockchain.transaction import Transaction
+from crypto.client.client import Client
+from crypto.client.key_provider import DeterministicKeyPool
+from crypto.storage.block_store import BlockStore
+from crypto.storage.chain_index import ChainIndex
+from crypto.storage.snapshot import SnapshotStore, StateSnapshot
+
+
+class TestSnapshot(TestCase):
+
+    def setUp(self):
+        self.keys = DeterministicKeyPool()
+        self.directory = tempfile.mkdtemp()
+        self.block_store = BlockStore(os.path.join(self.directory, 'blocks'))
+        self.snapshot_store = SnapshotStore(os.path.join(self.directory, 'snapshots'))
+        self.blockchain = Blockchain(block_store=self.block_store, snapshot_store=self.snapshot_store,
+                                     key_provider=self.keys)
+        self.blockchain.SNAPSHOT_INTERVAL = 2
+        self.users = [Client(self.keys) for _ in range(3)]
+        self.mine_transfers(4)
+
+    def tearDown(self):
+        self.block_store.close()
+
+    def mine_transfers(self, count: int):
+        supply_user = self.blockchain.token.supply_user
+        for number in range(count):
+            transaction = Transaction(supply_user.public_key, self.users[number % len(self.users)].public_key,
+                                      10 + len(self.blockchain.blocks), 1)
+            transaction.sign_transaction(supply_user.private_key)
+            self.assertTrue(self.blockchain.add_new_transaction(transaction))
+            self.blockchain.mine_block()
+
+    def test_snapshot_round_trip(self):
+        snapshot = self.blockchain.create_snapshot()
+        decoded_snapshot = StateSnapshot.decode(snapshot.encode())
+
+        self.assertEqual(decoded_snapshot.height, 4)
+        self.assertEqual(decoded_snapshot.block_hash, self.blockchain.get_last_block.hash)
+        self.assertEqual(decoded_snapshot.balances, self.blockchain.account_state.balances)
+        self.assertEqual(decoded_snapshot.fee_collector, self.blockchain.fee_collector)
+        self.assertEqual(decoded_snapshot.transactions, self.blockchain.chain_index.transactions)
+
+    def test_damaged_snapshot_is_rejected(self):
+        data = bytearray(self.blockchain.create_snapshot().encode())
+        data[40] ^= 1
+        with self.assertRaises(ValueError):
+            StateSnapshot.decode(bytes(data))
+        with self.assertRaises(ValueError):
+            StateSnapshot.decode(bytes(data[:20]))
+
+    def test_snapshots_are_saved_in_the_interval(self):
+        self.assertEqual(self.snapshot_store.heights(), [2, 4])
+        self.mine_transfers(2)
+        # Only the newest snapshots are kept
+        self.assertEqual(self.snapshot_store.heights(), [4, 6])
+        self.assertEqual(self.snapshot_store.load(6).balances, self.blockchain.account_state.balances)
+
+    def test_restart_starts_from_snapshot(self):
+        self.mine_transfers(1)
+        balances = dict(self.blockchain.account_state.balances)
+        self.block_store.close()
+
+        self.block_store = BlockStore(os.path.join(self.directory, 'blocks'))
+        snapshot = self.snapshot_store.find(self.block_store)
+        restarted_blockchain = Blockchain(block_store=self.block_store, snapshot=snapshot, key_provider=self.keys)
+
+        self.assertEqual(snapshot.height, 4)
+        self.assertEqual(restarted_blockchain.base_height, 4)
+        self.assertEqual(restarted_blockchain.account_state.balances, balances)
+        self.assertTrue(restarted_blockchain.verify_account_state())
+
+    def test_restart_only_decodes_blocks_above_snapshot(self):
+        self.mine_transfers(1)
+        self.block_store.close()
+        index_path = os.path.join(self.directory, 'chain.idx')
+
+        for expected_decodes in (len(self.blockchain.blocks), 1):
+            # The first restart builds the chain index, the second one only replays the block above the snapshot
+            self.block_store = BlockStore(os.path.join(self.directory, 'blocks'))
+            with mock.patch('crypto.storage.block_store.decode_block', wraps=decode_block) as counted_decode:
+                restarted_blockchain = Blockchain(block_store=self.block_store, chain_index=ChainIndex(index_path),
+                                                  snapshot=self.snapshot_store.find(self.block_store),
+                                                  key_provider=self.keys)
+            self.assertEqual(counted_decode.call_count, expected_decodes)
+            self.assertEqual(restarted_blockchain.total_work, self.blockchain.total_work)
+            self.assertEqual(restarted_blockchain.account_state.balances, self.blockchain.account_state.balances)
+            self.block_store.close()
+        self.block_store = BlockStore(os.path.join(self.directory, 'blocks'))
+
+    def test_snapshot_of_replaced_block_is_not_found(self):
+        self.block_store.truncate(4)
+
+        self.assertEqual(self.snapshot_store.find(self.block_store).height, 2)
+        with self.assertRaises(ValueError):
+            Blockchain(block_store=self.block_store, snapshot=self.snapshot_store.load(4), key_provider=self.keys)
@@ -0,0 +1,196 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase, mock
+from urllib.parse import parse_qs, urlparse
+
+from crypto.blockchain.blockchain import Blockchain
+from crypto.blockchain.codec import encode_blocks, encode_headers
+from crypto.blockchain.transaction import Transaction
+from crypto.client.client import Client
+from crypto.client.key_provider import DeterministicKeyPool
+from crypto.network.peers import PeerRegistry
+from crypto.network.sync import ChainSynchronizer, SyncError
+
+
+class FakeConnectionPool:
+
+    def __init__(self, nodes):
+        """
+        Answers the sync requests from in-process blockchains instead of remote nodes
+        :param nodes: Blockchain of every peer URL
+        """
+        self.nodes = nodes
+        self.requests = []
+        # Raw answers which replace the status of a peer
+        self.statuses = {}
+
+    def request(self, peer, method, path, body=None, headers=None):
+        self.requests.append((peer, path))
+        if peer not in self.nodes:
+            raise ConnectionRefusedError(peer)
+        blockchain = self.nodes[peer]
+        parsed_path = urlparse(path)
+        query = {key: values[0] for key, values in parse_qs(parsed_path.query).items()}
+        from_height = int(query.get('from_height', 0))
+        limit = int(query.get('limit', len(blockchain.blocks)))
+        blocks = blockchain.blocks[from_height:from_height + limit]
+        if parsed_path.path == '/status/' and peer in self.statuses:
+            return 200, self.statuses[peer]
+        if parsed_path.path == '/status/':
+            last_block = blockchain.get_last_block
+            return 200, json.dumps({"height": last_block.index, "hash": last_block.hash,
+                                    "work": blockchain.total_work}).encode('utf-8')
+        if parsed_path.path == '/headers/':
+            return 200, encode_headers(blocks)
+        if parsed_path.path == '/getBlocks/':
+            return 200, encode_blocks(blocks)
+        if parsed_path.path == '/snapshot/':
+            return 200, blockchain.create_snapshot().encode()
+        return 404, b''
+
+
+def mine_blocks(blockchain, count, keys):
+    supply_user = blockchain.token.supply_user
+    for _ in range(count):
+        transaction = Transaction(supply_user.public_key, Client(keys).public_key, 1)
+        transaction.sign_transaction(supply_user.private_key)
+        blockchain.add_new_transaction(transaction)
+        blockchain.mine_block()
+
+
+class TestChainSynchronizer(TestCase):
+
+    def setUp(self):
+        self.keys = DeterministicKeyPool()
+        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.local = Blockchain(key_provider=self.keys)
+        self.remote = Blockchain(key_provider=self.keys)
+        self.peers = PeerRegistry()
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def create_synchronizer(self, nodes):
+        for url in nodes:
+            self.peers.add(url)
+        self.pool = FakeConnectionPool(nodes)
+        return ChainSynchronizer(self.local, self.peers, self.pool, blocks_per_request=2,
+                                 validation_executor=self.executor)
+
+    def test_adopts_chain_with_more_work(self):
+        mine_blocks(self.remote, 5, self.keys)
+        synchronizer = self.create_synchronizer({'http://peer-1:5000': self.remote})
+
+        self.assertTrue(synchronizer.sync())
+        self.assertEqual([block.hash for block in self.local.blocks], [block.hash for block in self.remote.blocks])
+        self.assertEqual(self.local.total_work, self.remote.total_work)
+        self.assertTrue(self.local.verify_account_state())
+        # A second sync finds no chain with more work
+        self.assertFalse(synchronizer.sync())
+
+    def test_extends_chain_from_fork_height(self):
+        mine_blocks(self.remote, 3, self.keys)
+        synchronizer = self.create_synchronizer({'http://peer-1:5000': self.remote})
+        synchronizer.sync()
+        mine_blocks(self.remote, 2, self.keys)
+        self.pool.requests.clear()
+
+        self.assertTrue(synchronizer.sync())
+        self.assertEqual(self.local.get_last_block.hash, self.remote.get_last_block.hash)
+        # Only the new blocks are downloaded
+        block_requests = [path for peer, path in self.pool.requests if path.startswith('/getBlocks/')]
+        self.assertEqual(block_requests, ['/getBlocks/?from_height=4&limit=2&format=binary'])
+
+    def test_keeps_chain_with_more_work(self):
+        mine_blocks(self.local, 3, self.keys)
+        mine_blocks(self.remote, 2, self.keys)
+        synchronizer = self.create_synchronizer({'http://peer-1:5000': self.remote})
+
+        self.assertFalse(synchronizer.sync())
+        self.assertEqual(len(self.local.blocks), 4)
+
+    def test_downloads_blocks_from_several_peers(self):
+        mine_blocks(self.remote, 5, self.keys)
+        synchronizer = self.create_synchronizer({'http://peer-1:5000': self.remote,
+                                                 'http://peer-2:5000': self.remote})
+
+        self.assertTrue(synchronizer.sync())
+        block_peers = {peer for peer, path in self.pool.requests if path.startswith('/getBlocks/')}
+        self.assertEqual(block_peers, {'http://peer-1:5000', 'http://peer-2:5000'})
+
+    def test_ignores_unreachable_peer(self):
+        mine_blocks(self.remote, 2, self.keys)
+        synchronizer = self.create_synchronizer({'http://peer-1:5000': self.remote})
+        self.peers.add('http://offline:5000')
+
+        self.assertTrue(synchronizer.sync())
+        self.assertEqual(self.local.get_last_block.hash, self.remote.get_last_block.hash)
+
+    def test_ignores_peer_with_invalid_status(self):
+        mine_blocks(self.remote, 2, self.keys)
+        synchronizer = self.create_synchronizer({'http://peer-1:5000': self.remote,
+                                                 'http://peer-2:5000': self.remote,
+                                                 'http://peer-3:5000': self.remote,
+                                                 'http://peer-4:5000': self.remote})
+        self.pool.statuses['http://peer-1:5000'] = b'{"height": 2, "hash": "00", "work": "a lot"}'
+        self.pool.statuses['http://peer-2:5000'] = b'{"hash": "00", "work": 100}'
+        self.pool.statuses['http://peer-3:5000'] = b'[1, 2]'
+
+        self.assertTrue(synchronizer.sync())
+        self.assertEqual(self.local.get_last_block.hash, self.remote.get_last_block.hash)
+        for peer in ('http://peer-1:5000', 'http://peer-2:5000', 'http://peer-3:5000'):
+            with self.assertRaises(SyncError):
+                synchronizer.get_status(peer)
+
+    def test_background_sync_survives_unexpected_error(self):
+        synchronizer = self.create_synchronizer({})
+        self.peers.add('http://broken:5000')
+        self.pool.request = mock.Mock(side_effect=RuntimeError("broken peer"))
+
+        synchronizer.start(interval=0.01)
+        try:
+            for _ in range(100):
+                if self.pool.request.call_count >= 2:
+                    break
+                time.sleep(0.01)
+            self.assertGreaterEqual(self.pool.request.call_count, 2)
+            self.assertTrue(synchronizer.is_running)
+            self.assertIsInstance(synchronizer.last_error, RuntimeError)
+        finally:
+            synchronizer.stop()
+
+    def test_rejects_headers_with_invalid_proof_of_work(self):
+        mine_blocks(self.remote, 2, self.keys)
+        self.remote.blocks[-1].nonce += 1
+        synchronizer = self.create_synchronizer({'http://peer-1:5000': self.remote})
+
+        self.assertFalse(synchronizer.sync())
+        self.assertEqual(len(self.local.blocks), 1)
+        self.assertNotIn('http://peer-1:5000', self.peers)
+
+    def test_bootstraps_from_snapshot(self):
+        mine_blocks(self.remote, 5, self.keys)
+        synchronizer = self.create_synchronizer({'http://peer-1:5000': self.remote})
+
+        self.assertTrue(synchronizer.bootstrap('http://peer-1:5000'))
+        self.assertEqual([block.hash for block in self.local.blocks], [block.hash for block in self.remote.blocks])
+        self.assertEqual(self.local.account_state.balances, self.remote.account_state.balances)
+        self.assertEqual(self.local.pruned_height, len(self.remote.blocks))
+        # Only the snapshot and the headers were downloaded
+        self.assertEqual({urlparse(path).path for _, path in self.pool.requests}, {'/snapshot/', '/headers/'})
+
+        mine_blocks(self.remote, 2, self.keys)
+        self.assertTrue(synchronizer.sync())
+        self.assertEqual(self.local.get_last_block.hash, self.remote.get_last_block.hash)
+        self.assertEqual(self.local.account_state.balances, self.remote.account_state.balances)
+        self.assertTrue(self.local.verify_account_state())
+        self.assertTrue(self.local.validate_chain(self.executor))
+
+    def test_bootstrap_keeps_chain_with_more_work(self):
+        mine_blocks(self.local, 3, self.keys)
+        mine_blocks(self.remote, 1, self.keys)
+        synchronizer = self.create_synchronizer({'http://peer-1:5000': self.remote})
+
+        self.assertFalse(synchronizer.bootstrap('http://peer-1:5000'))
+        self.assertEqual(self.local.pruned_height, 0)
@@ -0,0 +1,60 @@
+from unittest import TestCase
+
+from crypto.blockchain.transaction import Transaction
+from crypto.blockchain.verification import VerificationCache, verify_transactions
+from crypto.client.client import Client
+from crypto.client.key_provider import DeterministicKeyPool
+
+
+class TestVerificationCache(TestCase):
+
+    def setUp(self):
+        self.keys = DeterministicKeyPool()
+        self.user_1 = Client(self.keys)
+        self.user_2 = Client(self.keys)
+        self.transactions = []
+        for amount in range(1, 4):
+            transaction = Transaction(self.user_1.public_key, self.user_2.public_key, amount)
+            transaction.sign_transaction(self.user_1.private_key)
+            self.transactions.append(transaction)
+
+    def test_verified_transaction_is_cached(self):
+        cache = VerificationCache()
+
+        self.assertTrue(cache.verify_transaction(self.transactions[0]))
+        self.assertTrue(cache.verify_transaction(self.transactions[0]))
+
+        self.assertEqual(cache.misses, 1)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(len(cache), 1)
+
+    def test_invalid_transaction_is_not_cached(self):
+        cache = VerificationCache()
+        transaction = Transaction(self.user_1.public_key, self.user_2.public_key, 100)
+        transaction.sign_transaction(self.user_2.private_key)
+
+        self.assertFalse(cache.verify_transaction(transaction))
+        self.assertFalse(cache.verify_transaction(transaction))
+        self.assertEqual(len(cache), 0)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = VerificationCache(max_size=2)
+        cache.verify_transaction(self.transactions[0])
+        cache.verify_transaction(self.transactions[1])
+        # Uses the first transaction again, so the second one is the least recently used
+        cache.verify_transaction(self.transactions[0])
+        cache.verify_transaction(self.transactions[2])
+
+        self.assertEqual(cache.evictions, 1)
+        self.assertTrue(cache.contains(cache.cache_key(self.transactions[0])))
+        self.assertFalse(cache.contains(cache.cache_key(self.transactions[1])))
+
+    def test_batch_verification_uses_cache(self):
+        cache = VerificationCache()
+        cache.verify_transaction(self.transactions[0])
+
+        results = verify_transactions(self.transactions, cache=cache)
+
+        self.assertEqual(results, [True, True, True])
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(len(cache), 3)